@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'crex_scrapper.settings')
@@ -13,6 +14,30 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Load task modules from all registered Django apps.
 app.autodiscover_tasks()
 
+
+@worker_init.connect
+def size_scraper_session(sender=None, **kwargs):
+    # Thread-based pools run several tasks on one process's session
+    from matches.http_pool import configure_worker
+    pool = str(getattr(sender.pool_cls, '__module__', sender.pool_cls))
+    configure_worker(sender.concurrency, threaded=any(name in pool for name in ('thread', 'gevent', 'eventlet')))
+
+
+@worker_process_init.connect
+def open_scraper_session(**kwargs):
+    # Each prefork child builds its own session after the fork
+    from matches.http_pool import shared_session
+    shared_session()
+
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    # Drop a finished worker's live gauges from the shared metrics directory
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'matches.metrics.metrics_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,10 +75,27 @@ WSGI_APPLICATION = 'crex_scrapper.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# WAL lets web reads run while a worker writes. Transactions take the write
+# lock when they begin (IMMEDIATE), so a writer waits up to the busy timeout
+# for it instead of failing with "database is locked" halfway through.
+CREX_SQLITE_BUSY_TIMEOUT = 20  # seconds
+CREX_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # safe with WAL; a power cut can only lose the last commits
+    'cache_size': -64 * 1024,  # KiB of page cache per connection
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': CREX_SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in CREX_SQLITE_PRAGMAS.items()),
+        },
     }
 }
 
@@ -126,6 +144,114 @@ STATICFILES_DIRS = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Rendered pages and match-card fragments (see matches.page_cache): 'locmem' keeps them
+# in each web process, 'file' shares them between processes, None turns the page cache off
+CREX_PAGE_CACHE_BACKEND = 'locmem'
+CREX_PAGE_CACHE_TIMEOUT = 60  # seconds; a write retires pages sooner
+CREX_PAGE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'crex-pages',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'pages',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    None: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+# Cache
+# File-based so the web and Celery worker processes share one cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'django',
+    },
+    'pages': CREX_PAGE_CACHE_BACKENDS[CREX_PAGE_CACHE_BACKEND],
+    # Claims and counters that must be atomic across processes (see matches.coalesce);
+    # the file cache's add() and incr() are a read then a write
+    'coordination': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/0',
+        'KEY_PREFIX': 'crex',
+    },
+}
+CREX_STATS_CACHE_TIMEOUT = 10 * 60  # seconds; writes normally invalidate sooner
+
+# Scraper Configuration
+CREX_BASE_URL = 'https://crex.com'
+CREX_REQUEST_TIMEOUT = 30  # seconds per request
+CREX_REQUEST_CONNECT_TIMEOUT = 5  # seconds to connect; a down host fails fast
+CREX_FETCH_CONCURRENCY = 20  # parallel downloads in AsyncCREXScraper
+CREX_PARSER_ENGINE = 'lxml-targeted'  # see matches.scraper.PARSER_ENGINES
+
+# Per-worker shared HTTP session (see matches.http_pool)
+CREX_HTTP_POOL_SIZE = None  # connections per host; None sizes it to fetch concurrency x task threads
+CREX_HTTP_KEEPALIVE_IDLE = 60  # seconds before TCP keep-alive probes on an idle pooled connection
+CREX_HTTP2 = False  # multiplex over HTTP/2; needs httpx[http2]
+
+# Pipelined fetch/parse/persist stages for the bulk scraping tasks (see
+# matches.pipeline). Parsing uses a process pool only when the Celery worker
+# is not a prefork child, e.g. `celery -A crex_scrapper worker --pool threads`.
+CREX_PIPELINE = False
+CREX_PIPELINE_FETCH_WORKERS = 8
+CREX_PIPELINE_PARSE_WORKERS = None  # None uses the CPU count
+CREX_PIPELINE_PERSIST_BATCH = 20  # match pages saved per transaction
+CREX_PIPELINE_QUEUE_SIZE = 50  # pages buffered between stages
+
+# Conditional-GET response cache (set CREX_CACHE_DIR to None to disable)
+CREX_CACHE_DIR = BASE_DIR / 'cache' / 'http'
+CREX_CACHE_MAX_BYTES = 50 * 1024 * 1024
+CREX_CACHE_TTLS = {  # seconds a cached page is served without revalidating
+    'fixtures': 10 * 60,
+    'match': 30,
+    'default': 0,
+}
+
+# Adaptive live polling (see matches/scheduler.py)
+CREX_POLL_TICK = 15  # seconds between poll_due_matches runs
+CREX_POLL_INTERVALS = {  # seconds between polls of one match, by state
+    'live': 30,
+    'break': 180,
+    'pre_toss': 600,
+}
+CREX_POLL_LOOKAHEAD = 60 * 60  # start polling this long before a match
+CREX_POLL_GIVE_UP_AFTER = 12 * 60 * 60  # stop polling this long after the start
+CREX_POLL_MAX_PER_CYCLE = 100
+CREX_POLL_LEASE = 5 * 60  # seconds a cycle holds its due matches before another may poll them
+
+# Live score streaming (see matches/live.py)
+CREX_LIVE_CHANNEL = 'crex:live'
+CREX_LIVE_REDIS_URL = 'redis://localhost:6379/0'
+CREX_LIVE_KEEPALIVE = 15  # seconds between SSE keepalive comments
+
+# On-demand detail scrapes from page views (see matches.coalesce)
+CREX_SCRAPE_FRESH_TTL = 30  # seconds after a scrape before a view may enqueue another
+CREX_SCRAPE_IN_FLIGHT_TIMEOUT = 5 * 60  # drop a claim whose worker never finished
+
+# Cleanup of old matches (see matches.archive); set CREX_ARCHIVE_DIR to None to delete without archiving
+CREX_CLEANUP_AFTER_DAYS = 30
+CREX_CLEANUP_BATCH_SIZE = 500  # matches deleted per transaction
+CREX_CLEANUP_PAUSE = 0.1  # seconds between batches, for other writers
+CREX_ARCHIVE_DIR = BASE_DIR / 'archive'
+
+# Incremental exports: the next pull's watermark lags the clock by this many seconds,
+# so rows still being committed during an export are not skipped
+CREX_EXPORT_WATERMARK_MARGIN = 60
+
+# Failed fetches (see matches.breaker): tasks retry through Celery, hosts get a circuit breaker
+CREX_TASK_MAX_RETRIES = 5
+CREX_RETRY_BACKOFF = 5  # seconds; full-jitter exponential, at least any Retry-After
+CREX_RETRY_BACKOFF_MAX = 5 * 60
+CREX_BREAKER_FAILURES = 5  # consecutive failed requests that open a host's circuit
+CREX_BREAKER_RESET = 60  # seconds an open circuit waits before one probe request
+
+# Scraper writes (see matches.writer): one writer thread per process commits queued saves together
+CREX_WRITE_QUEUE = True
+CREX_WRITE_BATCH = 100  # most queued saves committed in one transaction
+
 # Celery Configuration
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
@@ -142,9 +268,9 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'matches.tasks.update_match_list',
         'schedule': crontab(minute='*/30'),
     },
-    'check-live-matches-every-5-minutes': {
-        'task': 'matches.tasks.check_live_matches',
-        'schedule': crontab(minute='*/5'),
+    'poll-due-matches': {
+        'task': 'matches.tasks.poll_due_matches',
+        'schedule': float(CREX_POLL_TICK),
     },
 }
 
@@ -0,0 +1,202 @@
+"""
+Batched cleanup of old matches, with optional compressed archival.
+
+Old matches are deleted a batch at a time by primary key, each batch in
+its own short transaction with a pause after it, so the SQLite write lock
+is never held for long and scraper writes get in between batches. Before a
+batch is deleted it can be archived as gzipped NDJSON, one file per match
+date and batch, which the archive_matches command can query or restore.
+"""
+
+import gzip
+import json
+import os
+import time
+from datetime import date, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.dateparse import parse_datetime
+
+from .models import Match, Team, Innings, MatchEvent, LiveSnapshot
+from .scorecards import BATTING_FIELDS, BOWLING_FIELDS, save_match_info, save_squads, save_scorecard
+
+MATCH_FIELDS = ['id', 'match_date', 'location', 'status', 'updated_at']
+
+
+def archive_record(match):
+    """Serialize a match with its details and events, from prefetched relations."""
+    squads = {}
+    for member in match.squad_members.all():
+        squads.setdefault(member.team_name, []).append(member.player)
+
+    scorecard = {}
+    for innings in match.innings.all():
+        scorecard[f'innings_{innings.number}'] = {
+            'batting': [{field: getattr(entry, field) for field in BATTING_FIELDS} for entry in innings.batting.all()],
+            'bowling': [{field: getattr(entry, field) for field in BOWLING_FIELDS} for entry in innings.bowling.all()],
+        }
+
+    return {
+        **{field: getattr(match, field) for field in MATCH_FIELDS},
+        'home_team': match.home_team.name,
+        'away_team': match.away_team.name,
+        'match_info': {item.label: item.value for item in match.info_items.all()},
+        'squads': squads,
+        'scorecard': scorecard,
+        'events': [
+            {'sequence': event.sequence, 'kind': event.kind, 'data': event.data, 'created_at': event.created_at}
+            for event in match.events.all()
+        ],
+    }
+
+
+def archive_batch(ids, archive_dir):
+    """Write a batch of matches to one gzipped NDJSON file per match date; return the paths.
+
+    Files are named by the batch's id range, so archiving the same batch
+    again (after a failed delete) replaces its files instead of duplicating.
+    """
+    matches = (
+        Match.objects.filter(pk__in=ids).order_by('id')
+        .select_related('home_team', 'away_team')
+        .prefetch_related(
+            'info_items', 'squad_members', 'events',
+            Prefetch('innings', queryset=Innings.objects.prefetch_related('batting', 'bowling')),
+        )
+    )
+    partitions = {}
+    for match in matches:
+        day = match.match_date.astimezone(dt_timezone.utc).date()
+        partitions.setdefault(day, []).append(archive_record(match))
+
+    paths = []
+    for day, records in partitions.items():
+        directory = os.path.join(archive_dir, day.isoformat())
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"matches-{records[0]['id']}-{records[-1]['id']}.ndjson.gz")
+        with gzip.open(f'{path}.tmp', 'wt', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, cls=DjangoJSONEncoder) + '\n')
+        os.replace(f'{path}.tmp', path)
+        paths.append(path)
+    return paths
+
+
+def delete_batch(ids):
+    """Delete one batch; return (rows, rows per model, seconds it took).
+
+    Not wrapped in atomic(): delete() collects the cascade with plain reads
+    and then runs only the deletes in its own transaction. SQLite makes a
+    transaction that starts with a write wait for the lock, but fails one
+    that read first and then writes with "database is locked" at once
+    whenever another writer holds the lock.
+    """
+    start = time.perf_counter()
+    deleted, per_model = Match.objects.filter(pk__in=ids).delete()
+    return deleted, per_model, time.perf_counter() - start
+
+
+def cleanup_matches(cutoff, batch_size=None, pause=None, archive_dir=None):
+    """Archive (if ``archive_dir`` is set) and delete matches dated before ``cutoff``.
+
+    Returns stats: matches and rows deleted, rows per second, the longest
+    time one batch held the write lock and the archive files written.
+    """
+    batch_size = batch_size or getattr(settings, 'CREX_CLEANUP_BATCH_SIZE', 500)
+    pause = getattr(settings, 'CREX_CLEANUP_PAUSE', 0.1) if pause is None else pause
+    stats = {'matches': 0, 'rows': 0, 'batches': 0, 'archived_files': 0, 'max_lock_ms': 0.0}
+
+    old_matches = Match.objects.filter(match_date__lt=cutoff).order_by('id')
+    start = time.perf_counter()
+    last_id = 0
+    while True:
+        # Keyset on the primary key: each batch starts where the last one ended
+        ids = list(old_matches.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        if archive_dir:
+            stats['archived_files'] += len(archive_batch(ids, archive_dir))
+
+        deleted, per_model, lock_seconds = delete_batch(ids)
+        stats['max_lock_ms'] = max(stats['max_lock_ms'], lock_seconds * 1000)
+
+        stats['matches'] += per_model.get(Match._meta.label, 0)
+        stats['rows'] += deleted
+        stats['batches'] += 1
+        if len(ids) == batch_size and pause:
+            # Let waiting writers take the lock before the next batch
+            time.sleep(pause)
+
+    seconds = time.perf_counter() - start
+    stats['seconds'] = round(seconds, 3)
+    stats['rows_per_second'] = round(stats['rows'] / seconds, 1) if seconds else 0.0
+    stats['max_lock_ms'] = round(stats['max_lock_ms'], 2)
+    return stats
+
+
+def archive_files(archive_dir, start=None, end=None):
+    """Archive files whose match date partition is in [start, end), oldest first."""
+    if not os.path.isdir(archive_dir):
+        return []
+    paths = []
+    for name in sorted(os.listdir(archive_dir)):
+        try:
+            day = date.fromisoformat(name)
+        except ValueError:
+            continue
+        # Partitions are UTC match dates
+        if (start and day < start.astimezone(dt_timezone.utc).date()) or (
+                end and day > end.astimezone(dt_timezone.utc).date()):
+            continue
+        directory = os.path.join(archive_dir, name)
+        paths.extend(os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith('.ndjson.gz'))
+    return paths
+
+
+def read_archive(archive_dir, start=None, end=None, team=None, status=None):
+    """Yield archived match records, filtered on match date ([start, end)), team and status."""
+    for path in archive_files(archive_dir, start, end):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                match_date = parse_datetime(record['match_date'])
+                if (start and match_date < start) or (end and match_date >= end):
+                    continue
+                if status and record['status'] != status:
+                    continue
+                if team and team.lower() not in f"{record['home_team']} {record['away_team']}".lower():
+                    continue
+                yield record
+
+
+def restore_record(record):
+    """Recreate an archived match with its details and events; False if it already exists."""
+    match_date = parse_datetime(record['match_date'])
+    home_team, _ = Team.objects.get_or_create(name=record['home_team'])
+    away_team, _ = Team.objects.get_or_create(name=record['away_team'])
+    if Match.objects.filter(pk=record['id']).exists() or Match.objects.filter(
+            home_team=home_team, away_team=away_team, match_date=match_date).exists():
+        return False
+
+    with transaction.atomic():
+        match = Match.objects.create(
+            id=record['id'], home_team=home_team, away_team=away_team, match_date=match_date,
+            location=record['location'], status=record['status'],
+        )
+        save_match_info(match, record['match_info'])
+        save_squads(match, record['squads'])
+        save_scorecard(match, record['scorecard'])
+        events = [
+            MatchEvent(match=match, sequence=event['sequence'], kind=event['kind'], data=event['data'])
+            for event in record['events']
+        ]
+        if events:
+            MatchEvent.objects.bulk_create(events)
+            # New polls must continue the sequence, not restart it
+            LiveSnapshot.objects.create(match=match, last_sequence=events[-1].sequence)
+    return True
@@ -0,0 +1,3 @@
+"""
+Offline benchmarking helpers for the matches app.
+"""
@@ -0,0 +1,155 @@
+"""
+Synthetic CREX pages shaped like the markup the scraper reads.
+"""
+
+from datetime import timedelta
+from pathlib import Path
+
+from django.utils import timezone
+
+RECORDED_DIR = Path(__file__).resolve().parent / 'recorded'
+
+TEAMS = [
+    'India', 'Australia', 'England', 'Pakistan', 'South Africa', 'New Zealand',
+    'Sri Lanka', 'West Indies', 'Bangladesh', 'Afghanistan', 'Ireland', 'Zimbabwe',
+]
+
+
+def team_pair(index):
+    """Return a deterministic (home, away) team pair for an index."""
+    home = TEAMS[index % len(TEAMS)]
+    away = TEAMS[(index + 1 + index // len(TEAMS)) % len(TEAMS)]
+    if away == home:
+        away = TEAMS[(index + 2) % len(TEAMS)]
+    return home, away
+
+
+def fixture_rows(count, start=None):
+    """Build ``count`` extracted fixture rows as extract_match_data returns them."""
+    start = start or timezone.now().replace(minute=0, second=0, microsecond=0)
+    return [
+        {
+            'home_team': f"{home} {i % 50}",
+            'away_team': f"{away} {i % 50}",
+            'match_date': start + timedelta(hours=i),
+            'location': f"Ground {i % 40}",
+            'status': 'Scheduled',
+            'match_url': f"/match/{i + 1}",
+        }
+        for i, (home, away) in ((i, team_pair(i)) for i in range(count))
+    ]
+
+
+def fixtures_page(count, chrome=False):
+    """Build a fixtures list page with ``count`` match rows."""
+    rows = []
+    for i in range(count):
+        home, away = team_pair(i)
+        day = i % 28 + 1
+        rows.append(
+            f'<div class="match-item">'
+            f'<a href="/match/{i + 1}">'
+            f'<span class="team-name">{home}</span> vs <span class="team-name">{away}</span>'
+            f'</a>'
+            f'<span class="match-date">Wed, {day:02d} Jul 2025</span>'
+            f'<span class="match-time">{i % 12 + 1}:30 PM</span>'
+            f'<span class="venue">Ground {i % 40}</span>'
+            f'</div>'
+        )
+    body = f'<div class="fixtures">{"".join(rows)}</div>'
+    if chrome:
+        return page_chrome('Match List', body)
+    return f'<html><body>{body}</body></html>'
+
+
+def page_chrome(title, body):
+    """Wrap page content in site-like navigation, scripts, ads and footer.
+
+    Real CREX pages are mostly this markup, which the extractors never read.
+    """
+    nav = ''.join(f'<li class="nav-item"><a href="/series/{n}">Series {n}</a></li>' for n in range(60))
+    script = 'window.__STATE__ = {%s};' % ','.join(f'"k{n}": [{n}, "v{n}", null]' for n in range(2500))
+    sidebar = ''.join(
+        f'<div class="other-match"><a href="/match/{n}"><span class="team-short">T{n % 30}</span>'
+        f'<span class="result">won by {n % 9} wkts</span></a></div>'
+        for n in range(250)
+    )
+    footer = ''.join(f'<p class="footer-link"><a href="/page/{n}">Link {n}</a></p>' for n in range(120))
+    return (
+        '<!DOCTYPE html><html><head>'
+        f'<meta charset="utf-8"><title>{title}</title>'
+        '<link rel="stylesheet" href="/static/site.css">'
+        f'<script>{script}</script>'
+        '</head><body>'
+        f'<header><nav><ul class="nav">{nav}</ul></nav></header>'
+        '<div class="ad-slot" data-slot="top"><!-- ad --></div>'
+        f'<main>{body}</main>'
+        f'<aside class="sidebar">{sidebar}</aside>'
+        f'<footer>{footer}</footer>'
+        '<script src="/static/app.js"></script>'
+        '</body></html>'
+    )
+
+
+def match_page(match_id, batters=11, bowlers=6, live=True, chrome=False):
+    """Build a match page with info, squads, live and scorecard sections."""
+    home, away = team_pair(match_id)
+
+    info = ''.join(
+        f'<div class="info-item"><span class="label">{label}</span><span class="value">{value}</span></div>'
+        for label, value in [
+            ('Toss', f'{home} won the toss'), ('Venue', f'Ground {match_id % 40}'),
+            ('Umpires', 'A Umpire, B Umpire'), ('Weather', 'Sunny'),
+        ]
+    )
+    squads = ''.join(
+        f'<div class="squad-section"><h3 class="team-name">{team}</h3>'
+        + ''.join(f'<div class="player">{team} Player {n}</div>' for n in range(1, 16))
+        + '</div>'
+        for team in (home, away)
+    )
+    live_section = ''
+    if live:
+        live_section = (
+            '<div class="live-section">'
+            f'<div class="score"><span class="team">{home}</span><span class="runs">{150 + match_id % 100}/4</span></div>'
+            f'<div class="score"><span class="team">{away}</span><span class="runs">Yet to bat</span></div>'
+            f'<div class="current-over">{match_id % 20}.{match_id % 6}</div>'
+            '</div>'
+        )
+    innings = []
+    for number, (batting, bowling) in enumerate([(home, away), (away, home)]):
+        batting_rows = ''.join(
+            f'<tr><td>{batting} Player {n}</td><td>c Fielder b Bowler</td>'
+            f'<td>{(n * 7 + match_id) % 80}</td><td>{(n * 9 + match_id) % 90 + 1}</td>'
+            f'<td>{n % 5}</td><td>{n % 3}</td></tr>'
+            for n in range(1, batters + 1)
+        )
+        bowling_rows = ''.join(
+            f'<tr><td>{bowling} Player {n}</td><td>{n + 3}</td><td>{n % 2}</td>'
+            f'<td>{(n * 11 + match_id) % 60}</td><td>{n % 4}</td></tr>'
+            for n in range(10, 10 + bowlers)
+        )
+        innings.append(
+            f'<div class="innings" id="innings-{number + 1}">'
+            '<table class="batting-table"><tr><th>Batter</th><th></th><th>R</th><th>B</th><th>4s</th><th>6s</th></tr>'
+            f'{batting_rows}</table>'
+            '<table class="bowling-table"><tr><th>Bowler</th><th>O</th><th>M</th><th>R</th><th>W</th></tr>'
+            f'{bowling_rows}</table>'
+            '</div>'
+        )
+
+    body = f'<div class="match-info">{info}</div>{squads}{live_section}{"".join(innings)}'
+    if chrome:
+        return page_chrome(f'{home} vs {away}', body)
+    return f'<html><head><title>{home} vs {away}</title></head><body>{body}</body></html>'
+
+
+
+def recorded_pages():
+    """Load the recorded corpus as {file name: (page type, content)}."""
+    corpus = {}
+    for path in sorted(RECORDED_DIR.glob('*.html')):
+        page_type = 'match_list' if path.name.startswith('fixtures') else 'match'
+        corpus[path.name] = (page_type, path.read_bytes())
+    return corpus
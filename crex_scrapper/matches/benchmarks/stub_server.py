@@ -0,0 +1,127 @@
+"""
+Local HTTP stand-in for the CREX site used by benchmarks and tests.
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import pages
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serve synthetic or recorded fixtures and match pages."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; with Nagle on, keep-alive responses stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        with server.stats_lock:
+            server.requests_served += 1
+            failed = server.error_rate and server.random.random() < server.error_rate
+            if failed:
+                server.errors_served += 1
+        if failed:
+            self.send_error(503)
+            return
+
+        match = re.fullmatch(r'/match/(\d+)/?', self.path)
+        if self.path.rstrip('/') == '/fixtures/match-list':
+            if server.corpus:
+                payload = server.corpus['fixtures.html'][1]
+            else:
+                payload = pages.fixtures_page(server.fixture_count, chrome=server.chrome).encode('utf-8')
+        elif match:
+            match_id = int(match.group(1))
+            if server.corpus:
+                # Alternate live and pre-match pages
+                payload = server.corpus['match_live.html' if match_id % 2 else 'match_scheduled.html'][1]
+            else:
+                payload = pages.match_page(match_id, chrome=server.chrome).encode('utf-8')
+        else:
+            self.send_error(404)
+            return
+
+        etag = '"%s"' % hashlib.md5(payload).hexdigest()
+
+        if self.headers.get('If-None-Match') == etag:
+            with server.stats_lock:
+                server.not_modified_served += 1
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubServer:
+    """Threaded HTTP server that runs in the background of the current process.
+
+    Use it as a context manager; ``base_url`` points a scraper at it. With
+    ``recorded`` set it serves the recorded corpus instead of synthetic
+    pages, and ``error_rate`` answers that fraction of requests with 503.
+    """
+
+    def __init__(self, latency=0.0, fixture_count=50, chrome=False, recorded=False, error_rate=0.0,
+                 seed=0, host='127.0.0.1', port=0):
+        self.httpd = StubHTTPServer((host, port), StubRequestHandler)
+        self.httpd.latency = latency
+        self.httpd.fixture_count = fixture_count
+        self.httpd.chrome = chrome
+        self.httpd.corpus = pages.recorded_pages() if recorded else None
+        self.httpd.error_rate = error_rate
+        self.httpd.random = random.Random(seed)
+        self.httpd.requests_served = 0
+        self.httpd.not_modified_served = 0
+        self.httpd.errors_served = 0
+        self.httpd.stats_lock = threading.Lock()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests_served(self):
+        return self.httpd.requests_served
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,202 @@
+"""
+Offline scraper benchmark suite.
+
+Every benchmark runs against the recorded corpus or a local StubServer,
+never the live site, and against whatever database is active (use
+scratch_database()). Results are plain dicts so they can be saved as JSON
+and compared between commits.
+"""
+
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from matches.extraction import selector_report
+from matches.models import Match, PageFingerprint
+from matches.scraper import CREXScraper, AsyncCREXScraper
+
+from .pages import fixture_rows, recorded_pages
+from .stub_server import StubServer
+
+# Metrics where a larger value is a regression
+LOWER_IS_BETTER = ['p50_ms', 'p99_ms', 'peak_mib']
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def measure(name, func, repeat=20, items=1, setup=None):
+    """Time ``func`` over ``repeat`` runs, then trace its peak memory in one more.
+
+    ``items`` is the amount of work one run does (pages, rows, matches) and
+    sets the throughput unit. ``setup`` runs untimed before every call.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'name': name,
+        'runs': repeat,
+        'items': items,
+        'throughput': round(items * repeat / sum(samples), 2),
+        'p50_ms': round(statistics.median(samples) * 1000, 3),
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+        'peak_mib': round(peak / 2 ** 20, 3),
+    }
+
+
+def extractor_benchmarks(repeat, parser=None):
+    """Per-row and per-section extractors on pre-parsed recorded pages."""
+    scraper = CREXScraper(cache=False, parser=parser)
+    corpus = recorded_pages()
+
+    fixtures = corpus['fixtures.html'][1]
+    containers = scraper.parser.parse(fixtures, 'match_list').find_all('div', class_=['match-item', 'fixture-item'])
+    match_page = corpus['match_live.html'][1]
+    soup = scraper.parser.parse(match_page, 'match')
+
+    def extract_all():
+        for container in containers:
+            scraper.extract_match_data(container)
+
+    results = [measure('extract_match_data', extract_all, repeat, items=len(containers))]
+    for extractor in ['scrape_match_info', 'scrape_squads', 'scrape_live_data', 'scrape_scorecard']:
+        results.append(measure(extractor, lambda extractor=extractor: getattr(scraper, extractor)(soup), repeat))
+    results.append(measure('extract_match_rows (parse + extract)',
+                           lambda: scraper.extract_match_rows(fixtures), repeat))
+    results.append(measure('parse_match_details (parse + extract)',
+                           lambda: scraper.parse_match_details(match_page), repeat))
+    return results
+
+
+def persistence_benchmarks(repeat, rows=100):
+    """save_match_data one row at a time into an empty table."""
+    scraper = CREXScraper(cache=False)
+    fixtures = fixture_rows(rows)
+
+    def save_all():
+        for row in fixtures:
+            scraper.save_match_data(row)
+
+    return [measure('save_match_data', save_all, repeat, items=rows, setup=lambda: Match.objects.all().delete())]
+
+
+def cycle_benchmarks(repeat, latency=0.0, error_rate=0.0, live_matches=50, concurrency=10, seed=0):
+    """Full scrape_match_list and check_live_matches cycles against the stub server.
+
+    Fingerprints are cleared before each run so every cycle parses and saves.
+    """
+    with StubServer(latency=latency, recorded=True, error_rate=error_rate, seed=seed) as server:
+        def fresh_list():
+            PageFingerprint.objects.all().delete()
+            Match.objects.all().delete()
+
+        results = [measure(
+            'scrape_match_list cycle',
+            lambda: CREXScraper(base_url=server.base_url, cache=False).scrape_match_list(),
+            repeat, setup=fresh_list,
+        )]
+
+        # Matches inside check_live_matches' window
+        now = timezone.now()
+        rows = fixture_rows(live_matches)
+        for i, row in enumerate(rows):
+            row['match_date'] = now - timedelta(minutes=i)
+
+        def fresh_live():
+            PageFingerprint.objects.all().delete()
+            Match.objects.all().delete()
+            CREXScraper(cache=False).save_match_batch(rows)
+
+        results.append(measure(
+            'check_live_matches cycle (serial)',
+            lambda: CREXScraper(base_url=server.base_url, cache=False).check_live_matches(),
+            repeat, items=live_matches, setup=fresh_live,
+        ))
+        results.append(measure(
+            f'check_live_matches cycle (async x{concurrency})',
+            lambda: AsyncCREXScraper(base_url=server.base_url, cache=False, concurrency=concurrency).check_live_matches(),
+            repeat, items=live_matches, setup=fresh_live,
+        ))
+        served = {'requests': server.requests_served, 'errors': server.httpd.errors_served}
+    return results, served
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(repeat=20, cycle_repeat=5, latency=0.0, error_rate=0.0, live_matches=50, concurrency=10,
+              parser=None, seed=0):
+    """Run every benchmark and return the results with the conditions they ran under."""
+    benchmarks = extractor_benchmarks(repeat, parser)
+    benchmarks += persistence_benchmarks(cycle_repeat)
+    cycles, served = cycle_benchmarks(cycle_repeat, latency, error_rate, live_matches, concurrency, seed)
+    benchmarks += cycles
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'parser': parser or getattr(settings, 'CREX_PARSER_ENGINE', 'lxml-targeted'),
+            'repeat': repeat,
+            'cycle_repeat': cycle_repeat,
+            'latency': latency,
+            'error_rate': error_rate,
+            'live_matches': live_matches,
+            'concurrency': concurrency,
+            'stub_server': served,
+        },
+        'benchmarks': benchmarks,
+        'selectors': selector_report(),
+    }
+
+
+def compare(results, baseline, threshold=0.1):
+    """Return (name, metric, baseline, current, change) for metrics that got worse.
+
+    A metric regresses when it moved more than ``threshold`` (a fraction)
+    in the wrong direction; throughput regresses when it drops.
+    """
+    previous = {bench['name']: bench for bench in baseline['benchmarks']}
+    regressions = []
+    for bench in results['benchmarks']:
+        old = previous.get(bench['name'])
+        if not old:
+            continue
+        for metric in LOWER_IS_BETTER + ['throughput']:
+            if not old[metric]:
+                continue
+            change = (bench[metric] - old[metric]) / old[metric]
+            worse = -change if metric == 'throughput' else change
+            if worse > threshold:
+                regressions.append((bench['name'], metric, old[metric], bench[metric], change))
+    return regressions
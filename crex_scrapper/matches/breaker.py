@@ -0,0 +1,144 @@
+"""
+Per-host circuit breaker and retry backoff for page downloads.
+
+After CREX_BREAKER_FAILURES consecutive failed requests to a host its
+circuit opens and requests fail at once with CircuitOpen instead of
+waiting out timeouts. Once CREX_BREAKER_RESET seconds have passed a single
+probe request is let through: success closes the circuit, failure opens
+it again. State lives in the Django cache, so every worker process sees
+the same circuit. Tasks reschedule failed fetches through Celery with
+retry_countdown() rather than sleeping in the worker.
+"""
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import BREAKER_REJECTIONS, BREAKER_TRANSITIONS
+
+FAILURES_KEY = 'matches:breaker:failures:{}'
+OPEN_UNTIL_KEY = 'matches:breaker:open_until:{}'
+PROBE_KEY = 'matches:breaker:probe:{}'
+HOSTS_KEY = 'matches:breaker:hosts'
+
+# Responses that mean the host is in trouble, as opposed to a bad URL
+FAILURE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """A request was refused because its host's circuit is open."""
+
+    def __init__(self, host, retry_after):
+        super().__init__(f"Circuit open for {host}, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def host_of(url):
+    return urlsplit(url).netloc
+
+
+def failure_threshold():
+    return getattr(settings, 'CREX_BREAKER_FAILURES', 5)
+
+
+def reset_timeout():
+    return getattr(settings, 'CREX_BREAKER_RESET', 60)
+
+
+def before_request(url):
+    """Raise CircuitOpen unless a request to this URL's host may be sent now."""
+    host = host_of(url)
+    open_until = cache.get(OPEN_UNTIL_KEY.format(host))
+    if open_until is None:
+        return
+    remaining = open_until - time.time()
+    # Half open: exactly one request probes the host, the rest keep failing fast
+    if remaining > 0 or not cache.add(PROBE_KEY.format(host), True, reset_timeout()):
+        BREAKER_REJECTIONS.labels(host).inc()
+        raise CircuitOpen(host, max(remaining, 1))
+
+
+def record_success(url):
+    """Close the host's circuit after a good response."""
+    host = host_of(url)
+    keys = [FAILURES_KEY.format(host), OPEN_UNTIL_KEY.format(host)]
+    state = cache.get_many(keys)
+    if state.get(keys[0]) or keys[1] in state:
+        cache.delete_many(keys + [PROBE_KEY.format(host)])
+        if keys[1] in state:
+            BREAKER_TRANSITIONS.labels(host, 'closed').inc()
+
+
+def record_failure(url):
+    """Count a failed request, opening the host's circuit at the threshold or on a failed probe."""
+    host = host_of(url)
+    key = FAILURES_KEY.format(host)
+    if cache.add(key, 1, None):
+        failures = 1
+        remember_host(host)
+    else:
+        try:
+            failures = cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, 1, None)
+            failures = 1
+
+    probing = cache.get(OPEN_UNTIL_KEY.format(host)) is not None
+    if failures >= failure_threshold() or probing:
+        cache.set(OPEN_UNTIL_KEY.format(host), time.time() + reset_timeout(), None)
+        cache.delete(PROBE_KEY.format(host))
+        BREAKER_TRANSITIONS.labels(host, 'open').inc()
+
+
+def remember_host(host):
+    hosts = cache.get(HOSTS_KEY) or []
+    if host not in hosts:
+        cache.set(HOSTS_KEY, hosts + [host], None)
+
+
+def breaker_states():
+    """Return {host: state, failures, retry_in} for every host that has failed."""
+    states = {}
+    for host in cache.get(HOSTS_KEY) or []:
+        failures = cache.get(FAILURES_KEY.format(host)) or 0
+        open_until = cache.get(OPEN_UNTIL_KEY.format(host))
+        if open_until is None:
+            state, retry_in = 'closed', 0
+        else:
+            retry_in = max(open_until - time.time(), 0)
+            state = 'open' if retry_in else 'half_open'
+        states[host] = {'state': state, 'failures': failures, 'retry_in': round(retry_in)}
+    return states
+
+
+def retry_after(exc):
+    """Seconds a failed request asked us to wait (Retry-After or an open circuit), or 0."""
+    if isinstance(exc, CircuitOpen):
+        return exc.retry_after
+    response = getattr(exc, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return 0
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def retry_countdown(retries, exc=None):
+    """Seconds before the next attempt: full-jitter exponential backoff, at least what the host asked for."""
+    base = getattr(settings, 'CREX_RETRY_BACKOFF', 5)
+    cap = getattr(settings, 'CREX_RETRY_BACKOFF_MAX', 300)
+    backoff = random.uniform(0, min(cap, base * 2 ** retries))
+    return min(max(backoff, retry_after(exc) if exc is not None else 0), cap)
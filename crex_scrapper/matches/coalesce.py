@@ -0,0 +1,69 @@
+"""
+Coalescing of on-demand match detail scrapes.
+
+Page views ask for a scrape of the match they show. At most one scrape per
+match is in flight at a time, tracked with add() on the 'coordination'
+cache; requests that arrive meanwhile join it instead of enqueueing another
+task, and none are enqueued while the last scrape is younger than the
+freshness TTL. The claim and the counters must be atomic across web
+processes, so that cache is Redis (SET NX, INCR), not the file cache.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+
+IN_FLIGHT_KEY = 'matches:scrape:in_flight:{}'
+FRESH_KEY = 'matches:scrape:fresh:{}'
+REQUESTS_KEY = 'matches:scrape:requests:{}'
+
+# enqueued: a task was sent; in_flight: joined a running scrape; fresh: details recent enough
+REQUEST_OUTCOMES = ['enqueued', 'in_flight', 'fresh']
+
+
+def coordination_cache():
+    return caches['coordination']
+
+
+def claim_scrape(match_id):
+    """Decide whether a scrape request for a match should enqueue a task.
+
+    Returns 'enqueued' when the caller now holds the in-flight claim and
+    must send the task (or call release_scrape if it cannot), otherwise
+    the reason it was suppressed.
+    """
+    cache = coordination_cache()
+    if cache.get(FRESH_KEY.format(match_id)):
+        outcome = 'fresh'
+    elif cache.add(IN_FLIGHT_KEY.format(match_id), True, getattr(settings, 'CREX_SCRAPE_IN_FLIGHT_TIMEOUT', 5 * 60)):
+        outcome = 'enqueued'
+    else:
+        outcome = 'in_flight'
+    record_request(outcome)
+    return outcome
+
+
+def release_scrape(match_id, fresh=True):
+    """Finish a match's in-flight scrape, marking its details fresh if it succeeded."""
+    cache = coordination_cache()
+    if fresh:
+        cache.set(FRESH_KEY.format(match_id), True, getattr(settings, 'CREX_SCRAPE_FRESH_TTL', 30))
+    cache.delete(IN_FLIGHT_KEY.format(match_id))
+
+
+def record_request(outcome):
+    cache = coordination_cache()
+    key = REQUESTS_KEY.format(outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def scrape_request_stats():
+    """Return how many scrape requests were enqueued and how many were suppressed."""
+    counts = coordination_cache().get_many([REQUESTS_KEY.format(outcome) for outcome in REQUEST_OUTCOMES])
+    stats = {outcome: counts.get(REQUESTS_KEY.format(outcome), 0) for outcome in REQUEST_OUTCOMES}
+    stats['suppressed'] = stats['in_flight'] + stats['fresh']
+    return stats
@@ -0,0 +1,84 @@
+"""
+Append-only event store of live match changes.
+
+Each live poll is a full snapshot of the live section. It is diffed against
+the last snapshot stored for the match and only what changed is appended
+as events: a ball when the over count moves, a score change per team, a
+wicket when a team's wicket count goes up and a plain update for anything
+else. Clients read the events after the last sequence they saw instead of
+refetching whole scorecards.
+"""
+
+import re
+
+from .models import MatchEvent, LiveSnapshot
+
+# "157/4", "157/4 (18.2)" or "157"; anything else ("Yet to bat") has no score
+SCORE_PATTERN = re.compile(r'^\s*(\d+)(?:\s*/\s*(\d+))?')
+
+EVENT_FIELDS = ['sequence', 'kind', 'data', 'created_at']
+
+
+def parse_score(value):
+    """Return (runs, wickets) from a score string, or None if it is not a score."""
+    match = SCORE_PATTERN.match(value or '')
+    if not match:
+        return None
+    runs, wickets = match.groups()
+    return int(runs), int(wickets or 0)
+
+
+def diff_live(previous, live):
+    """Return (kind, data) events for what changed from one live section to the next."""
+    events = []
+    for key, value in live.items():
+        old = previous.get(key)
+        if old == value:
+            continue
+        if key == 'current_over':
+            events.append(('ball', {'over': value, 'previous': old}))
+            continue
+
+        score, old_score = parse_score(value), parse_score(old)
+        if score is None:
+            events.append(('update', {'key': key, 'value': value, 'previous': old}))
+            continue
+        events.append(('score', {'team': key, 'score': value, 'runs': score[0], 'wickets': score[1],
+                                 'previous': old}))
+        # Wickets already down when a team is first seen are not new wickets
+        old_wickets = old_score[1] if old_score else (0 if old is not None else score[1])
+        if score[1] > old_wickets:
+            events.append(('wicket', {'team': key, 'wickets': score[1], 'score': value}))
+    return events
+
+
+def save_live_events(match, live):
+    """Append events for a match's new live section; a section writer.
+
+    Returns (events written, live values unchanged). An empty section (the
+    match is not live) is not a change and leaves the snapshot alone.
+    """
+    if not live:
+        return 0, 0
+    snapshot, _ = LiveSnapshot.objects.select_for_update().get_or_create(match=match)
+    events = diff_live(snapshot.live, live)
+    unchanged = len(live) - sum(1 for kind, _ in events if kind != 'wicket')
+
+    if events:
+        first = snapshot.last_sequence + 1
+        MatchEvent.objects.bulk_create([
+            MatchEvent(match=match, sequence=sequence, kind=kind, data=data)
+            for sequence, (kind, data) in enumerate(events, start=first)
+        ])
+        snapshot.last_sequence += len(events)
+    snapshot.live = live
+    snapshot.save(update_fields=['live', 'last_sequence'])
+    return len(events), unchanged
+
+
+def events_since(match_id, since=0, limit=500):
+    """Return up to ``limit`` events of a match with a sequence above ``since``, oldest first."""
+    return list(
+        MatchEvent.objects.filter(match_id=match_id, sequence__gt=since)
+        .order_by('sequence').values(*EVENT_FIELDS)[:limit]
+    )
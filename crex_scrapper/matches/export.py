@@ -0,0 +1,240 @@
+"""
+Streaming bulk export of matches and scorecards.
+
+Rows are read with QuerySet.iterator() and written out a chunk at a time,
+so memory stays flat however large the table is. The HTTP endpoint and
+the export_matches management command share everything here.
+
+Writers stamp updated_at before they commit, so the watermark handed back
+for the next incremental pull lags the clock by
+CREX_EXPORT_WATERMARK_MARGIN: a row stamped just before an export but
+committed after its read is picked up by the next pull instead of lost.
+Pulls may repeat the rows of that margin.
+"""
+
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Match, BattingEntry, BowlingEntry
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet export is optional
+    pyarrow = None
+
+# Dataset -> (model, output column -> .values() lookup, lookup prefix to the match)
+EXPORT_DATASETS = {
+    'matches': (Match, {
+        'id': 'id',
+        'home_team': 'home_team__name',
+        'away_team': 'away_team__name',
+        'match_date': 'match_date',
+        'location': 'location',
+        'status': 'status',
+        'updated_at': 'updated_at',
+    }, ''),
+    'batting': (BattingEntry, {
+        'match_id': 'innings__match_id',
+        'innings': 'innings__number',
+        'position': 'position',
+        'player': 'player',
+        'dismissal': 'dismissal',
+        'runs': 'runs',
+        'balls': 'balls',
+        'fours': 'fours',
+        'sixes': 'sixes',
+    }, 'innings__match__'),
+    'bowling': (BowlingEntry, {
+        'match_id': 'innings__match_id',
+        'innings': 'innings__number',
+        'position': 'position',
+        'player': 'player',
+        'overs': 'overs',
+        'maidens': 'maidens',
+        'runs': 'runs',
+        'wickets': 'wickets',
+    }, 'innings__match__'),
+}
+
+
+def export_fields(dataset):
+    """Map each output column of a dataset to the model field it reads."""
+    model, columns, _ = EXPORT_DATASETS[dataset]
+    fields = {}
+    for column, lookup in columns.items():
+        *relations, name = lookup.split('__')
+        opts = model._meta
+        for relation in relations:
+            opts = opts.get_field(relation).related_model._meta
+        field = opts.get_field(name)
+        # A foreign key column holds the related primary key
+        fields[column] = field.target_field if field.is_relation else field
+    return fields
+
+
+def export_watermark():
+    """The ``since`` for the next incremental pull after an export starting now."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'CREX_EXPORT_WATERMARK_MARGIN', 60))
+
+
+def export_rows(dataset='matches', status=None, start=None, end=None, since=None, chunk_size=2000):
+    """Return an iterator of export rows as dicts, filtered on their match.
+
+    ``start``/``end`` bound the match date ([start, end)) and ``since``
+    keeps only matches updated after it, for incremental pulls. Deleted
+    matches are not reported.
+    """
+    try:
+        model, columns, prefix = EXPORT_DATASETS[dataset]
+    except KeyError:
+        raise ValueError(f"Unknown export dataset: {dataset}")
+
+    filters = {}
+    if status:
+        filters[f'{prefix}status'] = status
+    if start:
+        filters[f'{prefix}match_date__gte'] = start
+    if end:
+        filters[f'{prefix}match_date__lt'] = end
+    if since:
+        filters[f'{prefix}updated_at__gt'] = since
+
+    queryset = model.objects.filter(**filters).order_by('pk').values_list(*columns.values())
+    names = list(columns)
+    return (dict(zip(names, row)) for row in queryset.iterator(chunk_size=chunk_size))
+
+
+def parse_timestamp(value):
+    """Parse an ISO date or datetime filter value, in the current timezone if naive."""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date or datetime: {value}")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def chunked(rows, size):
+    """Group an iterator into lists of up to ``size`` items."""
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def ndjson_chunks(rows, columns, chunk_size):
+    for chunk in chunked(rows, chunk_size):
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in chunk)
+
+
+class Echo:
+    """File-like object whose write() returns the written value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows, columns, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for chunk in chunked(rows, chunk_size):
+        yield ''.join(writer.writerow([row[column] for column in columns]) for row in chunk)
+
+
+class ChunkSink:
+    """Write-only file that collects what a Parquet writer emits until drained."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def writable(self):
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_type(field):
+    """The Arrow type for a model field's values."""
+    internal_type = field.get_internal_type()
+    if internal_type.endswith(('IntegerField', 'AutoField')):
+        return pyarrow.int64()
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC' if settings.USE_TZ else None)
+    if internal_type == 'DateField':
+        return pyarrow.date32()
+    if internal_type == 'BooleanField':
+        return pyarrow.bool_()
+    if internal_type == 'FloatField':
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def parquet_chunks(rows, columns, chunk_size):
+    """Write one Parquet row group per chunk, yielding bytes as they are written.
+
+    The schema comes from the model fields, not the first chunk, so a
+    column that starts out all None keeps its type.
+    """
+    schema = pyarrow.schema([(column, parquet_type(field)) for column, field in columns.items()])
+    sink = ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(pyarrow.PythonFile(sink, mode='w'), schema)
+    for chunk in chunked(rows, chunk_size):
+        writer.write_table(pyarrow.Table.from_pylist(chunk, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+# Format -> (content type, file extension, chunk writer)
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson', ndjson_chunks),
+    'csv': ('text/csv', 'csv', csv_chunks),
+    'parquet': ('application/vnd.apache.parquet', 'parquet', parquet_chunks),
+}
+
+
+def export_stream(fmt='ndjson', dataset='matches', chunk_size=2000, **filters):
+    """Return (content type, extension, iterator of str/bytes chunks) for an export."""
+    try:
+        content_type, extension, write_chunks = EXPORT_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet' and pyarrow is None:
+        raise ValueError("Parquet export needs the pyarrow package")
+
+    rows = export_rows(dataset, chunk_size=chunk_size, **filters)
+    # Output column -> model field, in column order
+    columns = export_fields(dataset)
+    return content_type, extension, write_chunks(rows, columns, chunk_size)
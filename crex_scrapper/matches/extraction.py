@@ -0,0 +1,289 @@
+"""
+Declarative extraction specs with a learned fallback order.
+
+Every element the extractors read is declared once in EXTRACTION_SPECS as
+a chain of selectors tried in turn. Selectors are compiled once: simple
+CSS (``tag.class``, ``tag[attr]`` and groups of them) becomes the
+equivalent BeautifulSoup find/find_all call, which is the fastest match on
+our trees, and anything richer is compiled with soupsieve. A chain tries
+its selectors in the declared order, cheap and exact first. Selectors
+grouped in a tuple find the same thing in different ways, so within a
+group the chain remembers which one last succeeded and tries it first
+next time; looser fallbacks that can return different results keep their
+place. Every selector keeps hit and timing counts so slow fallbacks show up when
+the site's markup changes. The counts are plain attributes on the hot path
+and are pushed to Prometheus once per page by flush_metrics().
+"""
+
+import abc
+import re
+import threading
+import time
+
+import soupsieve
+from prometheus_client import Counter
+
+SELECTOR_ATTEMPTS = Counter(
+    'crex_selector_attempts', "Selector lookups, by chain, selector and outcome.", ['chain', 'selector', 'outcome'],
+)
+SELECTOR_SECONDS = Counter('crex_selector_seconds', "Time spent in selector lookups.", ['chain', 'selector'])
+
+# Guards the exported snapshot of every selector's counts
+_flush_lock = threading.Lock()
+
+# tag, tag.class or tag[attr]
+SIMPLE_SELECTOR = re.compile(r'^([a-z][a-z0-9]*)(?:\.([\w-]+)|\[([\w-]+)\])?$')
+
+
+class Selector(abc.ABC):
+    """One way of finding an element; subclasses implement find()."""
+
+    # Needs the whole document rather than the targeted subtrees
+    full_document = False
+
+    def __init__(self, label):
+        self.label = label
+        self.attempts = 0
+        self.hits = 0
+        self.seconds = 0.0
+        # (attempts, hits, seconds) already added to the Prometheus counters
+        self.exported = (0, 0, 0.0)
+
+    @abc.abstractmethod
+    def find(self, node, many):
+        """Return the matching element(s) under ``node``: a list when ``many``, else one or None."""
+
+    def bind(self, chain):
+        """Attach the Prometheus children for the chain this selector belongs to."""
+        self.hit_counter = SELECTOR_ATTEMPTS.labels(chain, self.label, 'hit')
+        self.miss_counter = SELECTOR_ATTEMPTS.labels(chain, self.label, 'miss')
+        self.seconds_counter = SELECTOR_SECONDS.labels(chain, self.label)
+
+    def record(self, found, elapsed):
+        self.attempts += 1
+        self.seconds += elapsed
+        if found:
+            self.hits += 1
+
+    def flush(self):
+        """Add the counts since the last flush to the Prometheus counters."""
+        attempts, hits, seconds = self.attempts, self.hits, self.seconds
+        old_attempts, old_hits, old_seconds = self.exported
+        self.exported = (attempts, hits, seconds)
+        if hits > old_hits:
+            self.hit_counter.inc(hits - old_hits)
+        if attempts - hits > old_attempts - old_hits:
+            self.miss_counter.inc(attempts - hits - (old_attempts - old_hits))
+        if seconds > old_seconds:
+            self.seconds_counter.inc(seconds - old_seconds)
+
+
+class CSS(Selector):
+    """A CSS selector; with ``text`` set the stripped text is returned instead of tags."""
+
+    def __init__(self, css, text=False, full_document=False):
+        super().__init__(css)
+        self.text = text
+        self.full_document = full_document
+        self.find_args = self.compile_simple(css)
+        self.pattern = None if self.find_args else soupsieve.compile(css)
+
+    @staticmethod
+    def compile_simple(css):
+        """Turn a group of simple selectors into (name, find kwargs), or None."""
+        parts = [SIMPLE_SELECTOR.match(part.strip()) for part in css.split(',')]
+        if not all(parts):
+            return None
+        tags = {part.group(1) for part in parts}
+        classes = [part.group(2) for part in parts]
+        attrs = [part.group(3) for part in parts]
+        if len(tags) != 1:
+            return None
+        if len(parts) == 1 and attrs[0]:
+            return tags.pop(), {'attrs': {attrs[0]: True}}
+        if all(classes) and not any(attrs):
+            return tags.pop(), {'class_': classes}
+        if len(parts) == 1:
+            return tags.pop(), {}
+        return None
+
+    def find(self, node, many):
+        if self.find_args:
+            name, kwargs = self.find_args
+            found = node.find_all(name, **kwargs) if many else node.find(name, **kwargs)
+        else:
+            found = self.pattern.select(node) if many else self.pattern.select_one(node)
+        if not self.text:
+            return found
+        if many:
+            return [tag.get_text().strip() for tag in found]
+        return found.get_text().strip() if found is not None else None
+
+
+class Text(Selector):
+    """Elements of a tag whose own string matches a regex."""
+
+    def __init__(self, tag, pattern, flags=re.IGNORECASE, full_document=False):
+        super().__init__(f"{tag}:text({pattern})")
+        self.tag = tag
+        self.pattern = re.compile(pattern, flags)
+        self.full_document = full_document
+
+    def find(self, node, many):
+        if many:
+            return node.find_all(self.tag, string=self.pattern)
+        return node.find(self.tag, string=self.pattern)
+
+
+class Regex(Selector):
+    """Groups of a regex searched over an element's text."""
+
+    def __init__(self, pattern, flags=re.IGNORECASE):
+        super().__init__(f"regex({pattern})")
+        self.pattern = re.compile(pattern, flags)
+
+    def find(self, node, many):
+        match = self.pattern.search(node.get_text())
+        if not match:
+            return [] if many else None
+        groups = [group.strip() for group in match.groups()]
+        return groups if many else groups[0]
+
+
+class SelectorChain:
+    """Selectors for one field, tried in turn until one finds enough.
+
+    Each item of ``selectors`` is a selector or a tuple of equivalent
+    selectors, whose order is learned.
+    """
+
+    def __init__(self, name, selectors, many=False, min_count=1):
+        self.name = name
+        self.selectors = []
+        # Selector index -> (start, end) of its group's positions in order
+        self.spans = []
+        for item in selectors:
+            group = list(item) if isinstance(item, tuple) else [item]
+            start = len(self.selectors)
+            self.selectors.extend(group)
+            self.spans.extend([(start, start + len(group))] * len(group))
+        self.many = many
+        self.min_count = min_count
+        # Indexes into selectors; within each group, last successful first
+        self.order = list(range(len(self.selectors)))
+        self.lock = threading.Lock()
+        for selector in self.selectors:
+            selector.bind(name)
+
+    def select(self, node, document=None):
+        """Return the first selector's result that finds something.
+
+        ``document`` is a callable returning the whole document, for
+        selectors that cannot work on the targeted subtrees.
+        """
+        for position, index in enumerate(self.order):
+            selector = self.selectors[index]
+            target = node
+            if selector.full_document:
+                if document is None:
+                    continue
+                target = document()
+
+            start = time.perf_counter()
+            result = selector.find(target, self.many)
+            found = len(result) >= self.min_count if self.many else result is not None
+            selector.record(found, time.perf_counter() - start)
+
+            if found:
+                start, end = self.spans[index]
+                if position != start:
+                    with self.lock:
+                        order = self.order
+                        group = [index] + [i for i in order[start:end] if i != index]
+                        self.order = order[:start] + group + order[end:]
+                return result
+        return [] if self.many else None
+
+
+def declare(name, *selectors, many=False, min_count=1):
+    """Return (field, chain) for a chain named ``page_type.field``."""
+    field = name.split('.', 1)[1]
+    return field, SelectorChain(name, list(selectors), many=many, min_count=min_count)
+
+
+# Page type -> field -> selector chain, in the order the extractors read them.
+# Each tuple holds the class names the site's current and older layouts use
+# for the same element; a page uses one of them, so the one that matched
+# last is tried first. The containers and teams fallbacks match more than
+# their CSS (any div with "vs", the text around the team spans), so they
+# stay behind the groups, ungrouped.
+EXTRACTION_SPECS = {
+    'match_list': dict([
+        declare('match_list.containers',
+                (CSS('div.match-item'), CSS('div.fixture-item')),
+                Text('div', r'vs|V/s', full_document=True),
+                many=True),
+    ]),
+    'fixture': dict([
+        declare('fixture.teams',
+                (CSS('span.team-name', text=True), CSS('span.team', text=True)),
+                Regex(r'([A-Za-z\s]+)\s+vs\s+([A-Za-z\s]+)'),
+                many=True, min_count=2),
+        declare('fixture.date', (CSS('span.match-date', text=True), CSS('span.date', text=True))),
+        declare('fixture.time', (CSS('span.match-time', text=True), CSS('span.time', text=True))),
+        declare('fixture.location', (CSS('span.location', text=True), CSS('span.venue', text=True))),
+        declare('fixture.link', CSS('a[href]')),
+    ]),
+    'match': dict([
+        declare('match.info_section', (CSS('div.match-info'), CSS('div.info-section'))),
+        declare('match.info_items', CSS('div.info-item'), many=True),
+        declare('match.info_label', CSS('span.label', text=True)),
+        declare('match.info_value', CSS('span.value', text=True)),
+        declare('match.squad_sections', (CSS('div.squad-section'), CSS('div.team-squad')), many=True),
+        declare('match.squad_team', CSS('h3.team-name', text=True)),
+        declare('match.squad_players', (CSS('div.player', text=True), CSS('div.player-name', text=True)), many=True),
+        declare('match.live_section', (CSS('div.live-section'), CSS('div.live-score'))),
+        declare('match.live_scores', CSS('div.score'), many=True),
+        declare('match.score_team', CSS('span.team', text=True)),
+        declare('match.score_runs', CSS('span.runs', text=True)),
+        declare('match.current_over', CSS('div.current-over', text=True)),
+        declare('match.innings', (CSS('div.innings'), CSS('div.innings-section')), many=True),
+        declare('match.batting_table', (CSS('table.batting-table'), CSS('table.scorecard-table'))),
+        declare('match.bowling_table', (CSS('table.bowling-table'), CSS('table.bowling-scorecard'))),
+        declare('match.table_rows', CSS('tr'), many=True),
+        declare('match.cells', CSS('td', text=True), many=True),
+    ]),
+}
+
+
+def select(page_type, field, node, document=None):
+    """Run the declared selector chain for a field against a node."""
+    return EXTRACTION_SPECS[page_type][field].select(node, document)
+
+
+def flush_metrics():
+    """Push every selector's counts to Prometheus; call once per extracted page."""
+    with _flush_lock:
+        for fields in EXTRACTION_SPECS.values():
+            for chain in fields.values():
+                for selector in chain.selectors:
+                    selector.flush()
+
+
+def selector_report():
+    """Per-selector position, hit rate and mean time for every chain."""
+    rows = []
+    for fields in EXTRACTION_SPECS.values():
+        for chain in fields.values():
+            for position, index in enumerate(chain.order):
+                selector = chain.selectors[index]
+                rows.append({
+                    'chain': chain.name,
+                    'selector': selector.label,
+                    'position': position,
+                    'attempts': selector.attempts,
+                    'hits': selector.hits,
+                    'hit_rate': round(selector.hits / selector.attempts, 3) if selector.attempts else None,
+                    'mean_ms': round(selector.seconds / selector.attempts * 1000, 4) if selector.attempts else None,
+                })
+    return rows
@@ -0,0 +1,76 @@
+"""
+Match counts for the match list from per status and day facets.
+
+Migration 0010 keeps MatchFacet in step with the matches through SQLite
+triggers: one row per status and UTC day holding how many matches it has.
+Inserts, deletes and status or date changes all adjust it, including bulk
+upserts, batched cleanup and raw SQL. A count over a date range sums the
+facets of the whole days inside it and counts only the partial days at its
+ends through the match indexes, so no request counts the whole table.
+Other databases count the matches directly.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from .models import Match, MatchFacet
+
+
+def midnight(day):
+    return datetime.combine(day, time(), tzinfo=timezone.utc)
+
+
+def first_whole_day(moment):
+    """The first UTC day starting at or after ``moment``."""
+    moment = moment.astimezone(timezone.utc)
+    return moment.date() if moment.time() == time() else moment.date() + timedelta(days=1)
+
+
+def counted_matches(status=None, start=None, end=None):
+    matches = Match.objects.all()
+    if status:
+        matches = matches.filter(status=status)
+    if start is not None:
+        matches = matches.filter(match_date__gte=start)
+    if end is not None:
+        matches = matches.filter(match_date__lt=end)
+    return matches
+
+
+def facet_count(status=None, start=None, end=None):
+    """How many matches have ``status`` (any when None) and a date in [start, end)."""
+    if connection.vendor != 'sqlite':
+        return counted_matches(status, start, end).count()
+
+    first_day = first_whole_day(start) if start is not None else None
+    end_day = end.astimezone(timezone.utc).date() if end is not None else None
+    if first_day and end_day and first_day >= end_day:
+        # No whole day in the range
+        return counted_matches(status, start, end).count()
+
+    facets = MatchFacet.objects.all()
+    if status:
+        facets = facets.filter(status=status)
+    if first_day:
+        facets = facets.filter(day__gte=first_day)
+    if end_day:
+        facets = facets.filter(day__lt=end_day)
+    total = facets.aggregate(matches=Sum('matches'))['matches'] or 0
+
+    if first_day and start < midnight(first_day):
+        total += counted_matches(status, start, midnight(first_day)).count()
+    if end_day and end > midnight(end_day):
+        total += counted_matches(status, midnight(end_day), end).count()
+    return total
+
+
+def rebuild_facets():
+    """Recount every facet from the matches, e.g. after writes with triggers disabled."""
+    if connection.vendor != 'sqlite':
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {MatchFacet._meta.db_table}")
+        cursor.execute(f"INSERT INTO {MatchFacet._meta.db_table} (status, day, matches) "
+                       "SELECT status, date(match_date), COUNT(*) FROM matches_match GROUP BY 1, 2")
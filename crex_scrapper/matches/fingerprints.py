@@ -0,0 +1,26 @@
+"""
+Stable content hashes for scraped pages and their extracted sections.
+"""
+
+import hashlib
+import json
+
+SECTIONS = ('match_info', 'squads', 'live', 'scorecard')
+
+
+def content_hash(content):
+    """Hash the raw bytes (or text) of a downloaded page."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def section_hash(data):
+    """Hash extracted data independently of dict ordering."""
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def section_hashes(details):
+    """Hash each detail section present in a parsed match page."""
+    return {name: section_hash(details[name]) for name in SECTIONS if name in details}
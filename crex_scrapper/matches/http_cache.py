@@ -0,0 +1,296 @@
+"""
+Conditional-GET response cache used by CREXScraper.get_page.
+
+Each process keeps one cache (see shared_cache) over a directory that all
+worker processes share. Files are replaced atomically, access times on the
+bodies carry the LRU order between processes, and each process rescans the
+directory now and then to count what the others wrote.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# URL classes, checked in order; the first matching pattern wins
+URL_CLASSES = [
+    ('fixtures', re.compile(r'/fixtures/')),
+    ('match', re.compile(r'/match/')),
+]
+
+DEFAULT_TTLS = {
+    'fixtures': 10 * 60,
+    'match': 30,
+    'default': 0,
+}
+
+# Seconds between rescans of the directory for entries other processes wrote or evicted
+RESCAN_INTERVAL = 60
+
+
+def url_class(url):
+    """Return the cache class name for a URL."""
+    for name, pattern in URL_CLASSES:
+        if pattern.search(url):
+            return name
+    return 'default'
+
+
+class CacheEntry:
+    """A cached response body plus the validators needed to revalidate it."""
+
+    def __init__(self, url, body, etag=None, last_modified=None, content_type=None, stored_at=None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    def age(self):
+        return time.time() - self.stored_at
+
+    def conditional_headers(self):
+        """Request headers that let the server answer 304 Not Modified."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def to_response(self):
+        """Rebuild a requests.Response carrying the cached body."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        if self.content_type:
+            response.headers['Content-Type'] = self.content_type
+        if self.etag:
+            response.headers['ETag'] = self.etag
+        if self.last_modified:
+            response.headers['Last-Modified'] = self.last_modified
+        response.from_cache = True
+        return response
+
+    def metadata(self):
+        return {
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'content_type': self.content_type,
+            'stored_at': self.stored_at,
+        }
+
+
+class ResponseCache:
+    """Size-bounded LRU of response bodies on disk, with per-URL-class TTLs.
+
+    Within its TTL an entry is served without touching the network. Once
+    stale it is revalidated with If-None-Match / If-Modified-Since, and a
+    304 reuses the stored body. Entries are evicted least recently used
+    first once the bodies exceed ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, ttls=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'evictions': 0, 'bytes_saved': 0}
+
+        # key -> body size, least recently used first
+        self.index = OrderedDict()
+        self.total_bytes = 0
+        self.scanned_at = 0
+        self._load_index()
+
+    @classmethod
+    def from_settings(cls):
+        """Build the cache configured in settings, or None when disabled."""
+        directory = getattr(settings, 'CREX_CACHE_DIR', None)
+        if not directory:
+            return None
+        return cls(
+            directory,
+            max_bytes=getattr(settings, 'CREX_CACHE_MAX_BYTES', 50 * 1024 * 1024),
+            ttls=getattr(settings, 'CREX_CACHE_TTLS', None),
+        )
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def _load_index(self):
+        """Rebuild the LRU order from body file access times."""
+        self.index.clear()
+        self.total_bytes = 0
+        self.scanned_at = time.monotonic()
+        bodies = []
+        for body_path in self.directory.glob('*.body'):
+            try:
+                stat = body_path.stat()
+            except OSError:
+                continue
+            bodies.append((stat.st_mtime, body_path.stem, stat.st_size))
+        for _, key, size in sorted(bodies):
+            self.index[key] = size
+            self.total_bytes += size
+
+    def ttl_for(self, url):
+        return self.ttls.get(url_class(url), self.ttls['default'])
+
+    def get(self, url):
+        """Return the stored entry for a URL, or None."""
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        with self.lock:
+            # Entries another process stored since the last scan are read from disk too
+            try:
+                body = body_path.read_bytes()
+                meta = json.loads(meta_path.read_text())
+                os.utime(body_path)
+            except FileNotFoundError:
+                # Gone, or evicted by another process
+                self.total_bytes -= self.index.pop(key, 0)
+                return None
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+            if key not in self.index:
+                self.total_bytes += len(body)
+            self.index[key] = len(body)
+            self.index.move_to_end(key)
+        return CacheEntry(body=body, **meta)
+
+    def is_fresh(self, entry):
+        return entry.age() < self.ttl_for(entry.url)
+
+    def store(self, url, response):
+        """Cache a 200 response body with its validators."""
+        entry = CacheEntry(
+            url,
+            response.content,
+            etag=response.headers.get('ETag'),
+            last_modified=response.headers.get('Last-Modified'),
+            content_type=response.headers.get('Content-Type'),
+        )
+        self._write(entry)
+        return entry
+
+    def refresh(self, entry, response):
+        """Restart an entry's TTL after a 304, picking up any new validators."""
+        entry.etag = response.headers.get('ETag', entry.etag)
+        entry.last_modified = response.headers.get('Last-Modified', entry.last_modified)
+        entry.stored_at = time.time()
+        key = self._key(entry.url)
+        with self.lock:
+            if key in self.index:
+                try:
+                    self._replace(self._paths(key)[1], json.dumps(entry.metadata()).encode())
+                    return
+                except OSError:
+                    pass
+        self._write(entry)
+
+    def _replace(self, path, data):
+        """Write a file so readers in any process see the old or the new copy, never part of one."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f'{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _write(self, entry):
+        key = self._key(entry.url)
+        body_path, meta_path = self._paths(key)
+        size = len(entry.body)
+        with self.lock:
+            if time.monotonic() - self.scanned_at > RESCAN_INTERVAL:
+                self._load_index()
+            if key in self.index:
+                self.total_bytes -= self.index.pop(key)
+            try:
+                self._replace(body_path, entry.body)
+                self._replace(meta_path, json.dumps(entry.metadata()).encode())
+            except OSError as e:
+                logger.warning(f"Could not write cache entry for {entry.url}: {e}")
+                return
+            self.index[key] = size
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.index) > 1:
+            key = next(iter(self.index))
+            self._remove(key)
+            self.stats['evictions'] += 1
+
+    def _remove(self, key):
+        self.total_bytes -= self.index.pop(key, 0)
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def record(self, outcome, bytes_saved=0):
+        """Count a hit, miss or not_modified lookup."""
+        with self.lock:
+            self.stats[outcome] += 1
+            self.stats['bytes_saved'] += bytes_saved
+
+    def summary(self):
+        """Return a copy of the counters with the current cache size."""
+        with self.lock:
+            return {**self.stats, 'entries': len(self.index), 'bytes': self.total_bytes}
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.index):
+                self._remove(key)
+
+
+# pid -> cache, so a forked child builds its own index and lock
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache():
+    """This process's response cache from settings, or None when disabled.
+
+    Rebuilt when CREX_CACHE_DIR changes, e.g. under override_settings.
+    """
+    directory = getattr(settings, 'CREX_CACHE_DIR', None)
+    if not directory:
+        return None
+    pid = os.getpid()
+    cache = _caches.get(pid)
+    if cache is None or cache.directory != Path(directory):
+        with _caches_lock:
+            cache = _caches.get(pid)
+            if cache is None or cache.directory != Path(directory):
+                _caches.clear()
+                cache = _caches[pid] = ResponseCache.from_settings()
+    return cache
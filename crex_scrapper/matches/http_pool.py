@@ -0,0 +1,198 @@
+"""
+Pooled HTTP sessions shared by every scrape in a worker process.
+
+A Celery worker process keeps one requests.Session, created after the
+fork, whose connection pool is sized for the fetch concurrency of the
+tasks it runs. Tasks build their scrapers on it, so connections (and TLS
+sessions) stay open from one task to the next instead of being set up
+again for every task. With CREX_HTTP2 on and httpx[http2] installed the
+session sends requests through an HTTP/2 client that multiplexes them
+over fewer connections.
+"""
+
+import os
+import socket
+import threading
+from collections import Counter
+
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection
+
+from .metrics import HTTP_NEW_CONNECTIONS
+
+try:
+    import httpx
+except ImportError:  # HTTP/2 is optional
+    httpx = None
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/91.0.4472.124 Safari/537.36')
+
+
+class ConnectionStats:
+    """Requests sent and connections opened through one adapter."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, name):
+        with self.lock:
+            self.counts[name] += 1
+        if name == 'new_connections':
+            HTTP_NEW_CONNECTIONS.inc()
+
+    def summary(self):
+        requests_sent, opened = self.counts['requests'], self.counts['new_connections']
+        return {
+            'requests': requests_sent,
+            'new_connections': opened,
+            'reused': max(requests_sent - opened, 0),
+            'reuse_rate': round(1 - opened / requests_sent, 3) if requests_sent else None,
+        }
+
+
+def keepalive_socket_options():
+    """TCP keep-alive on pooled sockets, so idle ones survive NATs and dead peers are noticed."""
+    options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    idle = getattr(settings, 'CREX_HTTP_KEEPALIVE_IDLE', 60)
+    if idle and hasattr(socket, 'TCP_KEEPIDLE'):
+        options += [
+            (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(idle // 4, 1)),
+        ]
+    return options
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with keep-alive sockets that counts requests and new connections."""
+
+    def __init__(self, pool_size):
+        self.stats = ConnectionStats()
+        super().__init__(pool_maxsize=pool_size)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, socket_options=keepalive_socket_options(),
+                                 **pool_kwargs)
+        stats = self.stats
+        pool_classes = {}
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+            class CountingPool(pool_cls):
+                def _new_conn(self):
+                    stats.record('new_connections')
+                    return super()._new_conn()
+            pool_classes[scheme] = CountingPool
+        # The default mapping is shared by every PoolManager, so replace it rather than edit it
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def send(self, request, **kwargs):
+        self.stats.record('requests')
+        return super().send(request, **kwargs)
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Sends requests with an httpx HTTP/2 client and hands back requests Responses.
+
+    HTTP/2 is negotiated over TLS; plain http:// URLs still use HTTP/1.1.
+    """
+
+    def __init__(self, pool_size):
+        super().__init__()
+        self.stats = ConnectionStats()
+        self.client = httpx.Client(http2=True, limits=httpx.Limits(
+            max_connections=pool_size, max_keepalive_connections=pool_size,
+        ))
+
+    def trace(self, event, info):
+        if event == 'connection.connect_tcp.complete':
+            self.stats.record('new_connections')
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.stats.record('requests')
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        try:
+            sent = self.client.request(
+                request.method, request.url, headers=dict(request.headers), content=request.body,
+                timeout=timeout, extensions={'trace': self.trace},
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        response = requests.Response()
+        response.status_code = sent.status_code
+        response.reason = sent.reason_phrase
+        response.headers = CaseInsensitiveDict(sent.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = sent.content
+        response.url = str(sent.url)
+        response.request = request
+        return response
+
+    def close(self):
+        self.client.close()
+
+
+def pool_size(worker_threads=1):
+    """Connections to keep per host: the most pages one task fetches at once, per task thread."""
+    size = getattr(settings, 'CREX_HTTP_POOL_SIZE', None)
+    if size:
+        return size
+    per_task = max(
+        getattr(settings, 'CREX_FETCH_CONCURRENCY', 20),
+        getattr(settings, 'CREX_PIPELINE_FETCH_WORKERS', 8),
+    )
+    return per_task * worker_threads
+
+
+def build_session(size=None, http2=None):
+    """Return a session whose http and https requests share one pooled adapter."""
+    size = size or pool_size()
+    http2 = getattr(settings, 'CREX_HTTP2', False) if http2 is None else http2
+    if http2 and httpx is None:
+        raise ValueError("CREX_HTTP2 needs the httpx[http2] package")
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    adapter = HTTP2Adapter(size) if http2 else PooledAdapter(size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def connection_stats(session):
+    """Connection reuse counts of a session built by build_session(), or {}."""
+    stats = getattr(session.get_adapter('https://'), 'stats', None)
+    return stats.summary() if stats else {}
+
+
+# pid -> session, so a forked child never uses its parent's sockets
+_sessions = {}
+_sessions_lock = threading.Lock()
+# Tasks one process runs at once: >1 only for thread-based worker pools
+_worker_threads = 1
+
+
+def configure_worker(concurrency, threaded):
+    """Size the shared pool for a worker; call before its processes start fetching."""
+    global _worker_threads
+    _worker_threads = concurrency if threaded else 1
+
+
+def shared_session():
+    """This process's shared scraping session, created on first use."""
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(pid)
+            if session is None:
+                _sessions.clear()
+                session = _sessions[pid] = build_session(pool_size(_worker_threads))
+    return session
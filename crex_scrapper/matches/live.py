@@ -0,0 +1,180 @@
+"""
+Push delivery of live score and status changes.
+
+Scrapers (usually in Celery workers) publish a match's latest live section
+and status to a Redis channel. Each ASGI process runs one LiveBroadcaster
+that listens on that channel, diffs every update against the last state it
+saw for the match and fans the diff out to its in-process subscribers, so
+viewers never poll the database.
+"""
+
+import asyncio
+import json
+import logging
+
+import redis
+import redis.asyncio as aioredis
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Match
+
+logger = logging.getLogger(__name__)
+
+
+def live_channel():
+    return getattr(settings, 'CREX_LIVE_CHANNEL', 'crex:live')
+
+
+def live_redis_url():
+    return getattr(settings, 'CREX_LIVE_REDIS_URL', settings.CELERY_BROKER_URL)
+
+
+_publisher = None
+
+
+def publish_live_update(match_id, status, live=None):
+    """Announce a match's current status and live section to subscribers."""
+    global _publisher
+    update = {'match_id': match_id, 'status': status, 'live': live or {}}
+
+    # Same-process subscribers (e.g. a scrape triggered from a view)
+    broadcaster.apply_threadsafe(update)
+
+    try:
+        if _publisher is None:
+            _publisher = redis.Redis.from_url(live_redis_url(), socket_timeout=2)
+        _publisher.publish(live_channel(), json.dumps(update))
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish live update for match {match_id}: {e}")
+
+
+def diff_update(previous, update):
+    """Return only what changed between two states of a match, or None."""
+    previous = previous or {'status': None, 'live': {}}
+    diff = {}
+    if update['status'] != previous['status']:
+        diff['status'] = update['status']
+
+    old_live, new_live = previous['live'], update['live']
+    changed = {key: value for key, value in new_live.items() if old_live.get(key) != value}
+    removed = [key for key in old_live if key not in new_live]
+    if changed:
+        diff['live'] = changed
+    if removed:
+        diff['removed'] = removed
+
+    if not diff:
+        return None
+    return {'match_id': update['match_id'], **diff}
+
+
+class Subscription:
+    """One viewer's queue of diffs, optionally limited to a single match."""
+
+    def __init__(self, match_id=None, maxsize=100):
+        self.match_id = match_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def wants(self, match_id):
+        return self.match_id is None or self.match_id == match_id
+
+    def put(self, diff):
+        if self.queue.full():
+            # A slow viewer loses its oldest diff rather than stalling the rest
+            self.queue.get_nowait()
+        self.queue.put_nowait(diff)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LiveBroadcaster:
+    """Per-process fan-out of live diffs to SSE subscribers."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.state = {}
+        self.loop = None
+        self.listener = None
+        self.loaded = False
+        self.delivered = 0
+
+    async def subscribe(self, match_id=None):
+        """Register a viewer and start the shared Redis listener if needed."""
+        self.loop = asyncio.get_running_loop()
+        if not self.loaded:
+            await self.load_state()
+        if self.listener is None or self.listener.done():
+            self.listener = self.loop.create_task(self.listen())
+        subscription = Subscription(match_id)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    def snapshot(self, match_id=None):
+        """Current state of the matches a new subscriber wants."""
+        return [
+            {'match_id': key, **value}
+            for key, value in self.state.items()
+            if match_id is None or key == match_id
+        ]
+
+    async def load_state(self):
+        """Seed live matches and their last stored live sections once per process."""
+        rows = await sync_to_async(list)(
+            Match.objects.filter(status='Live').values_list('id', 'status', 'live_snapshot__live')
+        )
+        for match_id, status, live in rows:
+            self.state.setdefault(match_id, {'status': status, 'live': live or {}})
+        self.loaded = True
+
+    def apply(self, update):
+        """Record an update and send its diff to interested subscribers."""
+        match_id = update['match_id']
+        diff = diff_update(self.state.get(match_id), update)
+        self.state[match_id] = {'status': update['status'], 'live': update['live']}
+        if update['status'] != 'Live' and update['status'] is not None:
+            # Finished matches need no snapshot for late joiners
+            self.state.pop(match_id, None)
+        if diff is None:
+            return None
+        for subscription in list(self.subscribers):
+            if subscription.wants(match_id):
+                subscription.put(diff)
+                self.delivered += 1
+        return diff
+
+    def apply_threadsafe(self, update):
+        """Apply an update from a thread outside the broadcaster's loop."""
+        if self.loop is None or self.loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.apply(update)
+        else:
+            self.loop.call_soon_threadsafe(self.apply, update)
+
+    async def listen(self):
+        """Relay updates published on the Redis channel, reconnecting on errors."""
+        while True:
+            try:
+                client = aioredis.Redis.from_url(live_redis_url())
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(live_channel())
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self.apply(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Live update listener error, retrying: {e}")
+                await asyncio.sleep(5)
+
+
+broadcaster = LiveBroadcaster()
@@ -0,0 +1,85 @@
+"""
+Clean up old matches, or query and restore the compressed match archive.
+"""
+
+import json
+import sys
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from matches.archive import cleanup_matches, read_archive, restore_record
+from matches.export import parse_timestamp
+from matches.page_cache import bump_data_version
+from matches.stats import invalidate_status_counts
+
+
+class Command(BaseCommand):
+    help = ("cleanup: archive and delete old matches in batches; query: print archived matches as "
+            "NDJSON; restore: put archived matches back into the database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['cleanup', 'query', 'restore'])
+        parser.add_argument('--dir', default=getattr(settings, 'CREX_ARCHIVE_DIR', None),
+                            help="Archive directory (default CREX_ARCHIVE_DIR).")
+        parser.add_argument('--days', type=int, default=getattr(settings, 'CREX_CLEANUP_AFTER_DAYS', 30),
+                            help="cleanup: delete matches older than this many days.")
+        parser.add_argument('--batch-size', type=int, help="cleanup: matches deleted per transaction.")
+        parser.add_argument('--pause', type=float, help="cleanup: seconds between batches.")
+        parser.add_argument('--no-archive', action='store_true', help="cleanup: delete without archiving.")
+        parser.add_argument('--start', help="query/restore: matches on or after this date/datetime.")
+        parser.add_argument('--end', help="query/restore: matches before this date/datetime.")
+        parser.add_argument('--team', help="query/restore: matches with a team name containing this.")
+        parser.add_argument('--status', help="query/restore: matches with this status.")
+        parser.add_argument('--count', action='store_true', help="query: print only the number of matches.")
+
+    def handle(self, *args, **options):
+        archive_dir = str(options['dir']) if options['dir'] else None
+        if options['action'] == 'cleanup':
+            return self.cleanup(options, None if options['no_archive'] else archive_dir)
+        if not archive_dir:
+            raise CommandError("No archive directory: set CREX_ARCHIVE_DIR or pass --dir")
+
+        try:
+            records = read_archive(
+                archive_dir,
+                start=parse_timestamp(options['start']),
+                end=parse_timestamp(options['end']),
+                team=options['team'],
+                status=options['status'],
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        if options['action'] == 'query':
+            count = 0
+            for record in records:
+                count += 1
+                if not options['count']:
+                    sys.stdout.write(json.dumps(record) + '\n')
+            if options['count']:
+                self.stdout.write(str(count))
+            return
+
+        restored = skipped = 0
+        for record in records:
+            if restore_record(record):
+                restored += 1
+            else:
+                skipped += 1
+        invalidate_status_counts()
+        bump_data_version()
+        self.stdout.write(f"Restored {restored} matches, skipped {skipped} already in the database")
+
+    def cleanup(self, options, archive_dir):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        stats = cleanup_matches(cutoff, options['batch_size'], options['pause'], archive_dir)
+        invalidate_status_counts()
+        bump_data_version()
+        self.stdout.write(
+            f"Deleted {stats['matches']} matches ({stats['rows']} rows) in {stats['batches']} batches "
+            f"over {stats['seconds']}s: {stats['rows_per_second']} rows/s, longest lock "
+            f"{stats['max_lock_ms']} ms, {stats['archived_files']} archive files written"
+        )
@@ -0,0 +1,103 @@
+"""
+Measure /api/matches/ latency paging through a large match table.
+"""
+
+import json
+import logging
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from matches.benchmarks.db import scratch_database, seed_matches
+from matches.models import Match
+from matches.views import api_matches
+
+
+def legacy_api_matches(limit=100, offset=0):
+    """The original endpoint's queries, with an offset to reach deeper pages."""
+    matches = Match.objects.select_related('home_team', 'away_team').order_by('-match_date')
+    data = [
+        {
+            'id': match.id,
+            'home_team': match.home_team.name,
+            'away_team': match.away_team.name,
+            'match_date': match.match_date.isoformat(),
+            'location': match.location,
+            'status': match.status,
+        }
+        for match in matches[offset:offset + limit]
+    ]
+    return {'matches': data, 'count': len(data), 'total_matches': Match.objects.count()}
+
+
+class Command(BaseCommand):
+    help = "Benchmark /api/matches/ first-page, deep-page and 304 latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Matches to seed.")
+        parser.add_argument('--pages', type=int, default=200, help="Pages to walk with the cursor.")
+        parser.add_argument('--limit', type=int, default=100, help="Matches per page.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        rows, pages, limit = options['rows'], options['pages'], options['limit']
+        factory = RequestFactory()
+
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            }
+        }), scratch_database():
+            seed_matches(rows)
+
+            def call(**params):
+                headers = params.pop('headers', {})
+                return api_matches(factory.get('/api/matches/', {'limit': limit, **params}, headers=headers))
+
+            call()  # warm the status counts
+            results = {}
+
+            # Walk the table with cursors, timing every page
+            cursor, samples = None, []
+            for _ in range(pages):
+                params = {'count': 0, **({'cursor': cursor} if cursor else {})}
+                start = time.perf_counter()
+                response = call(**params)
+                samples.append(time.perf_counter() - start)
+                cursor = json.loads(response.content)['next_cursor']
+            results['cursor page (walk)'] = samples
+
+            # Offset pages at the same depths, as the old endpoint would need
+            depths = [0, pages // 4, pages // 2, pages - 1]
+            results['legacy offset page'] = [
+                self.time(lambda depth=depth: legacy_api_matches(limit, depth * limit)) for depth in depths
+            ]
+            results['legacy first page'] = [self.time(lambda: legacy_api_matches(limit)) for _ in range(20)]
+            results['cursor first page'] = [self.time(call) for _ in range(20)]
+            results['cursor first page, no count'] = [self.time(lambda: call(count=0)) for _ in range(20)]
+
+            etag = call()['ETag']
+            results['revalidation (304)'] = [
+                self.time(lambda: call(headers={'If-None-Match': etag})) for _ in range(20)
+            ]
+            assert call(headers={'If-None-Match': etag}).status_code == 304
+
+        self.stdout.write(f"{rows} matches, {limit} per page, {pages} cursor pages")
+        self.stdout.write(f"{'':<30} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+        for name, samples in results.items():
+            samples = sorted(samples)
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            self.stdout.write(
+                f"{name:<30} {statistics.median(samples) * 1000:>10.2f} "
+                f"{p99 * 1000:>10.2f} {samples[-1] * 1000:>10.2f}"
+            )
+
+    def time(self, func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
@@ -0,0 +1,99 @@
+"""
+Measure how long old-match cleanup holds the write lock, against a concurrent writer.
+"""
+
+import logging
+import statistics
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+
+from matches.archive import cleanup_matches
+from matches.benchmarks.db import scratch_database, seed_matches
+from matches.models import Match, Team
+
+
+def seed_events(per_match):
+    """Give every seeded match ``per_match`` live events, so deletes cascade."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO matches_matchevent (match_id, sequence, kind, data, created_at) "
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < %s) "
+            "SELECT m.id, n.i, 'ball', '{}', m.updated_at FROM matches_match m, n",
+            [per_match],
+        )
+
+
+def legacy_cleanup(cutoff):
+    """The original task: count, then one delete of everything."""
+    old_matches = Match.objects.filter(match_date__lt=cutoff)
+    count = old_matches.count()
+    old_matches.delete()
+    return count
+
+
+class Writer(threading.Thread):
+    """Stands in for a scraper: small writes in a loop, timing each one."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.latencies = []
+        self.errors = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            start = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    Team.objects.filter(id=1).update(name=f'Team 1 {start}')
+                self.latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                self.errors += 1
+            time.sleep(0.005)
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Benchmark cleanup_old_matches: rows/s, longest lock hold and a concurrent writer's worst wait."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000, help="Matches to seed; about half are old.")
+        parser.add_argument('--events', type=int, default=5, help="Live events per match.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Matches per batch.")
+        parser.add_argument('--archive', action='store_true', help="Also archive before deleting.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        for name in ['legacy single delete', f"batched x{options['batch_size']}"]:
+            with tempfile.TemporaryDirectory() as archive_dir, scratch_database():
+                seed_matches(options['rows'])
+                seed_events(options['events'])
+                cutoff = timezone.now()
+
+                writer = Writer()
+                writer.start()
+                start = time.perf_counter()
+                if name.startswith('legacy'):
+                    deleted = legacy_cleanup(cutoff)
+                    rows = deleted * (1 + options['events'])
+                    lock_ms = (time.perf_counter() - start) * 1000
+                else:
+                    stats = cleanup_matches(cutoff, options['batch_size'],
+                                            archive_dir=archive_dir if options['archive'] else None)
+                    deleted, rows, lock_ms = stats['matches'], stats['rows'], stats['max_lock_ms']
+                seconds = time.perf_counter() - start
+                writer.running = False
+                writer.join()
+
+                latencies = writer.latencies or [0]
+                self.stdout.write(
+                    f"{name:<22} {deleted} matches, {rows} rows in {seconds:.2f}s "
+                    f"({rows / seconds:.0f} rows/s); longest lock {lock_ms:.0f} ms; writer "
+                    f"p50 {statistics.median(latencies) * 1000:.1f} ms, max {max(latencies) * 1000:.0f} ms, "
+                    f"{writer.errors} 'database is locked' errors"
+                )
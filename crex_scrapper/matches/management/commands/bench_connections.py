@@ -0,0 +1,53 @@
+"""
+Compare per-request latency with a session per task against one shared per worker.
+"""
+
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from matches.benchmarks.stub_server import StubServer
+from matches.benchmarks.suite import percentile
+from matches.http_pool import build_session, connection_stats, httpx
+from matches.scraper import CREXScraper
+
+
+class Command(BaseCommand):
+    help = "Benchmark page fetch latency and connection reuse: new session per task vs shared per worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100, help="Simulated tasks.")
+        parser.add_argument('--pages', type=int, default=3, help="Pages fetched per task.")
+        parser.add_argument('--latency', type=float, default=0.0, help="Stub server delay per request, seconds.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        modes = [('session per task', None), ('shared session', build_session())]
+        if httpx is not None:
+            modes.append(('shared session (httpx)', build_session(http2=True)))
+
+        with StubServer(latency=options['latency']) as server:
+            for name, shared in modes:
+                samples, sessions = [], []
+                for task in range(options['tasks']):
+                    # What a task did before: a scraper with a brand new session
+                    session = shared or build_session()
+                    if session not in sessions:
+                        sessions.append(session)
+                    scraper = CREXScraper(base_url=server.base_url, cache=False, session=session)
+                    for page in range(options['pages']):
+                        start = time.perf_counter()
+                        scraper.get_page(scraper.match_url(task * options['pages'] + page))
+                        samples.append(time.perf_counter() - start)
+
+                stats = [connection_stats(session) for session in sessions]
+                requests_sent = sum(s['requests'] for s in stats)
+                new_connections = sum(s['new_connections'] for s in stats)
+                self.stdout.write(
+                    f"{name:<24} p50 {statistics.median(samples) * 1000:6.2f} ms  "
+                    f"p99 {percentile(samples, 0.99) * 1000:6.2f} ms  "
+                    f"{requests_sent} requests, {new_connections} new connections "
+                    f"({1 - new_connections / requests_sent:.1%} reused)"
+                )
@@ -0,0 +1,76 @@
+"""
+Measure dashboard latency before and after cached single-query counts.
+"""
+
+import logging
+import statistics
+import tempfile
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from matches.benchmarks.db import scratch_database, seed_matches
+from matches.models import Match
+from matches.stats import compute_status_counts, get_status_counts, invalidate_status_counts
+from matches.views import dashboard
+
+
+def legacy_status_counts():
+    """The dashboard's original four separate COUNT queries."""
+    return {
+        'total_matches': Match.objects.count(),
+        'live_matches': Match.objects.filter(status='Live').count(),
+        'scheduled_matches': Match.objects.filter(status='Scheduled').count(),
+        'completed_matches': Match.objects.filter(status='Completed').count(),
+    }
+
+
+class Command(BaseCommand):
+    help = "Benchmark dashboard status counts and page latency on a large match table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Matches to seed.")
+        parser.add_argument('--repeat', type=int, default=10, help="Timed runs per measurement.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        repeat = options['repeat']
+
+        # Keep benchmark counts out of the project's real cache
+        with tempfile.TemporaryDirectory() as cache_dir, override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            }
+        }), scratch_database():
+            seed_matches(options['rows'])
+            request = RequestFactory().get('/')
+
+            def cold_dashboard():
+                invalidate_status_counts()
+                dashboard(request)
+
+            get_status_counts()
+            results = [
+                ('4 COUNT queries', self.time(legacy_status_counts, repeat)),
+                ('1 grouped query', self.time(compute_status_counts, repeat)),
+                ('cached counts', self.time(get_status_counts, repeat)),
+                ('dashboard, cache cold', self.time(cold_dashboard, repeat)),
+                ('dashboard, cache warm', self.time(lambda: dashboard(request), repeat)),
+            ]
+            cache.clear()
+
+        self.stdout.write(f"{options['rows']} matches, median of {repeat} runs")
+        for name, seconds in results:
+            self.stdout.write(f"{name:<24} {seconds * 1000:>10.2f} ms")
+
+    def time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        return statistics.median(samples)
@@ -0,0 +1,57 @@
+"""
+Compare match_list totals: COUNT over the matches vs the facet counts.
+"""
+
+import logging
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from matches.benchmarks.db import scratch_database, seed_matches
+from matches.facets import counted_matches, facet_count
+
+
+class Command(BaseCommand):
+    help = "Benchmark match_list total counts on a large seeded table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Matches to seed.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per count.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        with scratch_database():
+            start = time.perf_counter()
+            seed_matches(options['rows'])
+            self.stdout.write(f"Seeded {options['rows']} matches in {time.perf_counter() - start:.1f}s")
+
+            now = timezone.now()
+            today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+            filters = [
+                ('all', None, None, None),
+                ('status=Completed', 'Completed', None, None),
+                ('date=today', None, today, today + timedelta(days=1)),
+                ('date=upcoming', None, now, None),
+                ('Scheduled, past', 'Scheduled', None, now),
+            ]
+            for name, status, start, end in filters:
+                old_ms, count = self.time_count(lambda: counted_matches(status, start, end).count(), options['repeat'])
+                new_ms, new_count = self.time_count(lambda: facet_count(status, start, end), options['repeat'])
+                assert count == new_count, (name, count, new_count)
+                self.stdout.write(
+                    f"{name:<18} {count:>8} matches  COUNT {old_ms:8.2f} ms  facets {new_ms:6.2f} ms  "
+                    f"({old_ms / new_ms:.0f}x)"
+                )
+
+    def time_count(self, count, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = count()
+            samples.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        return statistics.median(samples), result
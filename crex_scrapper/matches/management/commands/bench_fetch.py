@@ -0,0 +1,60 @@
+"""
+Compare serial and concurrent match page fetching against the stub server.
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from matches.benchmarks.stub_server import StubServer
+from matches.scraper import CREXScraper, AsyncCREXScraper
+
+
+class Command(BaseCommand):
+    help = "Benchmark one live-match poll cycle, serial loop vs AsyncCREXScraper."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500],
+                            help="Numbers of live matches to poll per cycle.")
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help="Simulated server latency per request, in seconds.")
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help="Concurrent downloads for the async scraper.")
+        parser.add_argument('--skip-serial', action='store_true',
+                            help="Only time the async scraper.")
+
+    def handle(self, *args, **options):
+        # Per-page INFO logging would dominate the timings
+        logging.getLogger('matches').setLevel(logging.WARNING)
+
+        latency = options['latency']
+        concurrency = options['concurrency']
+
+        self.stdout.write(f"latency={latency}s concurrency={concurrency}")
+        self.stdout.write(f"{'matches':>8} {'serial (s)':>11} {'async (s)':>10} {'speedup':>8}")
+
+        with StubServer(latency=latency, chrome=True) as server:
+            for size in options['sizes']:
+                serial_scraper = CREXScraper(base_url=server.base_url, cache=False)
+                async_scraper = AsyncCREXScraper(
+                    base_url=server.base_url, cache=False, concurrency=concurrency
+                )
+                urls = [async_scraper.match_url(match_id) for match_id in range(1, size + 1)]
+
+                serial_time = None
+                if not options['skip_serial']:
+                    start = time.perf_counter()
+                    serial_results = serial_scraper.scrape_many_match_details(urls)
+                    serial_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                async_results = async_scraper.scrape_many_match_details(urls)
+                async_time = time.perf_counter() - start
+
+                if serial_time is not None and serial_results != async_results:
+                    self.stderr.write(f"Result mismatch at {size} matches")
+
+                serial_col = f"{serial_time:11.2f}" if serial_time is not None else f"{'-':>11}"
+                speedup_col = f"{serial_time / async_time:7.1f}x" if serial_time is not None else f"{'-':>8}"
+                self.stdout.write(f"{size:>8} {serial_col} {async_time:10.2f} {speedup_col}")
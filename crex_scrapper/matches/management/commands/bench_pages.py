@@ -0,0 +1,84 @@
+"""
+Measure HTML view throughput with the page cache off, in local memory and on disk.
+"""
+
+import logging
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from matches.benchmarks.db import scratch_database, seed_matches
+from matches.page_cache import bump_data_version, page_cache_stats
+from matches.views import dashboard, live_matches, match_list
+
+# What visitors ask for: mostly the first pages of the common filters
+REQUESTS = [
+    (match_list, {}),
+    (match_list, {'page': '2'}),
+    (match_list, {'status': 'Live'}),
+    (match_list, {'status': 'Completed'}),
+    (match_list, {'date': 'today'}),
+    (match_list, {'team': 'Team 42'}),
+    (match_list, {'venue': 'Ground 17'}),
+    (dashboard, {}),
+    (dashboard, {}),
+    (live_matches, {}),
+    (live_matches, {}),
+]
+
+
+class Command(BaseCommand):
+    help = "Benchmark dashboard, match_list and live_matches requests per second with and without the page cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000, help="Matches to seed.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per backend.")
+        parser.add_argument('--write-every', type=int, default=200,
+                            help="Requests between scraper saves, each of which retires the cached pages.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        with tempfile.TemporaryDirectory() as cache_dir, scratch_database():
+            seed_matches(options['rows'])
+            self.stdout.write(f"{options['rows']} matches, {options['requests']} requests, "
+                              f"a save every {options['write_every']}")
+            backends = settings.CREX_PAGE_CACHE_BACKENDS
+            for name, backend in [
+                ('off', backends[None]),
+                ('locmem', {**backends['locmem'], 'LOCATION': 'bench-pages'}),
+                ('file', {**backends['file'], 'LOCATION': f'{cache_dir}/pages'}),
+            ]:
+                # Counts and the data version stay out of the project's real cache
+                with override_settings(CACHES={
+                    'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                'LOCATION': f'{cache_dir}/{name}'},
+                    'pages': backend,
+                }):
+                    self.run_backend(name, options['requests'], options['write_every'])
+                    caches['pages'].clear()
+
+    def run_backend(self, name, count, write_every):
+        factory = RequestFactory()
+        rng = random.Random(0)
+        before = page_cache_stats()
+        start = time.perf_counter()
+        for i in range(count):
+            if i and i % write_every == 0:
+                bump_data_version()
+            view, params = rng.choice(REQUESTS)
+            view(factory.get('/', params))
+        seconds = time.perf_counter() - start
+
+        hits = misses = 0
+        for view, stats in page_cache_stats().items():
+            old = before.get(view, {'hits': 0, 'misses': 0})
+            hits += stats['hits'] - old['hits']
+            misses += stats['misses'] - old['misses']
+        hit_rate = f"{hits / (hits + misses):.1%} hits" if hits + misses else "no caching"
+        self.stdout.write(f"{name:<8} {count / seconds:8.0f} req/s  ({seconds:.2f}s, {hit_rate})")
@@ -0,0 +1,52 @@
+"""
+Measure parse throughput and peak memory of each parser engine.
+"""
+
+import logging
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from matches.benchmarks.pages import recorded_pages
+from matches.scraper import CREXScraper, PARSER_ENGINES
+
+
+class Command(BaseCommand):
+    help = "Benchmark pages/second and peak memory per parser engine on the recorded corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', nargs='+', default=list(PARSER_ENGINES),
+                            choices=list(PARSER_ENGINES), help="Parser engines to compare.")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Times each recorded page is parsed.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        corpus = recorded_pages()
+        repeat = options['repeat']
+
+        self.stdout.write(f"{len(corpus)} recorded pages x {repeat}")
+        self.stdout.write(f"{'engine':<22} {'pages/s':>9} {'peak MiB':>9}")
+        for name in options['engines']:
+            scraper = CREXScraper(cache=False, parser=name)
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for page_type, content in corpus.values():
+                    self.extract(scraper, page_type, content)
+            rate = repeat * len(corpus) / (time.perf_counter() - start)
+
+            # Peak Python heap for a single pass; libxml2's own buffers are not traced
+            tracemalloc.start()
+            for page_type, content in corpus.values():
+                self.extract(scraper, page_type, content)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(f"{name:<22} {rate:>9.1f} {peak / 2 ** 20:>9.2f}")
+
+    def extract(self, scraper, page_type, content):
+        if page_type == 'match_list':
+            return scraper.extract_match_rows(content)
+        return scraper.parse_match_details(content)
@@ -0,0 +1,71 @@
+"""
+Compare inline and pipelined live checks at different stage sizes.
+"""
+
+import logging
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from matches.benchmarks.db import scratch_database
+from matches.benchmarks.pages import fixture_rows
+from matches.benchmarks.stub_server import StubServer
+from matches.benchmarks.suite import measure
+from matches.models import Match, PageFingerprint
+from matches.pipeline import PipelinedCREXScraper
+from matches.scraper import CREXScraper, AsyncCREXScraper
+
+
+class Command(BaseCommand):
+    help = "Benchmark check_live_matches pages/second: serial, async and pipelined stage sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=100, help="Live matches per cycle.")
+        parser.add_argument('--latency', type=float, default=0.05, help="Stub server delay per request, seconds.")
+        parser.add_argument('--repeat', type=int, default=2, help="Timed cycles per configuration.")
+        parser.add_argument('--fetch-workers', type=int, nargs='+', default=[4, 16])
+        parser.add_argument('--parse-workers', type=int, nargs='+',
+                            default=sorted({1, 2, os.cpu_count()}))
+        parser.add_argument('--persist-batch', type=int, nargs='+', default=[1, 20])
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.CRITICAL)
+        count = options['matches']
+        now = timezone.now()
+        rows = fixture_rows(count)
+        for i, row in enumerate(rows):
+            row['match_date'] = now - timedelta(minutes=i)
+
+        def fresh():
+            PageFingerprint.objects.all().delete()
+            Match.objects.all().delete()
+            CREXScraper(cache=False).save_match_batch(rows)
+
+        with scratch_database(), StubServer(latency=options['latency'], recorded=True) as server:
+            configs = [
+                ('serial', lambda: CREXScraper(base_url=server.base_url, cache=False)),
+                ('async x16', lambda: AsyncCREXScraper(base_url=server.base_url, cache=False, concurrency=16)),
+            ]
+            for fetch in options['fetch_workers']:
+                for parse in options['parse_workers']:
+                    for batch in options['persist_batch']:
+                        configs.append((
+                            f'pipeline fetch={fetch} parse={parse} batch={batch}',
+                            lambda fetch=fetch, parse=parse, batch=batch: PipelinedCREXScraper(
+                                base_url=server.base_url, cache=False,
+                                fetch_workers=fetch, parse_workers=parse, persist_batch=batch,
+                            ),
+                        ))
+
+            results = [
+                measure(name, lambda make=make: make().check_live_matches(), options['repeat'],
+                        items=count, setup=fresh)
+                for name, make in configs
+            ]
+
+        self.stdout.write(f"{count} live matches, {options['latency']}s latency, {os.cpu_count()} CPUs")
+        self.stdout.write(f"{'configuration':<40} {'pages/s':>9} {'p50 ms':>10}")
+        for result in results:
+            self.stdout.write(f"{result['name']:<40} {result['throughput']:>9.1f} {result['p50_ms']:>10.1f}")
@@ -0,0 +1,60 @@
+"""
+Compare per-row and batched saving of scraped fixtures on SQLite.
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from matches.benchmarks.db import scratch_database
+from matches.benchmarks.pages import fixture_rows
+from matches.models import Match, Team
+from matches.scraper import CREXScraper
+
+
+def save_rows_one_by_one(rows):
+    """The pre-batching save path: one transaction and get_or_create per row."""
+    for row in rows:
+        with transaction.atomic():
+            home_team, _ = Team.objects.get_or_create(name=row['home_team'])
+            away_team, _ = Team.objects.get_or_create(name=row['away_team'])
+            Match.objects.get_or_create(
+                home_team=home_team,
+                away_team=away_team,
+                match_date=row['match_date'],
+                defaults={'location': row['location'], 'status': row['status']},
+            )
+
+
+class Command(BaseCommand):
+    help = "Benchmark fixture rows/second for per-row saves vs save_match_batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                            help="Numbers of fixture rows to save.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        scraper = CREXScraper(cache=False)
+
+        self.stdout.write(f"{'rows':>7} {'per-row/s':>10} {'batch/s':>10} {'re-run/s':>10}")
+        for size in options['sizes']:
+            rows = fixture_rows(size)
+            with scratch_database():
+                start = time.perf_counter()
+                save_rows_one_by_one(rows)
+                per_row_rate = size / (time.perf_counter() - start)
+
+            with scratch_database():
+                start = time.perf_counter()
+                scraper.save_match_batch(rows)
+                batch_rate = size / (time.perf_counter() - start)
+
+                # Every row now conflicts and takes the update path
+                start = time.perf_counter()
+                scraper.save_match_batch(rows)
+                rerun_rate = size / (time.perf_counter() - start)
+
+            self.stdout.write(f"{size:>7} {per_row_rate:>10.0f} {batch_rate:>10.0f} {rerun_rate:>10.0f}")
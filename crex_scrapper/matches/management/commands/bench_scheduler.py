@@ -0,0 +1,100 @@
+"""
+Simulate a match day to compare the fixed crontab with adaptive polling.
+"""
+
+import random
+
+from django.core.management.base import BaseCommand
+
+from matches.scheduler import CRONTAB_INTERVAL, CRONTAB_WINDOW, poll_intervals
+
+DAY = 24 * 60 * 60
+
+
+def match_timeline(start, rng):
+    """Return [(from_second, state)] for one match starting at ``start``."""
+    innings = rng.choice([80, 90, 210]) * 60  # T20-ish or ODI-ish innings
+    innings_break = 20 * 60
+    return [
+        (start - 60 * 60, 'pre_toss'),
+        (start - 30 * 60, 'break'),
+        (start, 'live'),
+        (start + innings, 'break'),
+        (start + innings + innings_break, 'live'),
+        (start + 2 * innings + innings_break, 'completed'),
+    ]
+
+
+def state_at(timeline, t):
+    state = None
+    for since, name in timeline:
+        if t >= since:
+            state = name
+    return state
+
+
+class Command(BaseCommand):
+    help = "Compare requests and live score staleness, crontab vs adaptive scheduler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500],
+                            help="Numbers of matches spread over the simulated day.")
+        parser.add_argument('--tick', type=int, default=15, help="Seconds between scheduler cycles.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        tick = options['tick']
+        intervals = poll_intervals()
+        window_start, window_end = (int(delta.total_seconds()) for delta in CRONTAB_WINDOW)
+
+        def crontab_due(i, timeline, t):
+            # Matches with match_date between now-6h and now+1h, every 5 minutes
+            start = timeline[2][0]
+            return t % CRONTAB_INTERVAL == 0 and start - window_end <= t <= start - window_start
+
+        self.stdout.write(f"tick={tick}s intervals={intervals}")
+        self.stdout.write(f"{'matches':>8} {'mode':>9} {'live req':>9} {'other req':>10} "
+                          f"{'mean age':>9} {'max age':>8}")
+        for size in options['sizes']:
+            rng = random.Random(options['seed'])
+            timelines = [match_timeline(rng.randrange(2 * 3600, DAY - 10 * 3600), rng) for _ in range(size)]
+            crontab = self.simulate(timelines, tick, crontab_due)
+
+            # Each match is polled when due, then rescheduled by its state
+            due = [timeline[0][0] for timeline in timelines]
+
+            def adaptive_due(i, timeline, t):
+                if due[i] is None or due[i] > t:
+                    return False
+                interval = intervals.get(state_at(timeline, t))
+                due[i] = t + interval if interval is not None else None
+                return True
+
+            adaptive = self.simulate(timelines, tick, adaptive_due)
+
+            for mode, (live_requests, other_requests, ages) in [('crontab', crontab), ('adaptive', adaptive)]:
+                mean_age = sum(ages) / len(ages) if ages else 0
+                self.stdout.write(f"{size:>8} {mode:>9} {live_requests:>9} {other_requests:>10} "
+                                  f"{mean_age:>8.0f}s {max(ages, default=0):>7.0f}s")
+        self.stdout.write("other req = polls of matches not in play (pre-toss, breaks, finished)")
+        self.stdout.write("age = seconds since the last poll, sampled mid-tick while a match is live")
+
+    def simulate(self, timelines, tick, is_due):
+        """Run one day; return (live requests, other requests, live data ages)."""
+        live_requests = other_requests = 0
+        last_polled = [None] * len(timelines)
+        ages = []
+        for t in range(0, DAY, tick):
+            for i, timeline in enumerate(timelines):
+                state = state_at(timeline, t)
+                if is_due(i, timeline, t):
+                    last_polled[i] = t
+                    if state == 'live':
+                        live_requests += 1
+                    else:
+                        other_requests += 1
+                if state == 'live':
+                    # A match never polled while live is as stale as its start
+                    last = last_polled[i] if last_polled[i] is not None else timeline[2][0]
+                    ages.append(t + tick / 2 - last)
+        return live_requests, other_requests, ages
@@ -0,0 +1,85 @@
+"""
+Run the offline scraper benchmark suite and save or compare its results.
+"""
+
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from matches.benchmarks.db import scratch_database
+from matches.benchmarks.suite import compare, run_suite
+from matches.scraper import PARSER_ENGINES
+
+
+class Command(BaseCommand):
+    help = ("Benchmark extractors, saves and full scrape cycles on the recorded corpus and a "
+            "local stub server; report throughput, p50/p99 and peak memory.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per extractor benchmark.")
+        parser.add_argument('--cycle-repeat', type=int, default=5, help="Timed runs per save and cycle benchmark.")
+        parser.add_argument('--latency', type=float, default=0.0, help="Stub server delay per request, seconds.")
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help="Fraction of stub server requests answered with 503.")
+        parser.add_argument('--live-matches', type=int, default=50, help="Matches polled per live cycle.")
+        parser.add_argument('--concurrency', type=int, default=10, help="Downloads in flight for the async cycle.")
+        parser.add_argument('--parser', choices=list(PARSER_ENGINES), help="Parser engine (default from settings).")
+        parser.add_argument('--seed', type=int, default=0, help="Seed for the stub server's injected errors.")
+        parser.add_argument('--output', '-o', help="Write the results to this JSON file.")
+        parser.add_argument('--compare', help="Baseline JSON file from an earlier run to compare against.")
+        parser.add_argument('--threshold', type=float, default=0.1,
+                            help="Fractional change that counts as a regression when comparing.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.CRITICAL)
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read baseline {options['compare']}: {e}")
+
+        with scratch_database():
+            results = run_suite(
+                repeat=options['repeat'],
+                cycle_repeat=options['cycle_repeat'],
+                latency=options['latency'],
+                error_rate=options['error_rate'],
+                live_matches=options['live_matches'],
+                concurrency=options['concurrency'],
+                parser=options['parser'],
+                seed=options['seed'],
+            )
+
+        meta = results['meta']
+        self.stdout.write(
+            f"revision {meta['revision']}, parser {meta['parser']}, latency {meta['latency']}s, "
+            f"error rate {meta['error_rate']}, stub server {meta['stub_server']}"
+        )
+        self.stdout.write(f"{'benchmark':<42} {'items/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak MiB':>9}")
+        for bench in results['benchmarks']:
+            self.stdout.write(
+                f"{bench['name']:<42} {bench['throughput']:>10.1f} {bench['p50_ms']:>9.2f} "
+                f"{bench['p99_ms']:>9.2f} {bench['peak_mib']:>9.2f}"
+            )
+
+        self.stdout.write(f"{'selector chain':<26} {'selector':<42} {'pos':>3} {'hits':>7} {'hit rate':>8} {'mean ms':>8}")
+        for row in results['selectors']:
+            if row['attempts']:
+                self.stdout.write(
+                    f"{row['chain']:<26} {row['selector'][:42]:<42} {row['position']:>3} {row['hits']:>7} "
+                    f"{row['hit_rate']:>8.3f} {row['mean_ms']:>8.4f}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline:
+            regressions = compare(results, baseline, options['threshold'])
+            self.stdout.write(f"Compared with {baseline['meta'].get('revision')}: {len(regressions)} regressions")
+            for name, metric, old, new, change in regressions:
+                self.stdout.write(f"  {name} {metric}: {old} -> {new} ({change:+.0%})")
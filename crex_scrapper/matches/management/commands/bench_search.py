@@ -0,0 +1,85 @@
+"""
+Compare match_list team and venue filter latency: icontains scans vs the FTS5 indexes.
+"""
+
+import logging
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from matches.benchmarks.db import scratch_database, seed_matches
+from matches.models import Match, Team
+from matches.search import search_matches
+from matches.stats import get_status_counts, invalidate_status_counts
+
+
+def legacy_team(matches, text):
+    return matches.filter(Q(home_team__name__icontains=text) | Q(away_team__name__icontains=text))
+
+
+def legacy_venue(matches, text):
+    return matches.filter(location__icontains=text)
+
+
+class Command(BaseCommand):
+    help = "Benchmark match_list search filters (first page and count) on a large seeded table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Matches to seed.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.WARNING)
+        with scratch_database():
+            start = time.perf_counter()
+            seed_matches(options['rows'])
+            self.stdout.write(f"Seeded {options['rows']} matches in {time.perf_counter() - start:.1f}s")
+            # A team with only a handful of matches, the worst case for a scan
+            rare = Team.objects.create(name='Rare Touring XI')
+            Match.objects.bulk_create([
+                Match(home_team=rare, away_team_id=1, match_date=timezone.now(), location='Ground 1', status='Scheduled')
+            ])
+
+            searches = [
+                ('team', 'Team 42'),
+                ('team', 'Team 7'),
+                ('team', 'Touring'),
+                ('team', 'Nobody'),
+                ('venue', 'Ground 17'),
+                ('venue', 'Nowhere'),
+            ]
+            legacy_filters = {'team': legacy_team, 'venue': legacy_venue}
+            # match_list takes the match total from the cached status counts
+            invalidate_status_counts()
+            get_status_counts()
+            for kind, text in searches:
+                old_ms, count = self.time_search(
+                    lambda matches: self.legacy_search(legacy_filters[kind], matches, text), options['repeat']
+                )
+                new_ms, new_count = self.time_search(
+                    lambda matches: search_matches(matches, **{kind: text}), options['repeat']
+                )
+                assert count == new_count, (kind, text, count, new_count)
+                self.stdout.write(
+                    f"{kind}={text!r:<12} {count:>7} matches  icontains {old_ms:8.1f} ms  "
+                    f"indexed {new_ms:7.1f} ms  ({old_ms / new_ms:.0f}x)"
+                )
+
+    def legacy_search(self, apply_filter, matches, text):
+        matches = apply_filter(matches, text)
+        return matches, matches.count()
+
+    def time_search(self, search, repeat):
+        """Median ms for what match_list runs: the count and the first page of 20."""
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches, count = search(Match.objects.select_related('home_team', 'away_team').order_by('-match_date'))
+            list(matches[:20])
+            samples.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        return statistics.median(samples), count
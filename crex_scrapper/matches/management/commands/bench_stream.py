@@ -0,0 +1,108 @@
+"""
+Load-test the live SSE endpoint inside one ASGI application instance.
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+import tracemalloc
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from matches.benchmarks.db import scratch_database
+from matches.live import broadcaster
+
+
+class StreamClient:
+    """A fake HTTP connection driving the ASGI app like a browser's EventSource."""
+
+    def __init__(self, app, path, index):
+        self.app = app
+        self.scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': b'', 'root_path': '', 'headers': [(b'host', b'localhost')],
+            'client': ('127.0.0.1', 10000 + index), 'server': ('localhost', 80),
+        }
+        self.requested = False
+        self.closed = asyncio.Event()
+        self.snapshot = asyncio.Event()
+        self.update = asyncio.Event()
+        self.update_at = None
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        body = message.get('body', b'')
+        if b'event: snapshot' in body:
+            self.snapshot.set()
+        elif b'event: update' in body and not self.update.is_set():
+            self.update_at = time.perf_counter()
+            self.update.set()
+
+    def run(self):
+        return asyncio.ensure_future(self.app(self.scope, self.receive, self.send))
+
+
+class Command(BaseCommand):
+    help = "Measure concurrent SSE subscribers and update fan-out latency for one ASGI worker."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000],
+                            help="Numbers of concurrent subscribers.")
+
+    def handle(self, *args, **options):
+        app = get_asgi_application()
+        # After get_asgi_application(), which reconfigures logging
+        logging.getLogger('matches').setLevel(logging.ERROR)
+        logging.getLogger('django').setLevel(logging.ERROR)
+        self.stdout.write(f"{'subscribers':>11} {'connect s':>10} {'KiB/sub':>8} "
+                          f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        with scratch_database():
+            for size in options['sizes']:
+                row = asyncio.run(self.measure(app, size))
+                self.stdout.write(f"{size:>11} {row[0]:>10.2f} {row[1]:>8.1f} "
+                                  f"{row[2]:>8.1f} {row[3]:>8.1f} {row[4]:>8.1f}")
+        self.stdout.write("latency = publish to delivery of the SSE update at each subscriber")
+
+    async def measure(self, app, size):
+        path = reverse('matches:live_stream')
+
+        tracemalloc.start()
+        base_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        clients = [StreamClient(app, path, i) for i in range(size)]
+        tasks = [client.run() for client in clients]
+        await asyncio.gather(*(client.snapshot.wait() for client in clients))
+        connect_time = time.perf_counter() - start
+        per_subscriber = (tracemalloc.get_traced_memory()[0] - base_memory) / size / 1024
+        tracemalloc.stop()
+
+        sent_at = time.perf_counter()
+        broadcaster.apply({'match_id': 1, 'status': 'Live', 'live': {'India': f'{size}/1', 'current_over': '1.1'}})
+        await asyncio.gather(*(client.update.wait() for client in clients))
+        latencies = sorted((client.update_at - sent_at) * 1000 for client in clients)
+
+        for client in clients:
+            client.closed.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if broadcaster.listener:
+            broadcaster.listener.cancel()
+        broadcaster.listener = None
+        broadcaster.state.clear()
+
+        return (
+            connect_time,
+            per_subscriber,
+            statistics.median(latencies),
+            latencies[int(len(latencies) * 0.99) - 1],
+            latencies[-1],
+        )
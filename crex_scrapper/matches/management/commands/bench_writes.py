@@ -0,0 +1,111 @@
+"""
+Measure write throughput and read latency with several scrapers writing at once.
+"""
+
+import logging
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+
+from matches.benchmarks.db import scratch_database
+from matches.benchmarks.pages import fixture_rows
+from matches.benchmarks.suite import percentile
+from matches.models import Match
+from matches.scraper import CREXScraper
+from matches.writer import WriteQueue
+
+# What settings.py used before WAL: rollback journal, deferred transactions, 5 s busy timeout
+LEGACY_OPTIONS = {'timeout': 5, 'init_command': 'PRAGMA journal_mode=DELETE'}
+
+
+class Reader(threading.Thread):
+    """Stands in for the match list view, timing each query."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.latencies = []
+        self.errors = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            start = time.perf_counter()
+            try:
+                list(Match.objects.select_related('home_team', 'away_team').order_by('-match_date')[:50])
+                self.latencies.append(time.perf_counter() - start)
+            except OperationalError:
+                self.errors += 1
+            time.sleep(0.002)
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent scraper writes: rollback journal vs WAL vs WAL with the write queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Matches saved, one save per match.")
+        parser.add_argument('--writers', type=int, default=4, help="Concurrent writer threads.")
+
+    def handle(self, *args, **options):
+        logging.getLogger('matches').setLevel(logging.CRITICAL)
+        modes = [
+            ('rollback journal', LEGACY_OPTIONS, False),
+            ('WAL', settings.DATABASES['default']['OPTIONS'], False),
+            ('WAL + write queue', settings.DATABASES['default']['OPTIONS'], True),
+        ]
+        saved_options = connection.settings_dict.get('OPTIONS', {})
+        try:
+            for name, db_options, queued in modes:
+                connection.settings_dict['OPTIONS'] = db_options
+                with scratch_database():
+                    self.run_mode(name, queued, options['rows'], options['writers'])
+        finally:
+            connection.settings_dict['OPTIONS'] = saved_options
+
+    def run_mode(self, name, queued, rows, writers):
+        scraper = CREXScraper(cache=False)
+        writes = WriteQueue() if queued else None
+        chunks = [fixture_rows(rows)[i::writers] for i in range(writers)]
+        errors = []
+
+        def write(chunk):
+            # Queued saves are all submitted before waiting, as check_live_matches does
+            saves = [(row, writes.submit(scraper.write_match_batch, [row]) if writes else None) for row in chunk]
+            for row, save in saves:
+                try:
+                    if save:
+                        save.result()
+                    else:
+                        scraper.write_match_batch([row])
+                except OperationalError:
+                    errors.append(row)
+            connection.close()
+
+        reader = Reader()
+        reader.start()
+        threads = [threading.Thread(target=write, args=(chunk,)) for chunk in chunks]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        reader.running = False
+        reader.join()
+
+        transactions = rows - len(errors)
+        if writes:
+            writes.close()
+            transactions = writes.stats['transactions']
+        latencies = reader.latencies or [0]
+        saved = Match.objects.count()
+        self.stdout.write(
+            f"{name:<18} {saved} rows in {seconds:.2f}s ({saved / seconds:.0f} rows/s, {transactions} commits), "
+            f"{len(errors)} 'database is locked' errors; {len(reader.latencies) / seconds:.0f} reads/s, "
+            f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms, {reader.errors} failed"
+        )
@@ -0,0 +1,49 @@
+"""
+Export matches or scorecard rows to a file or stdout.
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from matches.export import EXPORT_DATASETS, EXPORT_FORMATS, export_stream, export_watermark, parse_timestamp
+
+
+class Command(BaseCommand):
+    help = "Stream matches or scorecards as NDJSON, CSV or Parquet with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--dataset', choices=list(EXPORT_DATASETS), default='matches')
+        parser.add_argument('--status', help="Only matches with this status.")
+        parser.add_argument('--start', help="Only matches on or after this date/datetime.")
+        parser.add_argument('--end', help="Only matches before this date/datetime.")
+        parser.add_argument('--since', help="Only matches updated after this datetime (incremental pull).")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Rows fetched and written per chunk.")
+        parser.add_argument('--output', '-o', help="File to write; defaults to stdout.")
+
+    def handle(self, *args, **options):
+        watermark = export_watermark()
+        try:
+            _, _, chunks = export_stream(
+                fmt=options['format'],
+                dataset=options['dataset'],
+                chunk_size=options['chunk_size'],
+                status=options['status'],
+                start=parse_timestamp(options['start']),
+                end=parse_timestamp(options['end']),
+                since=parse_timestamp(options['since']),
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        # Pass this as --since on the next incremental pull
+        self.stderr.write(f"Export watermark: {watermark.isoformat()}")
@@ -0,0 +1,185 @@
+"""
+Prometheus metrics for the scraper, Celery tasks and views.
+
+Set PROMETHEUS_MULTIPROC_DIR (an empty directory shared by the processes)
+before starting web or Celery worker processes to aggregate every process
+into the /metrics endpoint; without it each process reports only itself.
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from celery.signals import task_postrun, task_prerun
+from django.db import connection
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess,
+)
+
+# Buckets in seconds, from a cached page to a slow retried download
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'crex_http_request_seconds', "Time to get a page, by URL class and outcome.",
+    ['url_class', 'status'], buckets=LATENCY_BUCKETS,
+)
+HTTP_RESPONSE_BYTES = Counter(
+    'crex_http_response_bytes', "Page bytes received, or reused from the cache.", ['url_class', 'source'],
+)
+HTTP_RETRIES = Counter('crex_http_retries', "Page downloads retried after an error.", ['url_class'])
+BREAKER_REJECTIONS = Counter('crex_breaker_rejections', "Requests refused by an open circuit.", ['host'])
+BREAKER_TRANSITIONS = Counter('crex_breaker_transitions', "Circuits opened or closed, by host.", ['host', 'state'])
+HTTP_NEW_CONNECTIONS = Counter(
+    'crex_http_new_connections', "Connections opened for page downloads; other requests reused one.",
+)
+
+EXTRACT_SECONDS = Histogram(
+    'crex_extract_seconds', "Time spent in each page extractor.", ['extractor'], buckets=LATENCY_BUCKETS,
+)
+
+SAVE_SECONDS = Histogram(
+    'crex_save_seconds', "Time to save scraped data.", ['operation'], buckets=LATENCY_BUCKETS,
+)
+SAVE_ROWS = Counter('crex_save_rows', "Rows saved.", ['operation'])
+SAVE_QUERIES = Histogram(
+    'crex_save_queries', "Database queries per save.", ['operation'], buckets=QUERY_BUCKETS,
+)
+
+WRITE_BATCH_SAVES = Histogram(
+    'crex_write_batch_saves', "Queued saves committed per write-queue transaction.", buckets=QUERY_BUCKETS,
+)
+WRITE_WAIT_SECONDS = Histogram(
+    'crex_write_wait_seconds', "Time a save waited in the write queue.", buckets=LATENCY_BUCKETS,
+)
+
+TASK_RETRIES = Counter('crex_task_retries', "Tasks rescheduled after a failed fetch.", ['task'])
+TASK_SECONDS = Histogram(
+    'crex_task_seconds', "Celery task duration, by task and outcome.", ['task', 'outcome'],
+    buckets=LATENCY_BUCKETS + (60, 120, 300),
+)
+
+VIEW_SECONDS = Histogram(
+    'crex_view_seconds', "Time to build a response, by view and status code.",
+    ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+)
+PAGE_CACHE_REQUESTS = Counter(
+    'crex_page_cache_requests', "HTML pages served from the page cache (hit) or rendered (miss).",
+    ['view', 'outcome'],
+)
+VIEW_QUERIES = Histogram(
+    'crex_view_queries', "Database queries per request, by view.", ['view'], buckets=QUERY_BUCKETS,
+)
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries():
+    """Count the queries run on this thread's connection inside the block."""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
+
+
+@contextmanager
+def observe_save(operation):
+    """Record the time and query count of a save block."""
+    start = time.perf_counter()
+    with count_queries() as queries:
+        yield
+    SAVE_SECONDS.labels(operation).observe(time.perf_counter() - start)
+    SAVE_QUERIES.labels(operation).observe(queries.count)
+
+
+def timed_extractor(func):
+    """Record a scraper extractor's run time under its method name."""
+    histogram = EXTRACT_SECONDS.labels(extractor=func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with histogram.time():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def registry():
+    """The registry /metrics should expose: every process's files in multiprocess mode."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    aggregated = CollectorRegistry()
+    multiprocess.MultiProcessCollector(aggregated)
+    return aggregated
+
+
+def render_metrics():
+    """Return (body, content type) in the Prometheus text format."""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
+
+
+# Celery tasks return "Error: ..." instead of raising, so read the outcome from the result
+_task_starts = {}
+
+
+@task_prerun.connect
+def task_started(task_id=None, **kwargs):
+    _task_starts[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    start = _task_starts.pop(task_id, None)
+    if start is None or task is None:
+        return
+    if state != 'SUCCESS':
+        outcome = (state or 'unknown').lower()
+    elif isinstance(retval, str) and retval.startswith('Error'):
+        outcome = 'error'
+    else:
+        outcome = 'success'
+    TASK_SECONDS.labels(task=task.name, outcome=outcome).observe(time.perf_counter() - start)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+def metrics_middleware(get_response):
+    """Record latency and query count for every view."""
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            # Queries of async views run on other threads and are not counted
+            start = time.perf_counter()
+            response = await get_response(request)
+            VIEW_SECONDS.labels(view_name(request), request.method, response.status_code).observe(
+                time.perf_counter() - start
+            )
+            return response
+        markcoroutinefunction(middleware)
+        return middleware
+
+    def middleware(request):
+        start = time.perf_counter()
+        with count_queries() as queries:
+            response = get_response(request)
+        name = view_name(request)
+        VIEW_SECONDS.labels(name, request.method, response.status_code).observe(time.perf_counter() - start)
+        VIEW_QUERIES.labels(name).observe(queries.count)
+        return response
+    return middleware
+
+
+metrics_middleware.sync_capable = True
+metrics_middleware.async_capable = True
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:28
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def deduplicate(apps, schema_editor):
+    """Merge duplicate teams and matches so the unique constraints can apply."""
+    Team = apps.get_model('matches', 'Team')
+    Match = apps.get_model('matches', 'Match')
+
+    duplicate_teams = Team.objects.values('name').annotate(keep=Min('id'), n=Count('id')).filter(n__gt=1)
+    for row in duplicate_teams:
+        extra_ids = list(Team.objects.filter(name=row['name']).exclude(id=row['keep']).values_list('id', flat=True))
+        Match.objects.filter(home_team_id__in=extra_ids).update(home_team_id=row['keep'])
+        Match.objects.filter(away_team_id__in=extra_ids).update(away_team_id=row['keep'])
+        Team.objects.filter(id__in=extra_ids).delete()
+
+    duplicate_matches = (
+        Match.objects.values('home_team_id', 'away_team_id', 'match_date')
+        .annotate(keep=Min('id'), n=Count('id'))
+        .filter(n__gt=1)
+    )
+    for row in duplicate_matches:
+        Match.objects.filter(
+            home_team_id=row['home_team_id'],
+            away_team_id=row['away_team_id'],
+            match_date=row['match_date'],
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0002_pagefingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='team',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('home_team', 'away_team', 'match_date'), name='unique_match_fixture'),
+        ),
+    ]
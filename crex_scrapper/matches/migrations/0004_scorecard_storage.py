@@ -0,0 +1,105 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0003_match_natural_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Innings',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='innings', to='matches.match')),
+            ],
+            options={
+                'verbose_name_plural': 'innings',
+                'ordering': ['number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BowlingEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('player', models.CharField(max_length=100)),
+                ('overs', models.CharField(max_length=10)),
+                ('maidens', models.CharField(max_length=10)),
+                ('runs', models.CharField(max_length=10)),
+                ('wickets', models.CharField(default='0', max_length=10)),
+                ('innings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bowling', to='matches.innings')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BattingEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('player', models.CharField(max_length=100)),
+                ('dismissal', models.CharField(blank=True, max_length=255)),
+                ('runs', models.CharField(max_length=10)),
+                ('balls', models.CharField(max_length=10)),
+                ('fours', models.CharField(default='0', max_length=10)),
+                ('sixes', models.CharField(default='0', max_length=10)),
+                ('innings', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batting', to='matches.innings')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MatchInfo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100)),
+                ('value', models.CharField(max_length=500)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='info_items', to='matches.match')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SquadMember',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('team_name', models.CharField(max_length=100)),
+                ('player', models.CharField(max_length=100)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='squad_members', to='matches.match')),
+            ],
+            options={
+                'ordering': ['team_name', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='innings',
+            constraint=models.UniqueConstraint(fields=('match', 'number'), name='unique_innings_number'),
+        ),
+        migrations.AddConstraint(
+            model_name='bowlingentry',
+            constraint=models.UniqueConstraint(fields=('innings', 'position'), name='unique_bowling_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='battingentry',
+            constraint=models.UniqueConstraint(fields=('innings', 'position'), name='unique_batting_position'),
+        ),
+        migrations.AddConstraint(
+            model_name='matchinfo',
+            constraint=models.UniqueConstraint(fields=('match', 'label'), name='unique_match_info_label'),
+        ),
+        migrations.AddConstraint(
+            model_name='squadmember',
+            constraint=models.UniqueConstraint(fields=('match', 'team_name', 'position'), name='unique_squad_position'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0004_scorecard_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(default='pre_toss', max_length=20)),
+                ('next_due', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('last_polled', models.DateTimeField(blank=True, null=True)),
+                ('match', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='poll_schedule', to='matches.match')),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0006_match_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['updated_at'], name='match_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 13:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0007_match_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiveSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('live', models.JSONField(default=dict)),
+                ('last_sequence', models.PositiveIntegerField(default=0)),
+                ('match', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='live_snapshot', to='matches.match')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MatchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('kind', models.CharField(max_length=20)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='matches.match')),
+            ],
+            options={
+                'ordering': ['match', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('match', 'sequence'), name='unique_match_event_sequence')],
+            },
+        ),
+    ]
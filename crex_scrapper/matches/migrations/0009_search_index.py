@@ -0,0 +1,84 @@
+from django.db import migrations, models
+
+# Trigram FTS5 indexes over team names and match venues, kept in step by
+# triggers (see matches.search). External content: the names stay in their
+# tables and only the index is stored.
+
+# Drop a venue once no match is played there, after cleanup or archiving
+# deletes its last match or a rescrape moves it
+PRUNE_VENUE = (
+    "DELETE FROM matches_venue WHERE name = old.location "
+    "AND NOT EXISTS (SELECT 1 FROM matches_match WHERE location = old.location);"
+)
+
+CREATE_SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE matches_team_search USING fts5("
+    "name, content='matches_team', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER matches_team_search_insert AFTER INSERT ON matches_team BEGIN "
+    "INSERT INTO matches_team_search (rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER matches_team_search_delete AFTER DELETE ON matches_team BEGIN "
+    "INSERT INTO matches_team_search (matches_team_search, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER matches_team_search_update AFTER UPDATE OF name ON matches_team BEGIN "
+    "INSERT INTO matches_team_search (matches_team_search, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO matches_team_search (rowid, name) VALUES (new.id, new.name); END",
+    "INSERT INTO matches_team_search (matches_team_search) VALUES ('rebuild')",
+
+    # One row per distinct match location, so a venue search scans venues rather than matches.
+    # Not INSERT OR IGNORE: an upsert's conflict handling would override it inside the trigger.
+    "CREATE TABLE matches_venue (id integer PRIMARY KEY, name varchar(255) NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE matches_venue_search USING fts5("
+    "name, content='matches_venue', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER matches_venue_search_insert AFTER INSERT ON matches_venue BEGIN "
+    "INSERT INTO matches_venue_search (rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER matches_venue_search_delete AFTER DELETE ON matches_venue BEGIN "
+    "INSERT INTO matches_venue_search (matches_venue_search, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER matches_match_venue_insert AFTER INSERT ON matches_match BEGIN "
+    "INSERT INTO matches_venue (name) SELECT new.location "
+    "WHERE NOT EXISTS (SELECT 1 FROM matches_venue WHERE name = new.location); END",
+    "CREATE TRIGGER matches_match_venue_update AFTER UPDATE OF location ON matches_match "
+    "WHEN old.location IS NOT new.location BEGIN "
+    "INSERT INTO matches_venue (name) SELECT new.location "
+    "WHERE NOT EXISTS (SELECT 1 FROM matches_venue WHERE name = new.location); " + PRUNE_VENUE + " END",
+    "CREATE TRIGGER matches_match_venue_delete AFTER DELETE ON matches_match BEGIN " + PRUNE_VENUE + " END",
+    "INSERT INTO matches_venue (name) SELECT DISTINCT location FROM matches_match",
+    "INSERT INTO matches_venue_search (matches_venue_search) VALUES ('rebuild')",
+]
+
+DROP_SEARCH_INDEX = [
+    "DROP TRIGGER IF EXISTS matches_team_search_insert",
+    "DROP TRIGGER IF EXISTS matches_team_search_delete",
+    "DROP TRIGGER IF EXISTS matches_team_search_update",
+    "DROP TABLE IF EXISTS matches_team_search",
+    "DROP TRIGGER IF EXISTS matches_match_venue_insert",
+    "DROP TRIGGER IF EXISTS matches_match_venue_update",
+    "DROP TRIGGER IF EXISTS matches_match_venue_delete",
+    "DROP TRIGGER IF EXISTS matches_venue_search_insert",
+    "DROP TRIGGER IF EXISTS matches_venue_search_delete",
+    "DROP TABLE IF EXISTS matches_venue_search",
+    "DROP TABLE IF EXISTS matches_venue",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite only; other databases keep the icontains filters
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0008_match_events'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['location', 'match_date'], name='match_location_date_idx'),
+        ),
+        migrations.RunPython(run_statements(CREATE_SEARCH_INDEX), run_statements(DROP_SEARCH_INDEX)),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+# Per status and day match counts, kept in step by triggers (see matches.facets).
+# Rows are created then incremented in two statements rather than with an
+# upsert, whose conflict handling an outer upsert would override.
+ADD_MATCH = (
+    "INSERT INTO matches_matchfacet (status, day, matches) SELECT {row}.status, date({row}.match_date), 0 "
+    "WHERE NOT EXISTS (SELECT 1 FROM matches_matchfacet WHERE status = {row}.status AND day = date({row}.match_date)); "
+    "UPDATE matches_matchfacet SET matches = matches + 1 WHERE status = {row}.status AND day = date({row}.match_date);"
+)
+REMOVE_MATCH = (
+    "UPDATE matches_matchfacet SET matches = matches - 1 WHERE status = {row}.status AND day = date({row}.match_date); "
+    "DELETE FROM matches_matchfacet WHERE status = {row}.status AND day = date({row}.match_date) AND matches = 0;"
+)
+
+CREATE_FACET_TRIGGERS = [
+    "CREATE TRIGGER matches_facet_insert AFTER INSERT ON matches_match BEGIN "
+    + ADD_MATCH.format(row='new') + " END",
+    "CREATE TRIGGER matches_facet_delete AFTER DELETE ON matches_match BEGIN "
+    + REMOVE_MATCH.format(row='old') + " END",
+    "CREATE TRIGGER matches_facet_update AFTER UPDATE OF status, match_date ON matches_match "
+    "WHEN old.status IS NOT new.status OR date(old.match_date) IS NOT date(new.match_date) BEGIN "
+    + REMOVE_MATCH.format(row='old') + " " + ADD_MATCH.format(row='new') + " END",
+    "INSERT INTO matches_matchfacet (status, day, matches) "
+    "SELECT status, date(match_date), COUNT(*) FROM matches_match GROUP BY 1, 2",
+]
+
+DROP_FACET_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS matches_facet_insert",
+    "DROP TRIGGER IF EXISTS matches_facet_delete",
+    "DROP TRIGGER IF EXISTS matches_facet_update",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        # Other databases count matches directly (see matches.facets)
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20)),
+                ('day', models.DateField()),
+                ('matches', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('status', 'day'), name='unique_match_facet')],
+            },
+        ),
+        migrations.RunPython(run_statements(CREATE_FACET_TRIGGERS), run_statements(DROP_FACET_TRIGGERS)),
+    ]
@@ -4,7 +4,7 @@ from django.db import models
 
 class Team(models.Model):
     """Model representing a cricket team."""
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
         return self.name
@@ -17,6 +17,190 @@ class Match(models.Model):
     match_date = models.DateTimeField()
     location = models.CharField(max_length=255)
     status = models.CharField(max_length=20)  
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Natural key used by the bulk upsert in CREXScraper.save_match_batch
+            models.UniqueConstraint(fields=['home_team', 'away_team', 'match_date'], name='unique_match_fixture'),
+        ]
+        indexes = [
+            # Status filters ordered or ranged by date: match_list, api_matches,
+            # live_matches, dashboard counts, trigger_live_scraping
+            models.Index(fields=['status', 'match_date'], name='match_status_date_idx'),
+            # Unfiltered date ordering and windows: match_list, dashboard, check_live_matches
+            models.Index(fields=['match_date'], name='match_date_idx'),
+            # Incremental exports: everything changed since a timestamp
+            models.Index(fields=['updated_at'], name='match_updated_idx'),
+            # Venue search: matches at the venues a search resolved to (see matches.search)
+            models.Index(fields=['location', 'match_date'], name='match_location_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.home_team} vs {self.away_team}"
+
+
+class PageFingerprint(models.Model):
+    """Content hashes of the last parsed copy of a scraped page."""
+    url = models.CharField(max_length=500, unique=True)
+    match = models.ForeignKey(Match, related_name='fingerprints', null=True, blank=True, on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64)
+    section_hashes = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.url
+
+
+class MatchInfo(models.Model):
+    """A labelled fact from a match's info tab, such as the toss or venue."""
+    match = models.ForeignKey(Match, related_name='info_items', on_delete=models.CASCADE)
+    label = models.CharField(max_length=100)
+    value = models.CharField(max_length=500)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'label'], name='unique_match_info_label'),
+        ]
+
+    def __str__(self):
+        return f"{self.label}: {self.value}"
+
+
+class SquadMember(models.Model):
+    """A player named in a team's squad for a match."""
+    match = models.ForeignKey(Match, related_name='squad_members', on_delete=models.CASCADE)
+    team_name = models.CharField(max_length=100)
+    player = models.CharField(max_length=100)
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['team_name', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'team_name', 'position'], name='unique_squad_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.player} ({self.team_name})"
+
+
+class Innings(models.Model):
+    """One innings of a match scorecard."""
+    match = models.ForeignKey(Match, related_name='innings', on_delete=models.CASCADE)
+    number = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['number']
+        verbose_name_plural = 'innings'
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'number'], name='unique_innings_number'),
+        ]
+
+    def __str__(self):
+        return f"{self.match} - innings {self.number}"
+
+
+class BattingEntry(models.Model):
+    """A batter's line in an innings, stored as scraped."""
+    innings = models.ForeignKey(Innings, related_name='batting', on_delete=models.CASCADE)
+    position = models.PositiveSmallIntegerField()
+    player = models.CharField(max_length=100)
+    dismissal = models.CharField(max_length=255, blank=True)
+    runs = models.CharField(max_length=10)
+    balls = models.CharField(max_length=10)
+    fours = models.CharField(max_length=10, default='0')
+    sixes = models.CharField(max_length=10, default='0')
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['innings', 'position'], name='unique_batting_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.player} {self.runs} ({self.balls})"
+
+
+class BowlingEntry(models.Model):
+    """A bowler's line in an innings, stored as scraped."""
+    innings = models.ForeignKey(Innings, related_name='bowling', on_delete=models.CASCADE)
+    position = models.PositiveSmallIntegerField()
+    player = models.CharField(max_length=100)
+    overs = models.CharField(max_length=10)
+    maidens = models.CharField(max_length=10)
+    runs = models.CharField(max_length=10)
+    wickets = models.CharField(max_length=10, default='0')
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['innings', 'position'], name='unique_bowling_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.player} {self.wickets}-{self.runs}"
+
+
+class PollSchedule(models.Model):
+    """When a match is next due for a live poll, and the state that set it."""
+    match = models.OneToOneField(Match, related_name='poll_schedule', on_delete=models.CASCADE)
+    state = models.CharField(max_length=20, default='pre_toss')
+    next_due = models.DateTimeField(null=True, blank=True, db_index=True)  # None once polling stops
+    last_polled = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.match} ({self.state}, due {self.next_due})"
+
+
+class MatchEvent(models.Model):
+    """A change seen between two live polls of a match, in the order it was seen.
+
+    Events are only ever appended; ``sequence`` counts up from 1 per match.
+    """
+    match = models.ForeignKey(Match, related_name='events', on_delete=models.CASCADE)
+    sequence = models.PositiveIntegerField()
+    kind = models.CharField(max_length=20)  # ball, score, wicket or update
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['match', 'sequence']
+        constraints = [
+            # Also the index behind "events of a match after sequence N"
+            models.UniqueConstraint(fields=['match', 'sequence'], name='unique_match_event_sequence'),
+        ]
+
+    def __str__(self):
+        return f"{self.match_id}#{self.sequence} {self.kind}"
+
+
+class LiveSnapshot(models.Model):
+    """The last live section seen for a match, which new polls are diffed against."""
+    match = models.OneToOneField(Match, related_name='live_snapshot', on_delete=models.CASCADE)
+    live = models.JSONField(default=dict)
+    last_sequence = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.match} (event {self.last_sequence})"
+
+
+class MatchFacet(models.Model):
+    """How many matches have a status on a (UTC) day.
+
+    Maintained by database triggers on every match insert, delete and
+    status or date change (see matches.facets), so match_list can count
+    without scanning matches.
+    """
+    status = models.CharField(max_length=20)
+    day = models.DateField()
+    matches = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['status', 'day'], name='unique_match_facet'),
+        ]
 
     def __str__(self):
-        return f"{self.home_team} vs {self.away_team}"
\ No newline at end of file
+        return f"{self.status} on {self.day}: {self.matches}"
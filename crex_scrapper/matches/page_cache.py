@@ -0,0 +1,113 @@
+"""
+Rendered-page cache for the HTML views.
+
+Pages go in the 'pages' cache (CREX_PAGE_CACHE_BACKEND picks local memory
+or files) under a key made of the view, its query string and the data
+version: a counter in the default cache that every path writing matches
+bumps with bump_data_version(). One write retires every cached page, and
+until the next one pages are served without touching the database.
+CREX_PAGE_CACHE_TIMEOUT bounds a page's life anyway, for filters that
+depend on the clock such as "upcoming".
+
+Templates also cache each match card as a fragment keyed by the match id
+and updated_at, so rendering a page again after a write only renders the
+matches that changed.
+"""
+
+import functools
+import hashlib
+import time
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .metrics import PAGE_CACHE_REQUESTS
+
+DATA_VERSION_KEY = 'matches:data_version'
+PAGE_KEY = 'matches:page:{}:{}:{}'
+
+# (view, 'hit' or 'miss') -> requests served by this process
+_requests = Counter()
+
+
+def data_version():
+    """The current data version; pages cached under an older one are never served."""
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        # Start from the clock so a lost counter cannot bring back old pages
+        cache.add(DATA_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Retire every cached page after matches are added, changed or deleted."""
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.add(DATA_VERSION_KEY, time.time_ns(), None)
+
+
+def page_cache():
+    """The cache for rendered pages, or None when page caching is off."""
+    if 'pages' not in settings.CACHES:
+        return None
+    pages = caches['pages']
+    return None if isinstance(pages, DummyCache) else pages
+
+
+def page_key(name, request, vary=()):
+    query = urlencode(sorted(request.GET.items()))
+    digest = hashlib.md5(repr((query, tuple(vary))).encode()).hexdigest()
+    return PAGE_KEY.format(name, data_version(), digest)
+
+
+def cached_page(name, vary=None):
+    """Serve a view's GET responses from the page cache until the data version changes.
+
+    ``vary(request)`` returns anything else the page depends on, such as
+    today's date; it becomes part of the key.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            pages = page_cache()
+            if pages is None or request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            # Pages read the CSRF token from its cookie, so make sure every visitor gets one
+            get_token(request)
+            key = page_key(name, request, vary(request) if vary else ())
+            cached = pages.get(key)
+            if cached is not None:
+                record_request(name, 'hit')
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            record_request(name, 'miss')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                pages.set(key, (response.content, response['Content-Type']),
+                          getattr(settings, 'CREX_PAGE_CACHE_TIMEOUT', 60))
+            return response
+        return wrapper
+    return decorator
+
+
+def record_request(name, outcome):
+    _requests[name, outcome] += 1
+    PAGE_CACHE_REQUESTS.labels(name, outcome).inc()
+
+
+def page_cache_stats():
+    """Hits, misses and hit rate per view for this process."""
+    stats = {}
+    for name in sorted({name for name, _ in _requests}):
+        hits, misses = _requests[name, 'hit'], _requests[name, 'miss']
+        stats[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3)}
+    return stats
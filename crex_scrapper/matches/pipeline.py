@@ -0,0 +1,279 @@
+"""
+Pipelined scraping: fetch, parse and persist as separate stages.
+
+Fetching is I/O bound and runs on a thread pool; BeautifulSoup parsing is
+CPU bound and runs in a process pool sized to the CPU count; all database
+writes go to the process's writer thread in batched transactions, so
+SQLite only ever sees one writer. Bounded queues between the stages apply
+backpressure: fetchers stop when parsing falls behind and parsing stops
+when the persister does. A failed persist stops the fetchers and the
+persister drains what is already in flight, so every stage thread ends
+before the error reaches the caller.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .http_pool import build_session
+from .models import Match
+from .scraper import CREXScraper
+from .writer import submit_write
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+DONE = object()
+
+# One scraper per parse process, by parser engine name
+_parsers = {}
+
+
+def init_parse_worker():
+    """Make sure a parse process has Django configured (needed under spawn)."""
+    if not apps.ready:
+        django.setup()
+
+
+def parse_page(page_type, content, parser=None):
+    """Parse a downloaded page in a worker process.
+
+    Returns the extracted fixture rows for a match list and the details
+    dict for a match page.
+    """
+    scraper = _parsers.get(parser)
+    if scraper is None:
+        scraper = _parsers[parser] = CREXScraper(cache=False, parser=parser)
+    if page_type == 'match_list':
+        return scraper.extract_match_rows(content)
+    return scraper.parse_match_details(content)
+
+
+class PageJob:
+    """One page moving through the pipeline."""
+
+    def __init__(self, url, page_type='match', match=None):
+        self.url = url
+        self.page_type = page_type
+        self.match = match
+        self.content = None
+        self.result = None
+        self.error = None
+
+
+class PipelinedCREXScraper(CREXScraper):
+    """Scraper whose fetch, parse and persist work run as pipelined stages.
+
+    Stage sizes default to the CREX_PIPELINE_* settings; parse_workers
+    defaults to the CPU count.
+    """
+
+    def __init__(self, base_url=None, timeout=None, cache=None, parser=None, fetch_workers=None,
+                 parse_workers=None, persist_batch=None, queue_size=None, session=None, retries=None):
+        self.fetch_workers = fetch_workers or getattr(settings, 'CREX_PIPELINE_FETCH_WORKERS', 8)
+        # One pooled connection per fetch thread
+        super().__init__(base_url=base_url, timeout=timeout, cache=cache, parser=parser,
+                         session=session or build_session(self.fetch_workers), retries=retries)
+        self.parser_name = parser
+        self.parse_workers = parse_workers or getattr(settings, 'CREX_PIPELINE_PARSE_WORKERS', None) or os.cpu_count()
+        self.persist_batch = persist_batch or getattr(settings, 'CREX_PIPELINE_PERSIST_BATCH', 20)
+        self.queue_size = queue_size or getattr(settings, 'CREX_PIPELINE_QUEUE_SIZE', 50)
+        self.stage_stats = {'fetched': 0, 'unchanged': 0, 'parsed': 0, 'persisted': 0, 'failed': 0}
+
+    def parse_pool(self):
+        """Process pool for parsing, or threads where processes cannot be started.
+
+        Daemonic processes (Celery's prefork children) may not have children
+        of their own, so there parsing falls back to threads.
+        """
+        if multiprocessing.current_process().daemon:
+            logger.warning("Running inside a daemonic process, parsing on threads instead of processes")
+            return ThreadPoolExecutor(max_workers=self.parse_workers)
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers, initializer=init_parse_worker)
+        # Start the workers before any fetch thread exists, so none is forked mid-request
+        pool.submit(init_parse_worker).result()
+        return pool
+
+    def run_pipeline(self, jobs, persist=None):
+        """Push jobs through fetch -> parse -> persist and return them.
+
+        ``persist(batch)`` is called on this thread with lists of parsed
+        jobs; without it parsed jobs are only collected. Jobs whose page is
+        unchanged keep result None, failed ones get an ``error``. An error
+        from ``persist`` or a stage is raised once every stage has stopped.
+        """
+        jobs = list(jobs)
+        pending = queue.Queue()
+        for job in jobs:
+            pending.put(job)
+        fetched = queue.Queue(maxsize=self.queue_size)
+        parsed = queue.Queue(maxsize=self.queue_size)
+        lock = threading.Lock()
+        # Set when persisting fails, so no more pages are fetched
+        stop = threading.Event()
+        failures = []
+
+        def count(stat):
+            with lock:
+                self.stage_stats[stat] += 1
+
+        def fetch_stage():
+            while not stop.is_set():
+                try:
+                    job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    job.content = self.get_page(job.url).content
+                    changed = self.page_changed(job.url, job.content)
+                    count('fetched')
+                except Exception as e:
+                    job.error = e
+                    count('failed')
+                    parsed.put(job)
+                    continue
+                if changed:
+                    fetched.put(job)
+                else:
+                    count('unchanged')
+                    parsed.put(job)
+
+        def parse_stage(pool):
+            # Each thread keeps one page in the process pool at a time
+            while True:
+                job = fetched.get()
+                if job is DONE:
+                    return
+                try:
+                    job.result = pool.submit(parse_page, job.page_type, job.content, self.parser_name).result()
+                    count('parsed')
+                except Exception as e:
+                    job.error = e
+                    count('failed')
+                job.content = None
+                parsed.put(job)
+
+        def run_stages(pool):
+            try:
+                with ThreadPoolExecutor(max_workers=self.fetch_workers) as fetchers, \
+                        ThreadPoolExecutor(max_workers=self.parse_workers) as parsers:
+                    parse_threads = [parsers.submit(parse_stage, pool) for _ in range(self.parse_workers)]
+                    fetch_threads = [fetchers.submit(fetch_stage) for _ in range(self.fetch_workers)]
+                    # Parsers only stop on DONE, so they get it even if a fetcher failed
+                    wait(fetch_threads)
+                    for _ in parse_threads:
+                        fetched.put(DONE)
+                    for future in fetch_threads + parse_threads:
+                        future.result()
+            except Exception as e:
+                failures.append(e)
+            finally:
+                parsed.put(DONE)
+
+        with self.parse_pool() as pool:
+            stages = threading.Thread(target=run_stages, args=(pool,), daemon=True)
+            stages.start()
+            try:
+                self.persist_stage(parsed, persist, stop)
+            finally:
+                stages.join()
+        if failures:
+            raise failures[0]
+        return jobs
+
+    def persist_stage(self, parsed, persist, stop=None):
+        """Drain parsed jobs on this thread, handing them to ``persist`` in batches.
+
+        After ``persist`` fails, sets ``stop`` and keeps draining without
+        persisting, so the other stages never block on a full queue; the
+        error is raised at the end.
+        """
+        batch = []
+        error = None
+        while True:
+            job = parsed.get()
+            if job is not DONE and job.error is None and job.result is not None:
+                batch.append(job)
+            if batch and (job is DONE or len(batch) >= self.persist_batch):
+                if error is not None:
+                    self.stage_stats['failed'] += len(batch)
+                else:
+                    try:
+                        if persist:
+                            submit_write(persist, batch).result()
+                        self.stage_stats['persisted'] += len(batch)
+                    except Exception as e:
+                        logger.error(f"Error persisting {len(batch)} pages, stopping the pipeline: {e}")
+                        error = e
+                        self.stage_stats['failed'] += len(batch)
+                        if stop:
+                            stop.set()
+                batch = []
+            if job is DONE:
+                if error is not None:
+                    raise error
+                return
+
+    def scrape_many_match_details(self, match_urls):
+        """Fetch and parse match pages through the pipeline, returning url -> details."""
+        jobs = self.run_pipeline(PageJob(url) for url in dict.fromkeys(match_urls))
+        return {job.url: {} if job.error else job.result for job in jobs}
+
+    def check_live_matches(self):
+        """Check recent matches with pipelined fetch, parse and batched saves."""
+        logger.info("Checking for live matches (pipelined)")
+        now = timezone.now()
+        recent_matches = Match.objects.filter(
+            match_date__lte=now + timedelta(hours=1),
+            match_date__gte=now - timedelta(hours=6)
+        )
+        jobs = [PageJob(self.match_url(match.id), match=match) for match in recent_matches]
+        self.load_fingerprints(job.url for job in jobs)
+
+        updated = []
+
+        def persist(batch):
+            with transaction.atomic():
+                for job in batch:
+                    try:
+                        with transaction.atomic():
+                            changed = self.save_match_details(job.match, job.url, job.result)
+                        if 'live' in changed and job.result.get('live'):
+                            updated.append(job.match)
+                    except Exception as e:
+                        logger.error(f"Error updating live match {job.match}: {e}")
+
+        start = time.perf_counter()
+        self.run_pipeline(jobs, persist)
+        logger.info(f"Updated {len(updated)} live matches in {time.perf_counter() - start:.2f}s, "
+                    f"stages {self.stage_stats}, {self.fingerprint_summary()}")
+        return len(updated)
+
+    def scrape_match_list(self):
+        """Scrape the match list with parsing in the process pool."""
+        logger.info("Starting to scrape match list (pipelined)")
+        list_url = f"{self.base_url}/fixtures/match-list"
+        self.load_fingerprints([list_url])
+        saved = []
+
+        def persist(batch):
+            for job in batch:
+                matches = self.save_match_batch(job.result)
+                if matches or not job.result:
+                    self.save_fingerprint(job.url)
+                saved.extend(matches)
+
+        self.run_pipeline([PageJob(list_url, page_type='match_list')], persist)
+        logger.info(f"Scraped {len(saved)} matches from match list")
+        return len(saved)
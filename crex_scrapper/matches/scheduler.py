@@ -0,0 +1,198 @@
+"""
+Adaptive per-match live polling.
+
+Every match near its start time has a PollSchedule holding the next time
+it is due. Each cycle pops the due matches from a priority queue, leases
+them by pushing next_due past the cycle so an overlapping cycle skips them,
+scrapes them together and reschedules each one by state: fast while live,
+slower before the toss and between innings, and not at all once completed.
+Matches still not completed CREX_POLL_GIVE_UP_AFTER past their start stop
+being polled but keep their status.
+"""
+
+import heapq
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Match, PollSchedule
+from .page_cache import bump_data_version
+from .stats import invalidate_status_counts
+from .live import publish_live_update
+from .writer import submit_write
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls per state; None stops polling
+DEFAULT_POLL_INTERVALS = {
+    'live': 30,
+    'break': 180,       # toss done or innings break, play not under way
+    'pre_toss': 600,
+    'completed': None,
+    'stopped': None,    # given up on, whatever the page last said
+}
+
+# Lower sorts first when several matches are due at the same moment
+STATE_PRIORITY = {'live': 0, 'break': 1, 'pre_toss': 2}
+
+# The fixed schedule this replaces: every match from 6h ago to 1h ahead, every 5 minutes
+CRONTAB_INTERVAL = 300
+CRONTAB_WINDOW = (timedelta(hours=-6), timedelta(hours=1))
+
+
+def poll_intervals():
+    return {**DEFAULT_POLL_INTERVALS, **getattr(settings, 'CREX_POLL_INTERVALS', {})}
+
+
+def classify(match, details, previous='pre_toss'):
+    """Work out a match's polling state from its status and latest details.
+
+    ``details`` is the scraper output; when it is None or empty (unchanged
+    page or failed fetch) the previous state is kept.
+    """
+    if match.status == 'Completed':
+        return 'completed'
+    if not details:
+        return previous
+
+    info = {label.lower(): value for label, value in details.get('match_info', {}).items()}
+    live = details.get('live') or {}
+    if 'result' in info:
+        return 'completed'
+    if live:
+        return 'live' if 'current_over' in live else 'break'
+    if 'toss' in info:
+        return 'break'
+    return 'pre_toss'
+
+
+def next_due(state, now):
+    """Return when a match in ``state`` should next be polled, or None."""
+    interval = poll_intervals().get(state)
+    if interval is None:
+        return None
+    return now + timedelta(seconds=interval)
+
+
+class LivePollScheduler:
+    """Dispatch due matches to a scraper and reschedule them by state."""
+
+    def __init__(self, scraper, now=None, max_per_cycle=None):
+        self.scraper = scraper
+        self.now = now or timezone.now()
+        self.max_per_cycle = max_per_cycle or getattr(settings, 'CREX_POLL_MAX_PER_CYCLE', 100)
+        self.lookahead = timedelta(seconds=getattr(settings, 'CREX_POLL_LOOKAHEAD', 60 * 60))
+        self.give_up_after = timedelta(seconds=getattr(settings, 'CREX_POLL_GIVE_UP_AFTER', 12 * 60 * 60))
+        self.lease = timedelta(seconds=getattr(settings, 'CREX_POLL_LEASE', 5 * 60))
+
+    def ensure_schedules(self):
+        """Start schedules for matches that are about to begin or under way."""
+        unscheduled = Match.objects.filter(
+            match_date__lte=self.now + self.lookahead,
+            match_date__gte=self.now - self.give_up_after,
+            poll_schedule__isnull=True,
+        ).exclude(status='Completed')
+
+        created = PollSchedule.objects.bulk_create(
+            [PollSchedule(match_id=match_id, next_due=self.now) for match_id in unscheduled.values_list('id', flat=True)],
+            ignore_conflicts=True,
+        )
+        return len(created)
+
+    def due_queue(self):
+        """Return a heap of due schedules, earliest and liveliest first."""
+        due = PollSchedule.objects.filter(next_due__lte=self.now).select_related('match')
+        heap = [
+            (schedule.next_due, STATE_PRIORITY.get(schedule.state, len(STATE_PRIORITY)), schedule.match_id, schedule)
+            for schedule in due
+        ]
+        heapq.heapify(heap)
+        return heap
+
+    def claim_due(self):
+        """Pop this cycle's batch and lease it; returns (batch, the rest of the heap).
+
+        Until the cycle writes the real next_due, the batch is due again only
+        after CREX_POLL_LEASE, so a crashed cycle's matches are picked up later.
+        """
+        # IMMEDIATE transactions make the read and the lease one write, so cycles never share a match
+        with transaction.atomic():
+            heap = self.due_queue()
+            batch = [heapq.heappop(heap)[-1] for _ in range(min(self.max_per_cycle, len(heap)))]
+            PollSchedule.objects.filter(pk__in=[schedule.pk for schedule in batch]).update(
+                next_due=self.now + self.lease
+            )
+        return batch, heap
+
+    def run_cycle(self, tick_seconds=None):
+        """Poll every due match (up to max_per_cycle) and reschedule it.
+
+        Returns per-cycle stats, including the requests a fixed 5-minute
+        crontab would have made over ``tick_seconds`` for comparison.
+        """
+        self.ensure_schedules()
+        batch, heap = self.claim_due()
+
+        urls = {schedule.match_id: self.scraper.match_url(schedule.match_id) for schedule in batch}
+        self.scraper.load_fingerprints(urls.values())
+        results = self.scraper.scrape_many_match_details(urls.values())
+        # Queue every save first so the writer commits them together
+        saves = {}
+        for schedule in batch:
+            url = urls[schedule.match_id]
+            if results.get(url):
+                saves[schedule.match_id] = submit_write(self.scraper.save_match_details, schedule.match, url, results[url])
+
+        intervals = poll_intervals()
+        live_gaps = []
+        updated = 0
+        for schedule in batch:
+            match = schedule.match
+            url = urls[match.id]
+            details = results.get(url)
+            try:
+                if details:
+                    if saves[match.id].result():
+                        updated += 1
+                state = classify(match, details, previous=schedule.state)
+                if state != 'completed' and match.match_date < self.now - self.give_up_after:
+                    state = 'stopped'
+                if state == 'completed' and match.status != 'Completed':
+                    match.status = 'Completed'
+                    submit_write(match.save, update_fields=['status', 'updated_at']).result()
+                    invalidate_status_counts()
+                    bump_data_version()
+                    publish_live_update(match.id, match.status)
+            except Exception as e:
+                logger.error(f"Error updating polled match {match}: {e}")
+                state = schedule.state
+
+            if state == 'live' and schedule.last_polled:
+                live_gaps.append((self.now - schedule.last_polled).total_seconds())
+            schedule.state = state
+            schedule.last_polled = self.now
+            schedule.next_due = next_due(state, self.now)
+
+        with transaction.atomic():
+            PollSchedule.objects.bulk_update(batch, ['state', 'next_due', 'last_polled'])
+
+        tick_seconds = tick_seconds or getattr(settings, 'CREX_POLL_TICK', 15)
+        window_start, window_end = CRONTAB_WINDOW
+        crontab_matches = Match.objects.filter(
+            match_date__gte=self.now + window_start, match_date__lte=self.now + window_end
+        ).count()
+        crontab_requests = crontab_matches * tick_seconds / CRONTAB_INTERVAL
+
+        return {
+            'polled': len(batch),
+            'deferred': len(heap),
+            'updated': updated,
+            'crontab_requests': round(crontab_requests, 2),
+            'requests_saved': round(crontab_requests - len(batch), 2),
+            'live_update_interval': round(sum(live_gaps) / len(live_gaps), 1) if live_gaps else None,
+            'crontab_update_interval': CRONTAB_INTERVAL,
+            'live_interval_setting': intervals['live'],
+        }
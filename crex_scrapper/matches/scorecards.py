@@ -0,0 +1,145 @@
+"""
+Normalized storage of scraped match details.
+
+Each save compares the scraped rows with what is stored and writes only
+the rows that were added, changed or removed.
+"""
+
+from .events import save_live_events
+from .models import MatchInfo, SquadMember, Innings, BattingEntry, BowlingEntry
+
+BATTING_FIELDS = ['player', 'dismissal', 'runs', 'balls', 'fours', 'sixes']
+BOWLING_FIELDS = ['player', 'overs', 'maidens', 'runs', 'wickets']
+
+
+def sync_rows(model, existing, scraped, fields, build):
+    """Bring stored rows in line with scraped ones, touching only differences.
+
+    ``existing`` maps a natural key to a stored instance and ``scraped`` maps
+    the same keys to field values; ``build(key, values)`` makes a new
+    instance. Returns (rows written, rows left unchanged).
+    """
+    to_create, to_update = [], []
+    for key, values in scraped.items():
+        obj = existing.get(key)
+        if obj is None:
+            to_create.append(build(key, values))
+        elif any(getattr(obj, field) != values.get(field) for field in fields):
+            for field in fields:
+                setattr(obj, field, values.get(field))
+            to_update.append(obj)
+    stale = [obj.pk for key, obj in existing.items() if key not in scraped]
+
+    if stale:
+        model.objects.filter(pk__in=stale).delete()
+    if to_create:
+        model.objects.bulk_create(to_create)
+    if to_update:
+        model.objects.bulk_update(to_update, fields)
+
+    written = len(to_create) + len(to_update) + len(stale)
+    return written, len(scraped) - len(to_create) - len(to_update)
+
+
+def save_match_info(match, match_info):
+    """Store the info tab as label/value rows."""
+    existing = {item.label: item for item in MatchInfo.objects.filter(match=match)}
+    scraped = {
+        label: {'value': value, 'position': position}
+        for position, (label, value) in enumerate(match_info.items())
+    }
+    return sync_rows(
+        MatchInfo, existing, scraped, ['value', 'position'],
+        lambda label, values: MatchInfo(match=match, label=label, **values),
+    )
+
+
+def save_squads(match, squads):
+    """Store each team's squad in listed order."""
+    existing = {
+        (member.team_name, member.position): member
+        for member in SquadMember.objects.filter(match=match)
+    }
+    scraped = {
+        (team_name, position): {'player': player}
+        for team_name, players in squads.items()
+        for position, player in enumerate(players)
+    }
+    return sync_rows(
+        SquadMember, existing, scraped, ['player'],
+        lambda key, values: SquadMember(match=match, team_name=key[0], position=key[1], **values),
+    )
+
+
+def save_scorecard(match, scorecard):
+    """Store innings with their batting and bowling rows."""
+    numbers = {int(key.split('_')[-1]): data for key, data in scorecard.items()}
+
+    innings_by_number = {innings.number: innings for innings in Innings.objects.filter(match=match)}
+    missing = [Innings(match=match, number=number) for number in numbers if number not in innings_by_number]
+    if missing:
+        Innings.objects.bulk_create(missing)
+        innings_by_number = {innings.number: innings for innings in Innings.objects.filter(match=match)}
+
+    written, unchanged = 0, 0
+    for model, section, fields in [
+        (BattingEntry, 'batting', BATTING_FIELDS),
+        (BowlingEntry, 'bowling', BOWLING_FIELDS),
+    ]:
+        existing = {
+            (entry.innings.number, entry.position): entry
+            for entry in model.objects.filter(innings__match=match).select_related('innings')
+        }
+        scraped = {
+            (number, position): row
+            for number, data in numbers.items()
+            for position, row in enumerate(data.get(section, []))
+        }
+        counts = sync_rows(
+            model, existing, scraped, fields,
+            lambda key, values, model=model: model(
+                innings=innings_by_number[key[0]], position=key[1], **values
+            ),
+        )
+        written += counts[0]
+        unchanged += counts[1]
+
+    stale_innings = [innings.pk for number, innings in innings_by_number.items() if number not in numbers]
+    if stale_innings:
+        Innings.objects.filter(pk__in=stale_innings).delete()
+        written += len(stale_innings)
+
+    return written, unchanged
+
+
+# Section name -> writer, for the sections a match page is split into
+SECTION_WRITERS = {
+    'match_info': save_match_info,
+    'squads': save_squads,
+    'scorecard': save_scorecard,
+    'live': save_live_events,
+}
+
+
+def load_match_details(match):
+    """Rebuild the scraper's details dict for a match from stored rows."""
+    squads = {}
+    for member in match.squad_members.all():
+        squads.setdefault(member.team_name, []).append(member.player)
+
+    scorecard = {}
+    for innings in match.innings.prefetch_related('batting', 'bowling'):
+        innings_data = {}
+        batting = [{field: getattr(entry, field) for field in BATTING_FIELDS} for entry in innings.batting.all()]
+        bowling = [{field: getattr(entry, field) for field in BOWLING_FIELDS} for entry in innings.bowling.all()]
+        if batting:
+            innings_data['batting'] = batting
+        if bowling:
+            innings_data['bowling'] = bowling
+        scorecard[f'innings_{innings.number}'] = innings_data
+
+    return {
+        'match_info': {item.label: item.value for item in match.info_items.all()},
+        'squads': squads,
+        'scorecard': scorecard,
+    }
@@ -1,41 +1,215 @@
+import asyncio
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import logging
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils import timezone
 from django.db import IntegrityError, transaction
-from .models import Match, Team
+from .models import Match, Team, PageFingerprint
+from .fingerprints import content_hash, section_hashes
+from .http_cache import shared_cache, url_class
+from .http_pool import build_session, connection_stats
+from . import breaker
+from .metrics import HTTP_REQUEST_SECONDS, HTTP_RESPONSE_BYTES, HTTP_RETRIES, SAVE_ROWS, observe_save, timed_extractor
+from .scorecards import SECTION_WRITERS
+from .extraction import flush_metrics, select
+from .page_cache import bump_data_version
+from .stats import invalidate_status_counts
+from .live import publish_live_update
+from .writer import submit_write
 import re
 
 logger = logging.getLogger(__name__)
 
 
+# Classes of the div subtrees each page type's extractors read
+PAGE_SUBTREES = {
+    'match_list': ['match-item', 'fixture-item'],
+    'match': [
+        'match-info', 'info-section',       # scrape_match_info
+        'squad-section', 'team-squad',      # scrape_squads
+        'live-section', 'live-score',       # scrape_live_data
+        'innings', 'innings-section',       # scrape_scorecard
+    ],
+}
+
+
+class ParserEngine:
+    """Turns downloaded HTML into the BeautifulSoup tree the extractors read.
+
+    ``builder`` is the BeautifulSoup tree builder ('lxml' or 'html.parser').
+    With ``targeted`` set, a SoupStrainer builds only the subtrees listed in
+    PAGE_SUBTREES for the page type and the rest of the page is skipped.
+    """
+
+    def __init__(self, builder='lxml', targeted=True):
+        self.builder = builder
+        self.targeted = targeted
+        self.strainers = {
+            page_type: SoupStrainer('div', class_=classes)
+            for page_type, classes in PAGE_SUBTREES.items()
+        }
+
+    def parse(self, content, page_type=None):
+        """Parse a page; without a page type the whole document is built."""
+        if self.targeted and page_type in self.strainers:
+            return BeautifulSoup(content, self.builder, parse_only=self.strainers[page_type])
+        return BeautifulSoup(content, self.builder)
+
+
+PARSER_ENGINES = {
+    'html.parser': ParserEngine('html.parser', targeted=False),
+    'html.parser-targeted': ParserEngine('html.parser', targeted=True),
+    'lxml': ParserEngine('lxml', targeted=False),
+    'lxml-targeted': ParserEngine('lxml', targeted=True),
+}
+
+
+def get_parser_engine(name=None):
+    """Return a parser engine by name, defaulting to CREX_PARSER_ENGINE."""
+    name = name or getattr(settings, 'CREX_PARSER_ENGINE', 'lxml-targeted')
+    try:
+        return PARSER_ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown parser engine: {name}")
+
+
 class CREXScraper:
     """Main scraper class for CREX cricket data."""
     
-    def __init__(self):
-        self.base_url = "https://crex.com"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-
-    def get_page(self, url, retries=3):
-        """Get page content with retry logic."""
+    def __init__(self, base_url=None, timeout=None, cache=None, parser=None, session=None, retries=None):
+        self.base_url = base_url or getattr(settings, 'CREX_BASE_URL', "https://crex.com")
+        self.timeout = timeout or getattr(settings, 'CREX_REQUEST_TIMEOUT', 30)
+        self.connect_timeout = min(getattr(settings, 'CREX_REQUEST_CONNECT_TIMEOUT', 5), self.timeout)
+        # Attempts per page in this process; tasks use 1 and retry through Celery instead
+        self.retries = retries or 3
+        self.last_fetch_error = None
+        self.parser = get_parser_engine(parser)
+        # None uses this process's cache configured in settings, False disables caching
+        self.cache = shared_cache() if cache is None else (cache or None)
+        # url -> hashes of the last parsed copy, see load_fingerprints()
+        self.page_hashes = {}
+        self.section_hashes = {}
+        self.fingerprint_stats = Counter()
+        self.write_stats = Counter()
+        # Tasks pass their worker's shared session (see matches.http_pool)
+        self.session = session or build_session()
+
+    def get_page(self, url, retries=None):
+        """Get page content with retry logic.
+
+        The last error is kept in ``last_fetch_error`` for callers that
+        swallow it. An open circuit fails at once, without retrying.
+        """
+        retries = retries or self.retries
         for attempt in range(retries):
             try:
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                return response
+                return self.fetch_once(url)
             except requests.exceptions.RequestException as e:
+                self.last_fetch_error = e
                 logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < retries - 1:
-                    time.sleep(2 ** attempt)
+                if attempt < retries - 1 and not isinstance(e, breaker.CircuitOpen):
+                    HTTP_RETRIES.labels(url_class(url)).inc()
+                    time.sleep(max(2 ** attempt, breaker.retry_after(e)))
                 else:
-                    logger.error(f"Failed to get page after {retries} attempts: {url}")
+                    logger.error(f"Failed to get page after {attempt + 1} attempts: {url}")
                     raise
 
+    def fetch_once(self, url):
+        """Make a single request for a page through the response cache.
+
+        A fresh cached copy is returned without a request; a stale one is
+        revalidated and reused when the server answers 304 Not Modified.
+        """
+        kind = url_class(url)
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            entry = self.cache.get(url) if self.cache else None
+            if entry and self.cache.is_fresh(entry):
+                status = 'cache_hit'
+                self.cache.record('hits', len(entry.body))
+                HTTP_RESPONSE_BYTES.labels(kind, 'cache').inc(len(entry.body))
+                return entry.to_response()
+
+            headers = entry.conditional_headers() if entry else {}
+            breaker.before_request(url)
+            try:
+                response = self.session.get(url, timeout=(self.connect_timeout, self.timeout), headers=headers)
+            except requests.exceptions.RequestException:
+                breaker.record_failure(url)
+                raise
+            status = str(response.status_code)
+            if response.status_code in breaker.FAILURE_STATUSES:
+                breaker.record_failure(url)
+            else:
+                breaker.record_success(url)
+
+            if entry and response.status_code == 304:
+                self.cache.refresh(entry, response)
+                self.cache.record('not_modified', len(entry.body))
+                HTTP_RESPONSE_BYTES.labels(kind, 'cache').inc(len(entry.body))
+                return entry.to_response()
+
+            response.raise_for_status()
+            HTTP_RESPONSE_BYTES.labels(kind, 'network').inc(len(response.content))
+            if self.cache:
+                self.cache.store(url, response)
+                self.cache.record('misses')
+            return response
+        finally:
+            HTTP_REQUEST_SECONDS.labels(kind, status).observe(time.perf_counter() - start)
+
+    def load_fingerprints(self, urls):
+        """Load the stored hashes for pages about to be polled."""
+        fingerprints = PageFingerprint.objects.filter(url__in=list(urls))
+        for url, page_hash, sections in fingerprints.values_list('url', 'content_hash', 'section_hashes'):
+            self.page_hashes[url] = page_hash
+            self.section_hashes[url] = sections
+
+    def page_changed(self, url, content):
+        """Return False when a page is byte-identical to the last one parsed."""
+        page_hash = content_hash(content)
+        if self.page_hashes.get(url) == page_hash:
+            self.fingerprint_stats['pages_skipped'] += 1
+            return False
+        self.page_hashes[url] = page_hash
+        self.fingerprint_stats['pages_parsed'] += 1
+        return True
+
+    def save_fingerprint(self, url, match=None, sections=None):
+        """Persist the hashes of a page once its data has been saved."""
+        if sections is not None:
+            self.section_hashes[url] = sections
+        PageFingerprint.objects.update_or_create(
+            url=url,
+            defaults={
+                'match': match,
+                'content_hash': self.page_hashes[url],
+                'section_hashes': self.section_hashes.get(url, {}),
+            }
+        )
+
+    def cache_stats(self):
+        """Return the response cache counters, or {} when caching is off.
+
+        The shared cache counts every scraper in this process.
+        """
+        return self.cache.summary() if self.cache else {}
+
+    def connection_stats(self):
+        """Return how many requests reused a pooled connection, over the session's lifetime."""
+        return connection_stats(self.session)
+
+    def match_url(self, match_id):
+        """Build the detail page URL for a match."""
+        # Adjust based on actual URL structure
+        return f"{self.base_url}/match/{match_id}"
+
     def parse_match_date(self, date_str, time_str):
         """Parse match date and time from scraped strings."""
         try:
@@ -78,28 +252,21 @@ class CREXScraper:
         logger.info("Starting to scrape match list")
         
         try:
-            response = self.get_page(f"{self.base_url}/fixtures/match-list")
-            soup = BeautifulSoup(response.content, 'html.parser')
+            list_url = f"{self.base_url}/fixtures/match-list"
+            self.load_fingerprints([list_url])
+            response = self.get_page(list_url)
+            if not self.page_changed(list_url, response.content):
+                logger.info("Match list unchanged since last scrape, skipping parse")
+                return 0
             
-            matches_scraped = 0
+            rows = self.extract_match_rows(response.content)
             
-            # Look for match containers (adjust selectors based on actual HTML structure)
-            match_containers = soup.find_all('div', class_=['match-item', 'fixture-item'])
-            
-            if not match_containers:
-                # Fallback: look for any div that might contain match info
-                match_containers = soup.find_all('div', string=re.compile(r'vs|V/s', re.IGNORECASE))
-                
-            for container in match_containers:
-                try:
-                    match_data = self.extract_match_data(container)
-                    if match_data:
-                        self.save_match_data(match_data)
-                        matches_scraped += 1
-                except Exception as e:
-                    logger.error(f"Error processing match container: {e}")
-                    continue
+            matches_scraped = len(self.save_match_batch(rows))
+            if rows and not matches_scraped:
+                # Keep the old fingerprint so the next run retries the save
+                return 0
             
+            self.save_fingerprint(list_url)
             logger.info(f"Scraped {matches_scraped} matches from match list")
             return matches_scraped
             
@@ -107,38 +274,49 @@ class CREXScraper:
             logger.error(f"Error scraping match list: {e}")
             return 0
 
+    @timed_extractor
+    def extract_match_rows(self, content):
+        """Extract match data for every fixture on a match list page."""
+        soup = self.parser.parse(content, 'match_list')
+        
+        rows = []
+        
+        # Match containers; the text fallback needs the whole document
+        match_containers = select('match_list', 'containers', soup, document=lambda: self.parser.parse(content))
+            
+        for container in match_containers:
+            try:
+                match_data = self.extract_match_data(container)
+                if match_data:
+                    rows.append(match_data)
+            except Exception as e:
+                logger.error(f"Error processing match container: {e}")
+                continue
+        
+        flush_metrics()
+        return rows
+
+    @timed_extractor
     def extract_match_data(self, container):
         """Extract match data from a container element."""
         try:
-            # Extract team names (adjust selectors based on actual HTML)
-            team_elements = container.find_all('span', class_=['team-name', 'team'])
-            
-            if len(team_elements) < 2:
-                # Fallback: look for text patterns
-                text = container.get_text()
-                vs_match = re.search(r'([A-Za-z\s]+)\s+vs\s+([A-Za-z\s]+)', text, re.IGNORECASE)
-                if vs_match:
-                    home_team = vs_match.group(1).strip()
-                    away_team = vs_match.group(2).strip()
-                else:
-                    return None
-            else:
-                home_team = team_elements[0].get_text().strip()
-                away_team = team_elements[1].get_text().strip()
+            # Team names, from their spans or the "A vs B" text
+            teams = select('fixture', 'teams', container)
+            if len(teams) < 2:
+                return None
+            home_team, away_team = teams[0], teams[1]
             
             # Extract date and time
-            date_element = container.find('span', class_=['match-date', 'date'])
-            time_element = container.find('span', class_=['match-time', 'time'])
-            
-            date_str = date_element.get_text().strip() if date_element else ""
-            time_str = time_element.get_text().strip() if time_element else ""
+            date_str = select('fixture', 'date', container) or ""
+            time_str = select('fixture', 'time', container) or ""
             
             # Extract location
-            location_element = container.find('span', class_=['location', 'venue'])
-            location = location_element.get_text().strip() if location_element else "TBD"
+            location = select('fixture', 'location', container)
+            if location is None:
+                location = "TBD"
             
             # Extract match URL for detailed scraping
-            match_link = container.find('a', href=True)
+            match_link = select('fixture', 'link', container)
             match_url = match_link['href'] if match_link else ""
             
             if match_url and not match_url.startswith('http'):
@@ -159,77 +337,221 @@ class CREXScraper:
 
     def save_match_data(self, match_data):
         """Save match data to database."""
+        saved = self.save_match_batch([match_data])
+        return saved[0] if saved else None
+
+    def save_match_batch(self, rows, batch_size=500):
+        """Save many extracted matches in one batched pass.
+
+        Teams are resolved in bulk and matches are upserted on their natural
+        key (home team, away team, match date). Existing matches only get
+        their location refreshed; their status is owned by the live checks.
+        Returns the saved Match objects.
+        """
+        if not rows:
+            return []
+
         try:
-            with transaction.atomic():
-                # Get or create teams
-                home_team, _ = Team.objects.get_or_create(name=match_data['home_team'])
-                away_team, _ = Team.objects.get_or_create(name=match_data['away_team'])
-                
-                # Create or update match
-                match, created = Match.objects.get_or_create(
-                    home_team=home_team,
-                    away_team=away_team,
-                    match_date=match_data['match_date'],
-                    defaults={
-                        'location': match_data['location'],
-                        'status': match_data['status']
-                    }
-                )
-                
-                if created:
-                    logger.info(f"Created new match: {match}")
-                else:
-                    logger.info(f"Updated existing match: {match}")
-                
-                return match
+            saved = submit_write(self.write_match_batch, rows, batch_size).result()
+            SAVE_ROWS.labels('save_match_batch').inc(len(saved))
+            logger.info(f"Saved {len(saved)} matches in one batch")
+            return saved
                 
         except Exception as e:
             logger.error(f"Error saving match data: {e}")
-            return None
+            return []
+
+    def write_match_batch(self, rows, batch_size=500):
+        """Upsert extracted matches in one transaction; save_match_batch queues this."""
+        with observe_save('save_match_batch'), transaction.atomic():
+            team_ids = self.resolve_teams(
+                {row['home_team'] for row in rows} | {row['away_team'] for row in rows}
+            )
+            
+            # Later rows for the same fixture win
+            matches = {}
+            for row in rows:
+                home_id = team_ids[row['home_team']]
+                away_id = team_ids[row['away_team']]
+                matches[(home_id, away_id, row['match_date'])] = Match(
+                    home_team_id=home_id,
+                    away_team_id=away_id,
+                    match_date=row['match_date'],
+                    location=row['location'],
+                    status=row['status'],
+                )
+            
+            # Fixtures whose location is unchanged are not written, so their
+            # updated_at (and incremental exports) only move on real changes
+            unchanged = []
+            stored = self.stored_locations(matches.keys(), batch_size)
+            for key, match in list(matches.items()):
+                if key in stored and stored[key][1] == match.location:
+                    match.pk = stored[key][0]
+                    unchanged.append(matches.pop(key))
+            
+            saved = Match.objects.bulk_create(
+                list(matches.values()),
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['home_team', 'away_team', 'match_date'],
+                update_fields=['location', 'updated_at'],
+            )
+            # Readers must not re-cache the old counts and pages before the commit
+            transaction.on_commit(invalidate_status_counts)
+            transaction.on_commit(bump_data_version)
+        return saved + unchanged
+
+    def stored_locations(self, keys, batch_size=500):
+        """Map (home id, away id, match_date) keys of stored matches to (id, location)."""
+        keys = list(keys)
+        stored = {}
+        for i in range(0, len(keys), batch_size):
+            chunk = keys[i:i + batch_size]
+            rows = Match.objects.filter(
+                match_date__in={key[2] for key in chunk}, home_team_id__in={key[0] for key in chunk},
+            ).values_list('home_team_id', 'away_team_id', 'match_date', 'id', 'location')
+            for home_id, away_id, match_date, pk, location in rows:
+                stored[home_id, away_id, match_date] = (pk, location)
+        return stored
+
+    def resolve_teams(self, names, batch_size=500):
+        """Map team names to ids, creating any teams not stored yet."""
+        names = list(names)
+        team_ids = {}
+        for i in range(0, len(names), batch_size):
+            chunk = names[i:i + batch_size]
+            team_ids.update(Team.objects.filter(name__in=chunk).values_list('name', 'id'))
+        
+        missing = [name for name in names if name not in team_ids]
+        if missing:
+            Team.objects.bulk_create(
+                [Team(name=name) for name in missing], batch_size=batch_size, ignore_conflicts=True
+            )
+            for i in range(0, len(missing), batch_size):
+                chunk = missing[i:i + batch_size]
+                team_ids.update(Team.objects.filter(name__in=chunk).values_list('name', 'id'))
+        
+        return team_ids
 
     def scrape_match_details(self, match_url):
-        """Scrape detailed match information."""
+        """Scrape detailed match information.
+
+        Returns None when the page is unchanged since it was last parsed
+        and {} when it could not be scraped.
+        """
         logger.info(f"Scraping match details from: {match_url}")
         
         try:
             response = self.get_page(match_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            details = {}
-            
-            # Scrape Match Info tab
-            details['match_info'] = self.scrape_match_info(soup)
-            
-            # Scrape Squads tab
-            details['squads'] = self.scrape_squads(soup)
-            
-            # Scrape Live tab (if match is live)
-            details['live'] = self.scrape_live_data(soup)
-            
-            # Scrape Scorecard tab
-            details['scorecard'] = self.scrape_scorecard(soup)
-            
-            return details
+            return self.parse_match_page(match_url, response.content)
             
         except Exception as e:
             logger.error(f"Error scraping match details: {e}")
             return {}
 
+    def scrape_many_match_details(self, match_urls):
+        """Scrape several match pages, returning a dict of url -> details."""
+        return {url: self.scrape_match_details(url) for url in match_urls}
+
+    def parse_match_page(self, match_url, content):
+        """Parse a match page unless it is unchanged since the last poll."""
+        if not self.page_changed(match_url, content):
+            return None
+        return self.parse_match_details(content)
+
+    def save_match_details(self, match, match_url, details):
+        """Save the sections of a match page that changed since the last poll.
+
+        Returns the names of the changed sections. An empty section means
+        its extractor found nothing, so the stored rows and hash are kept.
+        """
+        old_hashes = self.section_hashes.get(match_url, {})
+        new_hashes = {
+            **old_hashes,
+            **{name: digest for name, digest in section_hashes(details).items() if details[name]},
+        }
+        changed = [name for name, digest in new_hashes.items() if old_hashes.get(name) != digest]
+        self.fingerprint_stats['sections_changed'] += len(changed)
+        self.fingerprint_stats['sections_skipped'] += len(new_hashes) - len(changed)
+
+        with observe_save('save_match_details'), transaction.atomic():
+            # Update match status based on scraped data
+            status_changed = False
+            if 'live' in changed and details.get('live') and match.status != 'Live':
+                match.status = 'Live'
+                status_changed = True
+                transaction.on_commit(invalidate_status_counts)
+            
+            # Only changed rows of changed sections are written
+            rows_written = 0
+            for name in changed:
+                writer = SECTION_WRITERS.get(name)
+                if writer:
+                    written, unchanged = writer(match, details[name])
+                    self.write_stats['rows_written'] += written
+                    self.write_stats['rows_unchanged'] += unchanged
+                    rows_written += written
+            
+            SAVE_ROWS.labels('save_match_details').inc(rows_written)
+            
+            # Bump updated_at so incremental exports pick the match up
+            if status_changed or rows_written:
+                match.save(update_fields=['status', 'updated_at'])
+                transaction.on_commit(bump_data_version)
+            
+            self.save_fingerprint(match_url, match, new_hashes)
+            
+            if 'live' in changed:
+                transaction.on_commit(
+                    lambda: publish_live_update(match.id, match.status, details.get('live'))
+                )
+        
+        return changed
+
+    def fingerprint_summary(self):
+        """Describe how much parse and save work fingerprints skipped."""
+        stats = self.fingerprint_stats
+        return (f"{stats['pages_skipped']} unchanged pages and "
+                f"{stats['sections_skipped']} unchanged sections skipped")
+
+    @timed_extractor
+    def parse_match_details(self, content):
+        """Parse a downloaded match page into its detail sections."""
+        soup = self.parser.parse(content, 'match')
+        
+        details = {}
+        
+        # Scrape Match Info tab
+        details['match_info'] = self.scrape_match_info(soup)
+        
+        # Scrape Squads tab
+        details['squads'] = self.scrape_squads(soup)
+        
+        # Scrape Live tab (if match is live)
+        details['live'] = self.scrape_live_data(soup)
+        
+        # Scrape Scorecard tab
+        details['scorecard'] = self.scrape_scorecard(soup)
+        
+        flush_metrics()
+        return details
+
+    @timed_extractor
     def scrape_match_info(self, soup):
         """Scrape match information."""
         try:
             match_info = {}
             
             # Extract various match details
-            info_section = soup.find('div', class_=['match-info', 'info-section'])
+            info_section = select('match', 'info_section', soup)
             if info_section:
                 # Extract toss, weather, etc.
-                info_items = info_section.find_all('div', class_='info-item')
-                for item in info_items:
-                    label = item.find('span', class_='label')
-                    value = item.find('span', class_='value')
-                    if label and value:
-                        match_info[label.get_text().strip()] = value.get_text().strip()
+                for item in select('match', 'info_items', info_section):
+                    label = select('match', 'info_label', item)
+                    value = select('match', 'info_value', item)
+                    if label is not None and value is not None:
+                        match_info[label] = value
             
             return match_info
             
@@ -237,23 +559,16 @@ class CREXScraper:
             logger.error(f"Error scraping match info: {e}")
             return {}
 
+    @timed_extractor
     def scrape_squads(self, soup):
         """Scrape team squads."""
         try:
             squads = {}
             
-            squad_sections = soup.find_all('div', class_=['squad-section', 'team-squad'])
-            for section in squad_sections:
-                team_name = section.find('h3', class_='team-name')
-                if team_name:
-                    team = team_name.get_text().strip()
-                    players = []
-                    
-                    player_elements = section.find_all('div', class_=['player', 'player-name'])
-                    for player in player_elements:
-                        players.append(player.get_text().strip())
-                    
-                    squads[team] = players
+            for section in select('match', 'squad_sections', soup):
+                team = select('match', 'squad_team', section)
+                if team is not None:
+                    squads[team] = select('match', 'squad_players', section)
             
             return squads
             
@@ -261,26 +576,26 @@ class CREXScraper:
             logger.error(f"Error scraping squads: {e}")
             return {}
 
+    @timed_extractor
     def scrape_live_data(self, soup):
         """Scrape live match data."""
         try:
             live_data = {}
             
             # Extract live scores, overs, etc.
-            live_section = soup.find('div', class_=['live-section', 'live-score'])
+            live_section = select('match', 'live_section', soup)
             if live_section:
                 # Current score
-                score_elements = live_section.find_all('div', class_='score')
-                for score in score_elements:
-                    team = score.find('span', class_='team')
-                    runs = score.find('span', class_='runs')
-                    if team and runs:
-                        live_data[team.get_text().strip()] = runs.get_text().strip()
+                for score in select('match', 'live_scores', live_section):
+                    team = select('match', 'score_team', score)
+                    runs = select('match', 'score_runs', score)
+                    if team is not None and runs is not None:
+                        live_data[team] = runs
                 
                 # Current over
-                over_element = live_section.find('div', class_='current-over')
-                if over_element:
-                    live_data['current_over'] = over_element.get_text().strip()
+                current_over = select('match', 'current_over', live_section)
+                if current_over is not None:
+                    live_data['current_over'] = current_over
             
             return live_data
             
@@ -288,51 +603,52 @@ class CREXScraper:
             logger.error(f"Error scraping live data: {e}")
             return {}
 
+    @timed_extractor
     def scrape_scorecard(self, soup):
         """Scrape match scorecard."""
         try:
             scorecard = {}
             
             # Extract innings data
-            innings_sections = soup.find_all('div', class_=['innings', 'innings-section'])
+            innings_sections = select('match', 'innings', soup)
             for i, innings in enumerate(innings_sections):
                 innings_data = {}
                 
                 # Batting scorecard
-                batting_table = innings.find('table', class_=['batting-table', 'scorecard-table'])
+                batting_table = select('match', 'batting_table', innings)
                 if batting_table:
                     batting_data = []
-                    rows = batting_table.find_all('tr')[1:]  # Skip header
+                    rows = select('match', 'table_rows', batting_table)[1:]  # Skip header
                     
                     for row in rows:
-                        cols = row.find_all('td')
+                        cols = select('match', 'cells', row)
                         if len(cols) >= 4:
                             batting_data.append({
-                                'player': cols[0].get_text().strip(),
-                                'dismissal': cols[1].get_text().strip(),
-                                'runs': cols[2].get_text().strip(),
-                                'balls': cols[3].get_text().strip(),
-                                'fours': cols[4].get_text().strip() if len(cols) > 4 else '0',
-                                'sixes': cols[5].get_text().strip() if len(cols) > 5 else '0'
+                                'player': cols[0],
+                                'dismissal': cols[1],
+                                'runs': cols[2],
+                                'balls': cols[3],
+                                'fours': cols[4] if len(cols) > 4 else '0',
+                                'sixes': cols[5] if len(cols) > 5 else '0'
                             })
                     
                     innings_data['batting'] = batting_data
                 
                 # Bowling scorecard
-                bowling_table = innings.find('table', class_=['bowling-table', 'bowling-scorecard'])
+                bowling_table = select('match', 'bowling_table', innings)
                 if bowling_table:
                     bowling_data = []
-                    rows = bowling_table.find_all('tr')[1:]  # Skip header
+                    rows = select('match', 'table_rows', bowling_table)[1:]  # Skip header
                     
                     for row in rows:
-                        cols = row.find_all('td')
+                        cols = select('match', 'cells', row)
                         if len(cols) >= 4:
                             bowling_data.append({
-                                'player': cols[0].get_text().strip(),
-                                'overs': cols[1].get_text().strip(),
-                                'maidens': cols[2].get_text().strip(),
-                                'runs': cols[3].get_text().strip(),
-                                'wickets': cols[4].get_text().strip() if len(cols) > 4 else '0'
+                                'player': cols[0],
+                                'overs': cols[1],
+                                'maidens': cols[2],
+                                'runs': cols[3],
+                                'wickets': cols[4] if len(cols) > 4 else '0'
                             })
                     
                     innings_data['bowling'] = bowling_data
@@ -352,35 +668,113 @@ class CREXScraper:
         try:
             # Get matches that should be live or starting soon
             now = timezone.now()
-            recent_matches = Match.objects.filter(
+            recent_matches = list(Match.objects.filter(
                 match_date__lte=now + timedelta(hours=1),
                 match_date__gte=now - timedelta(hours=6)
-            )
+            ))
             
             live_matches_updated = 0
             
-            for match in recent_matches:
-                # In a real implementation, you'd have the match URL stored
-                # For now, we'll construct a URL pattern
-                match_url = f"{self.base_url}/match/{match.id}"  # Adjust based on actual URL structure
-                
+            # In a real implementation, you'd have the match URL stored
+            # For now, we'll construct a URL pattern
+            match_urls = {match: self.match_url(match.id) for match in recent_matches}
+            self.load_fingerprints(match_urls.values())
+            all_details = self.scrape_many_match_details(match_urls.values())
+            
+            # Queue every save first so the writer commits them together
+            saves = {
+                match: submit_write(self.save_match_details, match, match_url, all_details[match_url])
+                for match, match_url in match_urls.items() if all_details.get(match_url)
+            }
+            
+            for match, save in saves.items():
                 try:
-                    details = self.scrape_match_details(match_url)
-                    if details:
-                        # Update match status based on scraped data
-                        if details.get('live'):
-                            match.status = 'Live'
-                            match.save()
-                            live_matches_updated += 1
-                            logger.info(f"Updated live match: {match}")
-                            
+                    changed = save.result()
+                    if 'live' in changed and all_details[match_urls[match]].get('live'):
+                        live_matches_updated += 1
+                        logger.info(f"Updated live match: {match}")
+                        
                 except Exception as e:
                     logger.error(f"Error updating live match {match}: {e}")
                     continue
             
-            logger.info(f"Updated {live_matches_updated} live matches")
+            logger.info(f"Updated {live_matches_updated} live matches, {self.fingerprint_summary()}")
             return live_matches_updated
             
         except Exception as e:
             logger.error(f"Error checking live matches: {e}")
-            return 0
\ No newline at end of file
+            return 0
+
+
+class AsyncCREXScraper(CREXScraper):
+    """Scraper that downloads many pages at once on an asyncio event loop.
+
+    ``requests`` is blocking, so each download runs on a thread of a pool
+    sized to ``concurrency`` while the event loop schedules them and parses
+    every page as soon as it arrives.
+    """
+
+    def __init__(self, base_url=None, timeout=None, cache=None, parser=None, concurrency=None, session=None,
+                 retries=None):
+        self.concurrency = concurrency or getattr(settings, 'CREX_FETCH_CONCURRENCY', 20)
+        # Keep one pooled connection per concurrent download
+        super().__init__(base_url=base_url, timeout=timeout, cache=cache, parser=parser,
+                         session=session or build_session(self.concurrency), retries=retries)
+
+    async def fetch(self, url, executor, retries=None):
+        """Get page content without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        retries = retries or self.retries
+        for attempt in range(retries):
+            try:
+                return await loop.run_in_executor(executor, self.fetch_once, url)
+            except requests.exceptions.RequestException as e:
+                self.last_fetch_error = e
+                logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+                if attempt < retries - 1 and not isinstance(e, breaker.CircuitOpen):
+                    HTTP_RETRIES.labels(url_class(url)).inc()
+                    await asyncio.sleep(max(2 ** attempt, breaker.retry_after(e)))
+                else:
+                    logger.error(f"Failed to get page after {attempt + 1} attempts: {url}")
+                    raise
+
+    async def fetch_many(self, urls):
+        """Yield (url, response) pairs in completion order.
+
+        At most ``concurrency`` downloads are in flight at once. The response
+        is None for URLs that still failed after all retries.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            async def bounded_fetch(url):
+                async with semaphore:
+                    try:
+                        return url, await self.fetch(url, executor)
+                    except requests.exceptions.RequestException:
+                        return url, None
+
+            for next_done in asyncio.as_completed([bounded_fetch(url) for url in urls]):
+                yield await next_done
+
+    async def scrape_many_match_details_async(self, match_urls):
+        """Download match pages concurrently, parsing each one as it arrives."""
+        results = {}
+        async for url, response in self.fetch_many(match_urls):
+            if response is None:
+                results[url] = {}
+                continue
+            try:
+                results[url] = self.parse_match_page(url, response.content)
+            except Exception as e:
+                logger.error(f"Error parsing match details from {url}: {e}")
+                results[url] = {}
+        return results
+
+    def scrape_many_match_details(self, match_urls):
+        """Scrape several match pages concurrently, returning url -> details."""
+        match_urls = list(dict.fromkeys(match_urls))
+        if not match_urls:
+            return {}
+        logger.info(f"Scraping {len(match_urls)} match pages with concurrency {self.concurrency}")
+        return asyncio.run(self.scrape_many_match_details_async(match_urls))
@@ -0,0 +1,136 @@
+"""
+Indexed team and venue search for the match list.
+
+Migration 0009 adds SQLite FTS5 indexes with the trigram tokenizer over
+team names (matches_team_search) and over the distinct match locations,
+which triggers collect into matches_venue (matches_venue_search). Triggers
+keep both in step with every write, including bulk upserts and raw SQL,
+and drop a venue once its last match is deleted or moved elsewhere.
+A search first finds the teams or venues whose name contains the text,
+then the matches through the team and location indexes, rather than a
+leading-wildcard LIKE over every match. Trigrams answer the same
+case-insensitive substring searches as icontains for terms of three
+characters or more; shorter terms scan the small name tables instead, and
+other databases fall back to icontains on the matches.
+
+search_matches() looks the teams and venues up once, then counts the hits
+through these indexes. When they are a large share of all matches it
+returns a queryset that instead walks the match_date index and tests each
+row, which reaches the newest page without sorting every hit.
+"""
+
+from django.db import connection
+from django.db.models import Func, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Team
+from .stats import get_status_counts
+
+TEAM_INDEX = 'matches_team_search'
+VENUE_TABLE = 'matches_venue'
+VENUE_INDEX = 'matches_venue_search'
+
+# Trigrams need at least three characters to match anything
+MIN_INDEXED_LENGTH = 3
+
+# Share of all matches above which a search walks the match_date index
+WALK_FRACTION = 0.01
+
+
+class Unindexed(Func):
+    """``+column``: SQLite will not use an index on the wrapped column."""
+    template = '+%(expressions)s'
+
+
+def uses_index(text):
+    return connection.vendor == 'sqlite' and len(text) >= MIN_INDEXED_LENGTH
+
+
+def fts_phrase(text):
+    """Quote search text as one FTS5 phrase, so its punctuation is not query syntax."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def team_ids(text):
+    """Ids of the teams whose name contains ``text``, ignoring case."""
+    if not uses_index(text):
+        return list(Team.objects.filter(name__icontains=text).values_list('id', flat=True))
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT rowid FROM {TEAM_INDEX} WHERE {TEAM_INDEX} MATCH %s", [fts_phrase(text)])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_team(matches, text, walk=False):
+    """Matches where either team's name contains ``text``.
+
+    Team names are searched first, so the matches themselves are found
+    through the home and away team indexes rather than a join and a
+    leading-wildcard LIKE over every row. With ``walk`` those indexes are
+    left unused and the team ids are tested row by row.
+    """
+    return with_teams(matches, team_ids(text), walk)
+
+
+def with_teams(matches, ids, walk=False):
+    """Matches where either team is one of ``ids``."""
+    if walk:
+        matches = matches.alias(search_home=Unindexed('home_team_id'), search_away=Unindexed('away_team_id'))
+        return matches.filter(Q(search_home__in=ids) | Q(search_away__in=ids))
+    return matches.filter(Q(home_team_id__in=ids) | Q(away_team_id__in=ids))
+
+
+def venue_names(text):
+    """Distinct match locations containing ``text``, ignoring case."""
+    with connection.cursor() as cursor:
+        if uses_index(text):
+            cursor.execute(f"SELECT name FROM {VENUE_TABLE} WHERE id IN "
+                           f"(SELECT rowid FROM {VENUE_INDEX} WHERE {VENUE_INDEX} MATCH %s)", [fts_phrase(text)])
+        else:
+            cursor.execute(f"SELECT name FROM {VENUE_TABLE} WHERE name LIKE %s ESCAPE '\\'",
+                           ['%' + connection.ops.prep_for_like_query(text) + '%'])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_venue(matches, text, walk=False):
+    """Matches whose location contains ``text``, ignoring case."""
+    if connection.vendor != 'sqlite':
+        return matches.filter(location__icontains=text)
+    return with_venues(matches, venue_names(text), walk)
+
+
+def with_venues(matches, names, walk=False):
+    """Matches at one of the venues ``names``."""
+    if walk:
+        return matches.alias(search_location=Unindexed('location')).filter(search_location__in=names)
+    return matches.filter(location__in=names)
+
+
+def search_matches(matches, team='', venue=''):
+    """Filter date-ordered matches by team and venue text; returns (matches, count)."""
+    # Resolved once for both the count and the page
+    ids = team_ids(team) if team else None
+    names = venue_names(venue) if venue and connection.vendor == 'sqlite' else None
+
+    def apply(walk):
+        searched = matches
+        if team:
+            searched = with_teams(searched, ids, walk)
+        if names is not None:
+            searched = with_venues(searched, names, walk)
+        elif venue:
+            searched = searched.filter(location__icontains=venue)
+        return searched
+
+    count = apply(walk=False).count()
+    walk = count > get_status_counts()['total_matches'] * WALK_FRACTION
+    return apply(walk), count
+
+
+def rebuild_search_index():
+    """Rebuild both indexes from their tables, e.g. after writes with triggers disabled."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {VENUE_TABLE} WHERE name NOT IN (SELECT location FROM matches_match)")
+        cursor.execute(f"INSERT INTO {VENUE_TABLE} (name) SELECT DISTINCT location FROM matches_match "
+                       f"WHERE location NOT IN (SELECT name FROM {VENUE_TABLE})")
+        for index in (TEAM_INDEX, VENUE_INDEX):
+            cursor.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild')")
@@ -0,0 +1,50 @@
+"""
+Cached match aggregates for the dashboard.
+
+Counts are computed with one grouped aggregation query and kept in the
+configured Django cache. Every path that adds matches, changes a status or
+deletes matches calls invalidate_status_counts(), so the dashboard reads a
+cached value until the data actually changes.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Match
+
+STATUS_COUNTS_KEY = 'matches:status_counts'
+
+# Dashboard counter name -> status value
+COUNTED_STATUSES = {
+    'live_matches': 'Live',
+    'scheduled_matches': 'Scheduled',
+    'completed_matches': 'Completed',
+}
+
+
+def compute_status_counts():
+    """Count all matches and each dashboard status in a single query.
+
+    GROUP BY status is answered from the (status, match_date) index, where
+    a COUNT(... FILTER ...) per status would scan the whole table.
+    """
+    by_status = dict(Match.objects.order_by().values_list('status').annotate(n=Count('id')))
+    counts = {name: by_status.get(status, 0) for name, status in COUNTED_STATUSES.items()}
+    counts['total_matches'] = sum(by_status.values())
+    return counts
+
+
+def get_status_counts():
+    """Return the cached status counts, computing them on a miss."""
+    counts = cache.get(STATUS_COUNTS_KEY)
+    if counts is None:
+        counts = compute_status_counts()
+        # The timeout only guards against writes that bypass invalidation
+        cache.set(STATUS_COUNTS_KEY, counts, getattr(settings, 'CREX_STATS_CACHE_TIMEOUT', 10 * 60))
+    return counts
+
+
+def invalidate_status_counts():
+    """Drop the cached counts after matches are added, changed or deleted."""
+    cache.delete(STATUS_COUNTS_KEY)
@@ -3,26 +3,60 @@ Celery tasks for the matches app.
 """
 
 from celery import shared_task
+from celery.exceptions import Retry
+from django.conf import settings
 from django.utils import timezone
-from .scraper import CREXScraper
+from .scraper import CREXScraper, AsyncCREXScraper
+from .pipeline import PipelinedCREXScraper
 from .models import Match
+from .scheduler import LivePollScheduler
+from .page_cache import bump_data_version
+from .stats import invalidate_status_counts
+from .coalesce import claim_scrape, release_scrape
+from .archive import cleanup_matches
+from .http_pool import shared_session
+from .breaker import retry_countdown
+from .writer import submit_write
+from .metrics import TASK_RETRIES
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@shared_task
-def update_match_list():
+def bulk_scraper(default=AsyncCREXScraper):
+    """Scraper for many-page tasks: pipelined stages when CREX_PIPELINE is on.
+
+    Pages are tried once; periodic tasks pick failed ones up next cycle.
+    """
+    scraper_class = PipelinedCREXScraper if getattr(settings, 'CREX_PIPELINE', False) else default
+    return scraper_class(session=shared_session(), retries=1)
+
+
+def retry_fetch(task, error):
+    """Reschedule a task whose page fetch failed instead of sleeping in the worker."""
+    countdown = retry_countdown(task.request.retries, error)
+    TASK_RETRIES.labels(task.name).inc()
+    logger.warning(f"{task.name} fetch failed ({error}), retry {task.request.retries + 1} in {countdown:.0f}s")
+    raise task.retry(exc=error, countdown=countdown)
+
+
+@shared_task(bind=True, max_retries=getattr(settings, 'CREX_TASK_MAX_RETRIES', 5))
+def update_match_list(self):
     """Update the match list by scraping the main fixtures page."""
     logger.info("Starting update_match_list task")
     
     try:
-        scraper = CREXScraper()
+        scraper = bulk_scraper(default=CREXScraper)
         matches_scraped = scraper.scrape_match_list()
+        if scraper.last_fetch_error is not None and self.request.retries < self.max_retries:
+            retry_fetch(self, scraper.last_fetch_error)
         
+        logger.info(f"HTTP cache stats: {scraper.cache_stats()}, connections: {scraper.connection_stats()}")
         logger.info(f"update_match_list task completed. Scraped {matches_scraped} matches")
         return f"Successfully scraped {matches_scraped} matches"
         
+    except Retry:
+        raise
     except Exception as e:
         logger.error(f"Error in update_match_list task: {e}")
         return f"Error: {e}"
@@ -34,11 +68,12 @@ def check_live_matches():
     logger.info("Starting check_live_matches task")
     
     try:
-        scraper = CREXScraper()
+        scraper = bulk_scraper()
         matches_updated = scraper.check_live_matches()
         
+        logger.info(f"HTTP cache stats: {scraper.cache_stats()}, connections: {scraper.connection_stats()}")
         logger.info(f"check_live_matches task completed. Updated {matches_updated} matches")
-        return f"Successfully updated {matches_updated} live matches"
+        return f"Successfully updated {matches_updated} live matches ({scraper.fingerprint_summary()})"
         
     except Exception as e:
         logger.error(f"Error in check_live_matches task: {e}")
@@ -46,40 +81,84 @@ def check_live_matches():
 
 
 @shared_task
-def scrape_match_details(match_id):
+def poll_due_matches():
+    """Poll the matches whose adaptive live schedule is due."""
+    logger.info("Starting poll_due_matches task")
+    
+    try:
+        scraper = bulk_scraper()
+        stats = LivePollScheduler(scraper).run_cycle()
+        
+        logger.info(f"poll_due_matches task completed. {stats}")
+        return (f"Polled {stats['polled']} due matches, {stats['updated']} updated, "
+                f"{stats['requests_saved']} requests saved vs crontab ({scraper.fingerprint_summary()})")
+        
+    except Exception as e:
+        logger.error(f"Error in poll_due_matches task: {e}")
+        return f"Error: {e}"
+
+
+def request_match_scrape(match_id):
+    """Enqueue a detail scrape unless one is in flight or the details are fresh.
+
+    Returns True when a task was enqueued.
+    """
+    if claim_scrape(match_id) != 'enqueued':
+        return False
+    try:
+        scrape_match_details.delay(match_id)
+    except Exception:
+        release_scrape(match_id, fresh=False)
+        raise
+    return True
+
+
+@shared_task(bind=True, max_retries=getattr(settings, 'CREX_TASK_MAX_RETRIES', 5))
+def scrape_match_details(self, match_id):
     """Scrape detailed information for a specific match."""
     logger.info(f"Starting scrape_match_details task for match {match_id}")
+    succeeded = False
+    retrying = False
     
     try:
         match = Match.objects.get(id=match_id)
-        scraper = CREXScraper()
+        scraper = CREXScraper(session=shared_session(), retries=1)
         
         # Construct match URL (adjust based on actual URL structure)
-        match_url = f"{scraper.base_url}/match/{match_id}"
+        match_url = scraper.match_url(match_id)
         
+        scraper.load_fingerprints([match_url])
         details = scraper.scrape_match_details(match_url)
         
-        if details:
-            # Here you would save the detailed match data to the database
-            # For now, we'll just log it
-            logger.info(f"Successfully scraped details for match {match_id}")
-            
-            # Update match status if live data is available
-            if details.get('live'):
-                match.status = 'Live'
-                match.save()
-                logger.info(f"Updated match {match_id} status to Live")
+        if details is None:
+            succeeded = True
+            logger.info(f"Match {match_id} page unchanged, skipped parsing and saving")
+            return f"Match {match_id} unchanged ({scraper.fingerprint_summary()})"
+        elif details:
+            changed = submit_write(scraper.save_match_details, match, match_url, details).result()
+            succeeded = True
+            logger.info(f"Successfully scraped details for match {match_id}, changed sections: {changed}")
             
-            return f"Successfully scraped details for match {match_id}"
+            return f"Successfully scraped details for match {match_id} ({scraper.fingerprint_summary()})"
         else:
+            if scraper.last_fetch_error is not None and self.request.retries < self.max_retries:
+                retry_fetch(self, scraper.last_fetch_error)
             return f"No details found for match {match_id}"
             
+    except Retry:
+        retrying = True
+        raise
     except Match.DoesNotExist:
         logger.error(f"Match with ID {match_id} not found")
         return f"Match with ID {match_id} not found"
     except Exception as e:
         logger.error(f"Error in scrape_match_details task: {e}")
         return f"Error: {e}"
+    finally:
+        # Let later page views enqueue again; failures may retry straight away.
+        # A rescheduled task keeps the claim, so views join it rather than enqueue.
+        if not retrying:
+            release_scrape(match_id, fresh=succeeded)
 
 
 @shared_task
@@ -102,9 +181,9 @@ def trigger_live_scraping():
         
         for match in upcoming_matches:
             # Schedule detailed scraping for this match
-            scrape_match_details.delay(match.id)
-            triggered_tasks += 1
-            logger.info(f"Triggered live scraping for match {match.id}: {match}")
+            if request_match_scrape(match.id):
+                triggered_tasks += 1
+                logger.info(f"Triggered live scraping for match {match.id}: {match}")
         
         logger.info(f"trigger_live_scraping task completed. Triggered {triggered_tasks} tasks")
         return f"Successfully triggered {triggered_tasks} live scraping tasks"
@@ -116,21 +195,25 @@ def trigger_live_scraping():
 
 @shared_task
 def cleanup_old_matches():
-    """Clean up old matches from the database."""
+    """Archive and delete old matches in small batches."""
     logger.info("Starting cleanup_old_matches task")
     
     try:
         from datetime import timedelta
         
-        # Delete matches older than 30 days
-        cutoff_date = timezone.now() - timedelta(days=30)
-        old_matches = Match.objects.filter(match_date__lt=cutoff_date)
-        
-        count = old_matches.count()
-        old_matches.delete()
-        
-        logger.info(f"cleanup_old_matches task completed. Deleted {count} old matches")
-        return f"Successfully deleted {count} old matches"
+        # Delete matches older than CREX_CLEANUP_AFTER_DAYS
+        cutoff_date = timezone.now() - timedelta(days=getattr(settings, 'CREX_CLEANUP_AFTER_DAYS', 30))
+        archive_dir = getattr(settings, 'CREX_ARCHIVE_DIR', None)
+        stats = cleanup_matches(cutoff_date, archive_dir=str(archive_dir) if archive_dir else None)
+        invalidate_status_counts()
+        bump_data_version()
+        
+        logger.info(
+            f"cleanup_old_matches task completed. Deleted {stats['matches']} old matches "
+            f"({stats['rows']} rows in {stats['batches']} batches, {stats['rows_per_second']} rows/s, "
+            f"longest lock {stats['max_lock_ms']} ms, {stats['archived_files']} archive files written)"
+        )
+        return f"Successfully deleted {stats['matches']} old matches"
         
     except Exception as e:
         logger.error(f"Error in cleanup_old_matches task: {e}")
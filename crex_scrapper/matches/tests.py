@@ -1,3 +1,1422 @@
-from django.test import TestCase
+import asyncio
+import atexit
+import csv
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from celery.exceptions import Retry
+
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Q
+from django.core.cache import cache, caches
+from django import test
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from .benchmarks.db import seed_matches
+from .benchmarks.pages import fixture_rows, match_page, recorded_pages
+from .benchmarks.stub_server import StubServer
+from .benchmarks.suite import compare, measure
+from .http_cache import ResponseCache, shared_cache
+from .models import Match, Team, PageFingerprint, BattingEntry, PollSchedule, MatchEvent, MatchFacet, LiveSnapshot
+from .scheduler import LivePollScheduler, classify
+from .stats import get_status_counts
+from .live import LiveBroadcaster, diff_update
+from .export import export_fields, parquet_chunks, pyarrow
+from .coalesce import IN_FLIGHT_KEY, claim_scrape, release_scrape, scrape_request_stats
+from .tasks import scrape_match_details, cleanup_old_matches, bulk_scraper
+from .pipeline import PageJob, PipelinedCREXScraper
+from .scorecards import load_match_details
+from .events import diff_live
+from .archive import cleanup_matches, read_archive, restore_record
+from .writer import WriteQueue, submit_write
+from .page_cache import bump_data_version, page_cache_stats
+from .search import rebuild_search_index, search_matches, team_ids, venue_names
+from .facets import facet_count, rebuild_facets
+from .http_pool import build_session, connection_stats, shared_session, httpx
+from .breaker import CircuitOpen, breaker_states, retry_countdown
+from .extraction import CSS, EXTRACTION_SPECS, Selector, Text, SelectorChain, flush_metrics, selector_report
+from .scraper import CREXScraper, AsyncCREXScraper, PARSER_ENGINES
+
+# Keep tests out of the project's file-based caches
+TEST_HTTP_CACHE_DIR = tempfile.mkdtemp(prefix='crex-test-http-')
+atexit.register(shutil.rmtree, TEST_HTTP_CACHE_DIR, ignore_errors=True)
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'pages': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'coordination': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-coordination'},
+}
+PAGE_CACHES = {**TEST_CACHES, 'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'test-pages'}}
+TEST_SETTINGS = {'CACHES': TEST_CACHES, 'CREX_CACHE_DIR': TEST_HTTP_CACHE_DIR}
+
+
+# The test case classes below stand in for Django's, so every test class
+# here runs with TEST_SETTINGS without declaring it
+@override_settings(**TEST_SETTINGS)
+class SimpleTestCase(test.SimpleTestCase):
+    pass
+
+
+@override_settings(**TEST_SETTINGS)
+class TransactionTestCase(test.TransactionTestCase):
+    pass
+
+
+@override_settings(**TEST_SETTINGS)
+class TestCase(test.TestCase):
+    pass
+
+
+class AsyncCREXScraperTests(SimpleTestCase):
+    """Concurrent fetching must produce the same details as the serial loop."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def test_matches_serial_results(self):
+        serial = CREXScraper(base_url=self.server.base_url, cache=False)
+        concurrent = AsyncCREXScraper(base_url=self.server.base_url, cache=False, concurrency=4)
+        urls = [concurrent.match_url(match_id) for match_id in range(1, 11)]
+
+        results = concurrent.scrape_many_match_details(urls)
+
+        self.assertEqual(results, serial.scrape_many_match_details(urls))
+        self.assertEqual(len(results[concurrent.match_url(1)]['scorecard']), 2)
+
+    def test_failed_page_returns_empty_details(self):
+        scraper = AsyncCREXScraper(base_url=self.server.base_url, cache=False, concurrency=2)
+        missing = f"{self.server.base_url}/missing"
+
+        with self.assertLogs('matches.scraper', level='ERROR'):
+            results = scraper.scrape_many_match_details([missing, scraper.match_url(1)])
+
+        self.assertEqual(results[missing], {})
+        self.assertTrue(results[scraper.match_url(1)]['live'])
+
+
+class HTTPPoolTests(SimpleTestCase):
+    """Scrapers share pooled connections and count how often they are reused."""
+
+    def fetch(self, session, server, pages):
+        scraper = CREXScraper(base_url=server.base_url, cache=False, session=session)
+        for match_id in range(pages):
+            scraper.get_page(scraper.match_url(match_id))
+        return scraper
+
+    def test_connections_are_reused_and_counted_per_session(self):
+        with StubServer() as server:
+            shared = build_session()
+            for _ in range(3):
+                self.fetch(shared, server, 2)
+            other = self.fetch(build_session(), server, 1)
+
+        self.assertEqual(connection_stats(shared), {
+            'requests': 6, 'new_connections': 1, 'reused': 5, 'reuse_rate': 0.833,
+        })
+        self.assertEqual(other.connection_stats()['new_connections'], 1)
+
+    @skipUnless(httpx, "httpx is not installed")
+    def test_http2_adapter_returns_requests_responses(self):
+        with StubServer() as server:
+            session = build_session(http2=True)
+            scraper = self.fetch(session, server, 2)
+            response = scraper.get_page(f'{server.base_url}/fixtures/match-list')
+        self.assertIn(b'match-item', response.content)
+        self.assertEqual(connection_stats(session)['new_connections'], 1)
+
+    def test_one_shared_session_per_process(self):
+        session = shared_session()
+        self.assertIs(shared_session(), session)
+        self.assertIs(bulk_scraper().session, session)
+        with mock.patch('matches.http_pool.os.getpid', return_value=-1):
+            self.assertIsNot(shared_session(), session)
+
+
+@override_settings(CREX_BREAKER_FAILURES=3, CREX_BREAKER_RESET=60)
+class CircuitBreakerTests(TestCase):
+    """Failing hosts are cut off quickly and failed tasks retry through Celery."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_circuit_opens_then_probes_and_closes(self):
+        with StubServer(error_rate=1.0) as server:
+            scraper = CREXScraper(base_url=server.base_url, cache=False, retries=1)
+            url = scraper.match_url(1)
+            for _ in range(3):
+                with self.assertRaises(requests.HTTPError):
+                    scraper.get_page(url)
+            with self.assertRaises(CircuitOpen):
+                scraper.get_page(url)
+            self.assertEqual(server.requests_served, 3)
+            host = url.split('/')[2]
+            self.assertEqual(breaker_states()[host]['state'], 'open')
+
+            # After the reset timeout one probe goes through and its success closes the circuit
+            server.httpd.error_rate = 0
+            with mock.patch('matches.breaker.time.time', return_value=time.time() + 61):
+                self.assertEqual(breaker_states()[host]['state'], 'half_open')
+                scraper.get_page(url)
+            self.assertEqual(breaker_states()[host], {'state': 'closed', 'failures': 0, 'retry_in': 0})
+
+    def test_retry_countdown_backs_off_and_honours_retry_after(self):
+        for retries in range(4):
+            self.assertLessEqual(retry_countdown(retries), 5 * 2 ** retries)
+        error = requests.HTTPError(response=mock.Mock(headers={'Retry-After': '120'}))
+        self.assertGreaterEqual(retry_countdown(0, error), 120)
+        self.assertGreaterEqual(retry_countdown(0, CircuitOpen('crex.com', 45)), 45)
+
+    def test_outage_does_not_occupy_workers(self):
+        match = CREXScraper(cache=False).save_match_data(fixture_rows(1)[0])
+        with StubServer(error_rate=1.0) as server, override_settings(CREX_BASE_URL=server.base_url), \
+                mock.patch('matches.tasks.scrape_match_details.retry', side_effect=Retry) as retry:
+            start = time.perf_counter()
+            for _ in range(10):
+                claim_scrape(match.id)
+                self.assertEqual(scrape_match_details.apply(args=[match.id]).state, 'RETRY')
+            elapsed = time.perf_counter() - start
+
+        # Previously each task slept 1 + 2 seconds between attempts in the worker
+        self.assertLess(elapsed, 2)
+        self.assertEqual(server.requests_served, 3)
+        self.assertEqual(retry.call_count, 10)
+        self.assertGreaterEqual(retry.call_args.kwargs['countdown'], 1)
+        self.assertTrue(caches['coordination'].get(IN_FLIGHT_KEY.format(match.id)))
+
+
+class ResponseCacheTests(SimpleTestCase):
+    """get_page should serve fresh pages locally and revalidate stale ones."""
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.addCleanup(self.server.stop)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_fresh_entry_skips_request(self):
+        cache = ResponseCache(self.directory, ttls={'match': 60})
+        scraper = CREXScraper(base_url=self.server.base_url, cache=cache)
+
+        first = scraper.get_page(scraper.match_url(1))
+        second = scraper.get_page(scraper.match_url(1))
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self.server.requests_served, 1)
+        self.assertEqual(cache.summary()['hits'], 1)
+        self.assertEqual(cache.summary()['misses'], 1)
+
+    def test_stale_entry_revalidates_with_etag(self):
+        cache = ResponseCache(self.directory, ttls={'match': 0})
+        scraper = CREXScraper(base_url=self.server.base_url, cache=cache)
+
+        first = scraper.get_page(scraper.match_url(1))
+        second = scraper.get_page(scraper.match_url(1))
+
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(self.server.httpd.not_modified_served, 1)
+        self.assertEqual(cache.summary()['not_modified'], 1)
+
+    def test_evicts_least_recently_used(self):
+        scraper = CREXScraper(base_url=self.server.base_url, cache=False)
+        size = len(scraper.get_page(scraper.match_url(1)).content)
+        cache = ResponseCache(self.directory, max_bytes=int(size * 2.5))
+        scraper.cache = cache
+
+        for match_id in (1, 2, 1, 3):
+            scraper.get_page(scraper.match_url(match_id))
+
+        self.assertIsNotNone(cache.get(scraper.match_url(1)))
+        self.assertIsNone(cache.get(scraper.match_url(2)))
+        self.assertEqual(cache.summary()['evictions'], 1)
+
+        # The on-disk index survives a restart
+        reopened = ResponseCache(self.directory, max_bytes=int(size * 2.5))
+        self.assertEqual(reopened.summary()['entries'], 2)
+
+    def test_processes_share_the_directory(self):
+        scraper = CREXScraper(base_url=self.server.base_url, cache=ResponseCache(self.directory, ttls={'match': 60}))
+        other = ResponseCache(self.directory, ttls={'match': 60})
+        scraper.get_page(scraper.match_url(1))
+
+        # An entry stored after the other process scanned the directory is still served
+        self.assertIsNotNone(other.get(scraper.match_url(1)))
+        self.assertEqual(other.summary()['entries'], 1)
+        self.assertEqual(sorted(path.suffix for path in Path(self.directory).iterdir()), ['.body', '.json'])
+
+    def test_scrapers_share_one_cache_per_process(self):
+        with override_settings(CREX_CACHE_DIR=self.directory):
+            first, second = CREXScraper(), CREXScraper()
+            self.assertIs(first.cache, second.cache)
+            self.assertIs(first.cache, shared_cache())
+        self.assertEqual(shared_cache().directory, Path(TEST_HTTP_CACHE_DIR))
+
+
+class FingerprintTests(TestCase):
+    """Unchanged pages and sections should not be parsed or saved again."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        home = Team.objects.create(name='India')
+        away = Team.objects.create(name='Australia')
+        self.match = Match.objects.create(
+            home_team=home, away_team=away, match_date=timezone.now() - timedelta(hours=1),
+            location='Ground 1', status='Scheduled',
+        )
+
+    def poll(self):
+        scraper = CREXScraper(base_url=self.server.base_url, cache=False)
+        updated = scraper.check_live_matches()
+        return scraper, updated
+
+    def test_unchanged_page_is_skipped_on_next_poll(self):
+        first, updated = self.poll()
+        self.assertEqual(updated, 1)
+        self.assertEqual(first.fingerprint_stats['sections_changed'], 4)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.status, 'Live')
+
+        second, updated = self.poll()
+        self.assertEqual(updated, 0)
+        self.assertEqual(second.fingerprint_stats['pages_skipped'], 1)
+        self.assertEqual(second.fingerprint_stats['pages_parsed'], 0)
+
+    def test_unchanged_sections_are_skipped(self):
+        scraper, _ = self.poll()
+        url = scraper.match_url(self.match.id)
+        # Force a re-parse, as if markup outside the extracted sections changed
+        PageFingerprint.objects.filter(url=url).update(content_hash='stale')
+
+        second, _ = self.poll()
+        self.assertEqual(second.fingerprint_stats['pages_parsed'], 1)
+        self.assertEqual(second.fingerprint_stats['sections_skipped'], 4)
+        self.assertEqual(second.fingerprint_stats['sections_changed'], 0)
+
+
+class BulkSaveTests(TestCase):
+    """Fixture rows are upserted in one batch on their natural key."""
+
+    def test_batch_creates_teams_and_matches(self):
+        scraper = CREXScraper(cache=False)
+        rows = fixture_rows(30)
+
+        saved = scraper.save_match_batch(rows)
+
+        self.assertEqual(len(saved), 30)
+        self.assertEqual(Match.objects.count(), 30)
+        self.assertEqual(Team.objects.count(), len({r['home_team'] for r in rows} | {r['away_team'] for r in rows}))
+
+    def test_rerun_updates_location_but_keeps_status(self):
+        scraper = CREXScraper(cache=False)
+        rows = fixture_rows(5)
+        scraper.save_match_batch(rows)
+        Match.objects.update(status='Live')
+
+        rows[0]['location'] = 'New Ground'
+        scraper.save_match_batch(rows)
+
+        self.assertEqual(Match.objects.count(), 5)
+        self.assertEqual(Match.objects.filter(status='Live').count(), 5)
+        self.assertTrue(Match.objects.filter(location='New Ground').exists())
+
+    def test_save_match_data_returns_saved_match(self):
+        scraper = CREXScraper(cache=False)
+        match = scraper.save_match_data(fixture_rows(1)[0])
+
+        self.assertIsNotNone(match.pk)
+        self.assertEqual(Match.objects.get(pk=match.pk).location, match.location)
+
+
+class SearchTests(TestCase):
+    """Team and venue search give the same matches as icontains, through the search indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        CREXScraper(cache=False).save_match_batch(fixture_rows(60))
+
+    def assertSameMatches(self, searched, expected):
+        self.assertEqual(list(searched.values_list('id', flat=True)), list(expected.values_list('id', flat=True)))
+
+    def test_search_agrees_with_icontains(self):
+        matches = Match.objects.order_by('-match_date', '-id')
+        for team, venue in [('india', ''), ('A 1', ''), ('a', ''), ('Nobody', ''), ('', 'ground 1'),
+                            ('', '3'), ('', 'Nowhere'), ('land', 'Ground 2'), ('"', '%')]:
+            expected = matches.filter(Q(home_team__name__icontains=team) | Q(away_team__name__icontains=team),
+                                      location__icontains=venue)
+            for walk_fraction in (1, 0):
+                with self.subTest(team=team, venue=venue, walk_fraction=walk_fraction), \
+                        mock.patch('matches.search.WALK_FRACTION', walk_fraction):
+                    searched, count = search_matches(matches, team, venue)
+                    self.assertSameMatches(searched, expected)
+                    self.assertEqual(count, expected.count())
+
+    def test_indexes_follow_writes(self):
+        team = Team.objects.get(name=fixture_rows(1)[0]['home_team'])
+        team.name = 'Renamed Eleven'
+        team.save()
+        self.assertEqual(team_ids('renamed'), [team.id])
+        self.assertEqual(team_ids(fixture_rows(1)[0]['home_team']), [])
+
+        # A location changed by the bulk upsert becomes searchable
+        rows = fixture_rows(1)
+        rows[0]['home_team'] = 'Renamed Eleven'
+        rows[0]['location'] = 'Eden Gardens'
+        CREXScraper(cache=False).save_match_batch(rows)
+        searched, count = search_matches(Match.objects.order_by('-match_date'), venue='eden')
+        self.assertEqual(count, 1)
+        self.assertEqual(searched.get().home_team, team)
+
+        rebuild_search_index()
+        self.assertEqual(team_ids('renamed'), [team.id])
+        self.assertEqual(search_matches(Match.objects.order_by('-match_date'), venue='eden')[1], 1)
+
+    def test_names_are_looked_up_once(self):
+        with mock.patch('matches.search.team_ids', wraps=team_ids) as teams, \
+                mock.patch('matches.search.venue_names', wraps=venue_names) as venues, \
+                mock.patch('matches.search.WALK_FRACTION', 0):
+            searched, count = search_matches(Match.objects.order_by('-match_date'), 'land', 'Ground 2')
+            list(searched)
+        self.assertEqual((teams.call_count, venues.call_count), (1, 1))
+
+    def test_venues_without_matches_are_dropped(self):
+        Match.objects.filter(location='Ground 39').delete()
+        Match.objects.filter(location='Ground 38').update(location='Eden Gardens')
+
+        self.assertEqual(venue_names('Ground 39'), [])
+        self.assertEqual(venue_names('Ground 38'), [])
+        self.assertEqual(venue_names('Eden'), ['Eden Gardens'])
+        self.assertEqual(venue_names('Ground 37'), ['Ground 37'])
+
+    def test_match_list_filters(self):
+        home_team = fixture_rows(1)[0]['home_team']
+        response = self.client.get(reverse('matches:match_list'), {'team': home_team, 'venue': 'Ground'})
+        expected = Match.objects.filter(Q(home_team__name__icontains=home_team) |
+                                        Q(away_team__name__icontains=home_team))
+        self.assertEqual(response.context['total_matches'], expected.count())
+        self.assertEqual({m.id for m in response.context['matches']}, set(expected.values_list('id', flat=True)))
+
+
+class FacetTests(TestCase):
+    """Facet counts follow every match write and agree with COUNT over the matches."""
+
+    def setUp(self):
+        self.now = timezone.now()
+        rows = fixture_rows(60, start=self.now - timedelta(hours=30, minutes=20))
+        CREXScraper(cache=False).save_match_batch(rows)
+        Match.objects.filter(match_date__lt=self.now - timedelta(hours=20)).update(status='Completed')
+        Match.objects.filter(pk__in=Match.objects.order_by('match_date').values('pk')[12:14]).update(status='Live')
+
+    def assertFacetsMatch(self):
+        ranges = [
+            (None, None),
+            (self.now, None),
+            (None, self.now),
+            (self.now - timedelta(days=1), self.now + timedelta(hours=3)),
+            (self.now + timedelta(hours=1), self.now + timedelta(hours=2)),
+        ]
+        for status in (None, 'Live', 'Scheduled', 'Completed', 'Abandoned'):
+            for start, end in ranges:
+                with self.subTest(status=status, start=start, end=end):
+                    matches = Match.objects.all()
+                    if status:
+                        matches = matches.filter(status=status)
+                    if start:
+                        matches = matches.filter(match_date__gte=start)
+                    if end:
+                        matches = matches.filter(match_date__lt=end)
+                    self.assertEqual(facet_count(status, start, end), matches.count())
+
+    def test_counts_follow_writes(self):
+        self.assertFacetsMatch()
+
+        Match.objects.filter(status='Scheduled').first().delete()
+        match = Match.objects.filter(status='Completed').first()
+        match.match_date += timedelta(days=2)
+        match.save()
+        CREXScraper(cache=False).save_match_batch(fixture_rows(70, start=self.now - timedelta(hours=30, minutes=20)))
+        self.assertFacetsMatch()
+        self.assertFalse(MatchFacet.objects.filter(matches=0).exists())
+
+    def test_rebuild(self):
+        MatchFacet.objects.all().delete()
+        rebuild_facets()
+        self.assertFacetsMatch()
+
+    def test_match_list_counts_from_facets(self):
+        cases = [
+            ({}, Match.objects.all()),
+            ({'status': 'Completed'}, Match.objects.filter(status='Completed')),
+            ({'status': 'Scheduled', 'date': 'upcoming'}, Match.objects.filter(status='Scheduled', match_date__gte=self.now)),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params), CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('matches:match_list'), params)
+            self.assertEqual(response.context['total_matches'], expected.count())
+            # At most the partial days at the ends of a date range are counted from matches
+            full_counts = [
+                q['sql'] for q in queries
+                if 'COUNT(' in q['sql'] and 'FROM "matches_match"' in q['sql'] and '"match_date" >=' not in q['sql']
+            ]
+            self.assertEqual(full_counts, [])
+
+
+class WriteQueueTests(TransactionTestCase):
+    """Saves from many callers are committed by one writer thread in few transactions."""
+
+    def test_queued_saves_commit_together(self):
+        writes = WriteQueue()
+        started, release = threading.Event(), threading.Event()
+
+        def first_save():
+            started.set()
+            release.wait(5)
+            return Team.objects.create(name='Team 0')
+
+        def failing_save():
+            Team.objects.create(name='Broken')
+            raise ValueError("bad row")
+
+        try:
+            first = writes.submit(first_save)
+            started.wait(5)
+            # Queued while the writer is busy, so they share the next transaction
+            futures = [writes.submit(Team.objects.create, name=f'Team {i}') for i in range(1, 11)]
+            failed = writes.submit(failing_save)
+            release.set()
+            self.assertEqual(first.result(5).name, 'Team 0')
+            self.assertEqual([future.result(5).name for future in futures], [f'Team {i}' for i in range(1, 11)])
+            with self.assertRaises(ValueError):
+                failed.result(5)
+        finally:
+            writes.close()
+
+        self.assertEqual(Team.objects.count(), 11)
+        self.assertEqual(writes.stats, {'saves': 12, 'failed': 1, 'transactions': 2, 'largest_batch': 11})
+
+    def test_saves_inside_a_transaction_run_inline(self):
+        with transaction.atomic():
+            future = submit_write(threading.current_thread)
+            self.assertTrue(future.done())
+            self.assertIs(future.result(), threading.current_thread())
+
+    def test_sqlite_connections_use_wal_and_a_busy_timeout(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            wrapper = connections['default'].__class__({**connection.settings_dict, 'NAME': os.path.join(tmp, 'db.sqlite3')})
+            try:
+                with wrapper.cursor() as cursor:
+                    pragmas = {}
+                    for name in ['journal_mode', 'synchronous', 'busy_timeout', 'temp_store']:
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                wrapper.close()
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000, 'temp_store': 2})
+
+
+class ParserEngineParityTests(SimpleTestCase):
+    """Every parser engine must extract exactly what html.parser does."""
+
+    def extract(self, scraper, page_type, content):
+        if page_type == 'match_list':
+            return scraper.extract_match_rows(content)
+        return scraper.parse_match_details(content)
+
+    def test_recorded_pages_match_html_parser(self):
+        baseline = CREXScraper(cache=False, parser='html.parser')
+        for name, (page_type, content) in recorded_pages().items():
+            expected = self.extract(baseline, page_type, content)
+            self.assertTrue(expected, name)
+            for engine in PARSER_ENGINES:
+                with self.subTest(page=name, engine=engine):
+                    scraper = CREXScraper(cache=False, parser=engine)
+                    self.assertEqual(self.extract(scraper, page_type, content), expected)
+
+    def test_targeted_parse_falls_back_to_whole_page(self):
+        content = b'<html><body><div>India vs Australia</div></body></html>'
+        for engine in PARSER_ENGINES:
+            with self.subTest(engine=engine):
+                rows = CREXScraper(cache=False, parser=engine).extract_match_rows(content)
+                self.assertEqual([(r['home_team'], r['away_team']) for r in rows], [('India', 'Australia')])
+
+
+class ExtractionSpecTests(SimpleTestCase):
+    """Declared selectors compile to find calls and learn their fallback order."""
+
+    def soup(self, html):
+        return CREXScraper(cache=False, parser='html.parser').parser.parse(html.encode())
+
+    def test_simple_css_compiles_to_find_args(self):
+        self.assertEqual(CSS.compile_simple('div.match-item, div.fixture-item'),
+                         ('div', {'class_': ['match-item', 'fixture-item']}))
+        self.assertEqual(CSS.compile_simple('a[href]'), ('a', {'attrs': {'href': True}}))
+        self.assertEqual(CSS.compile_simple('td'), ('td', {}))
+        self.assertIsNone(CSS.compile_simple('div.score > span.team'))
+        self.assertEqual(CSS('div.score > span.team', text=True).find(
+            self.soup('<div class="score"><span class="team">IND</span></div>'), many=False), 'IND')
+
+    def test_successful_selector_is_tried_first_within_its_group(self):
+        chain = SelectorChain('test.containers', [
+            (CSS('div.match-item'), CSS('div.fixture')), Text('div', r'vs'),
+        ], many=True)
+        old_markup = self.soup('<div class="match-item">A vs B</div>')
+        new_markup = self.soup('<div class="fixture">A vs B</div>')
+
+        self.assertEqual(len(chain.select(old_markup)), 1)
+        self.assertEqual(chain.order, [0, 1, 2])
+        self.assertEqual(len(chain.select(new_markup)), 1)
+        self.assertEqual(chain.order, [1, 0, 2])
+        old_css, new_css, text = chain.selectors
+        self.assertEqual((old_css.attempts, old_css.hits, new_css.attempts, new_css.hits), (2, 1, 1, 1))
+
+        # Now the other CSS selector is asked first, and the text fallback never moves ahead
+        chain.select(new_markup)
+        self.assertEqual((old_css.attempts, new_css.attempts), (2, 2))
+        chain.select(self.soup('<div>A vs B</div>'))
+        self.assertEqual(chain.order, [1, 0, 2])
+        self.assertEqual(text.hits, 1)
+
+    def test_declared_groups_learn_the_layout_in_use(self):
+        for learned in EXTRACTION_SPECS['fixture'].values():
+            self.addCleanup(setattr, learned, 'order', learned.order)
+        chain = EXTRACTION_SPECS['fixture']['date']
+        container = self.soup(
+            '<div class="fixture-item"><span class="team">India</span> vs <span class="team">Australia</span>'
+            '<span class="date">Wed, 02 Jul 2025</span></div>'
+        ).div
+
+        data = CREXScraper(cache=False, parser='html.parser').extract_match_data(container)
+
+        self.assertEqual(data['home_team'], 'India')
+        self.assertEqual([chain.selectors[index].label for index in chain.order], ['span.date', 'span.match-date'])
+        with self.assertRaises(TypeError):
+            Selector('abstract')
+
+    def test_fallback_fixture_does_not_change_the_next_one(self):
+        scraper = CREXScraper(cache=False, parser='html.parser')
+        fallback = self.soup('<div class="match-item">India vs Australia</div>').div
+        normal = self.soup(
+            '<div class="match-item"><span class="team-name">India</span> vs '
+            '<span class="team-name">Australia</span> <span class="location">Lords</span></div>'
+        ).div
+
+        for container in (fallback, normal):
+            data = scraper.extract_match_data(container)
+            self.assertEqual((data['home_team'], data['away_team']), ('India', 'Australia'))
+
+    def test_counts_reach_prometheus_once_flushed(self):
+        def hits():
+            return REGISTRY.get_sample_value('crex_selector_attempts_total', {
+                'chain': 'match.cells', 'selector': 'td', 'outcome': 'hit'}) or 0
+
+        before = hits()
+        CREXScraper(cache=False).parse_match_details(recorded_pages()['match_live.html'][1])
+        self.assertGreater(hits(), before)
+        flush_metrics()
+        report = {(row['chain'], row['selector']): row for row in selector_report()}
+        self.assertEqual(hits(), report['match.cells', 'td']['hits'])
+
+
+class ScorecardStorageTests(TestCase):
+    """Scraped details are stored normalized and rewritten row by row."""
+
+    def setUp(self):
+        self.scraper = CREXScraper(cache=False)
+        self.match = self.scraper.save_match_data(fixture_rows(1)[0])
+        self.url = self.scraper.match_url(self.match.id)
+        self.details = self.scraper.parse_match_details(match_page(3))
+        self.scraper.page_changed(self.url, b'first')
+        self.scraper.save_match_details(self.match, self.url, self.details)
+
+    def test_round_trip(self):
+        stored = load_match_details(self.match)
+        for section in ('match_info', 'squads', 'scorecard'):
+            self.assertEqual(stored[section], self.details[section])
+
+    def test_only_changed_rows_are_written(self):
+        first_batter = BattingEntry.objects.get(innings__number=1, position=0)
+        untouched = BattingEntry.objects.get(innings__number=1, position=1)
+
+        details = self.scraper.parse_match_details(match_page(3))
+        details['scorecard']['innings_1']['batting'][0]['runs'] = '99'
+        self.scraper.write_stats.clear()
+        self.scraper.page_changed(self.url, b'second')
+        changed = self.scraper.save_match_details(self.match, self.url, details)
+
+        self.assertEqual(changed, ['scorecard'])
+        self.assertEqual(self.scraper.write_stats['rows_written'], 1)
+        first_batter.refresh_from_db()
+        self.assertEqual(first_batter.runs, '99')
+        self.assertEqual(BattingEntry.objects.get(pk=untouched.pk).id, untouched.id)
+
+    def test_failed_sections_keep_stored_rows(self):
+        details = self.scraper.parse_match_details(b'<html><body></body></html>')
+        self.scraper.page_changed(self.url, b'failed')
+        self.assertEqual(self.scraper.save_match_details(self.match, self.url, details), [])
+
+        stored = load_match_details(self.match)
+        for section in ('match_info', 'squads', 'scorecard'):
+            self.assertEqual(stored[section], self.details[section])
+
+        # The kept hashes still skip the stored data when the page comes back
+        self.scraper.page_changed(self.url, b'recovered')
+        self.assertEqual(self.scraper.save_match_details(self.match, self.url, self.details), [])
+
+    def test_views_read_stored_details(self):
+        Match.objects.filter(pk=self.match.pk).update(status='Completed')
+        with mock.patch('matches.tasks.scrape_match_details.delay') as delay:
+            response = self.client.get(reverse('matches:match_detail', args=[self.match.id]))
+        self.assertContains(response, self.details['squads'][next(iter(self.details['squads']))][0])
+        delay.assert_not_called()
+
+        data = self.client.get(reverse('matches:api_match_detail', args=[self.match.id])).json()
+        self.assertEqual(data['scorecard'], self.details['scorecard'])
+
+
+class MatchEventTests(TestCase):
+    """Live polls append only what changed, served after a sequence number."""
+
+    def setUp(self):
+        self.scraper = CREXScraper(cache=False)
+        self.match = self.scraper.save_match_data(fixture_rows(1)[0])
+        self.url = self.scraper.match_url(self.match.id)
+        self.poll = 0
+
+    def save_live(self, live):
+        self.poll += 1
+        self.scraper.page_changed(self.url, f'poll {self.poll}'.encode())
+        with mock.patch('matches.scraper.publish_live_update'):
+            self.scraper.save_match_details(self.match, self.url, {'live': live})
+
+    def test_diff_live(self):
+        events = diff_live(
+            {'IND': '120/2', 'AUS': 'Yet to bat', 'current_over': '14.2'},
+            {'IND': '124/3', 'AUS': 'Yet to bat', 'current_over': '14.3'},
+        )
+        self.assertEqual([kind for kind, _ in events], ['score', 'wicket', 'ball'])
+        self.assertEqual(events[0][1]['runs'], 124)
+        self.assertEqual(events[1][1]['wickets'], 3)
+
+    def test_polls_append_only_new_events(self):
+        self.save_live({'IND': '120/2', 'current_over': '14.2'})
+        self.save_live({'IND': '120/2', 'current_over': '14.2'})
+        self.save_live({'IND': '121/2', 'current_over': '14.3'})
+        self.assertEqual(
+            list(MatchEvent.objects.filter(match=self.match).values_list('sequence', 'kind')),
+            [(1, 'score'), (2, 'ball'), (3, 'score'), (4, 'ball')],
+        )
+
+    def test_since_api_returns_only_new_events(self):
+        self.save_live({'IND': '120/2', 'current_over': '14.2'})
+        url = reverse('matches:api_match_events', args=[self.match.id])
+        data = self.client.get(url).json()
+        self.assertEqual(data['last_sequence'], 2)
+
+        self.save_live({'IND': '126/3', 'current_over': '14.3'})
+        data = self.client.get(url, {'since': data['last_sequence']}).json()
+        self.assertEqual([event['kind'] for event in data['events']], ['score', 'wicket', 'ball'])
+        self.assertEqual(data['events'][0]['sequence'], 3)
+        self.assertFalse(data['has_more'])
+
+        data = self.client.get(url, {'since': 0, 'limit': 2}).json()
+        self.assertEqual((len(data['events']), data['has_more']), (2, True))
+        self.assertEqual(self.client.get(url, {'since': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('matches:api_match_events', args=[0])).status_code, 404)
+
+
+class ArchiveCleanupTests(TestCase):
+    """Old matches are archived and deleted in batches, and can be restored."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive_dir = directory.name
+        self.scraper = CREXScraper(cache=False)
+        rows = fixture_rows(5)
+        for i, row in enumerate(rows):
+            row['match_date'] = timezone.now() - timedelta(days=40 if i < 4 else 1)
+        self.matches = self.scraper.save_match_batch(rows)
+        self.old = self.matches[:4]
+        for match in self.old:
+            url = self.scraper.match_url(match.id)
+            self.scraper.page_changed(url, str(match.id).encode())
+            with mock.patch('matches.scraper.publish_live_update'):
+                self.scraper.save_match_details(match, url, self.scraper.parse_match_details(match_page(match.id)))
+        self.details = {match.id: load_match_details(match) for match in self.old}
+
+    def test_cleanup_deletes_old_matches_in_batches(self):
+        cutoff = timezone.now() - timedelta(days=30)
+        stats = cleanup_matches(cutoff, batch_size=3, pause=0, archive_dir=self.archive_dir)
+
+        self.assertEqual((stats['matches'], stats['batches']), (4, 2))
+        self.assertGreater(stats['rows'], 4)
+        self.assertGreater(stats['max_lock_ms'], 0)
+        self.assertEqual(list(Match.objects.values_list('id', flat=True)), [self.matches[4].id])
+        self.assertFalse(BattingEntry.objects.exists())
+        self.assertFalse(MatchEvent.objects.exists())
+
+        records = list(read_archive(self.archive_dir))
+        self.assertEqual(sorted(record['id'] for record in records), sorted(match.id for match in self.old))
+        self.assertEqual(len(list(read_archive(self.archive_dir, end=cutoff - timedelta(days=20)))), 0)
+
+    def test_restore_round_trip(self):
+        cleanup_matches(timezone.now() - timedelta(days=30), pause=0, archive_dir=self.archive_dir)
+        for record in read_archive(self.archive_dir):
+            self.assertTrue(restore_record(record))
+            self.assertFalse(restore_record(record))
+
+        for match in self.old:
+            restored = Match.objects.get(pk=match.id)
+            self.assertEqual(load_match_details(restored), self.details[match.id])
+            self.assertEqual(restored.live_snapshot.last_sequence, restored.events.count())
+
+    def test_task_without_archive(self):
+        with override_settings(CREX_ARCHIVE_DIR=None, CREX_CLEANUP_PAUSE=0):
+            self.assertEqual(cleanup_old_matches(), "Successfully deleted 4 old matches")
+        self.assertEqual(Match.objects.count(), 1)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+
+class LivePollSchedulerTests(TestCase):
+    """Matches are polled when due and rescheduled by their state."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.scraper = CREXScraper(base_url=self.server.base_url, cache=False)
+        rows = fixture_rows(2, start=timezone.now() - timedelta(minutes=30))
+        self.live_match, self.old_match = self.scraper.save_match_batch(rows)
+        Match.objects.filter(pk=self.old_match.pk).update(status='Completed')
+
+    def test_classify(self):
+        match = Match(status='Live')
+        self.assertEqual(classify(match, {'live': {'India': '10/0', 'current_over': '1.2'}}), 'live')
+        self.assertEqual(classify(match, {'live': {'India': '180/4'}}), 'break')
+        self.assertEqual(classify(match, {'match_info': {'Toss': 'India'}, 'live': {}}), 'break')
+        self.assertEqual(classify(match, {'match_info': {}, 'live': {}}), 'pre_toss')
+        self.assertEqual(classify(match, {'match_info': {'Result': 'India won'}}), 'completed')
+        self.assertEqual(classify(match, None, previous='break'), 'break')
+
+    def test_live_match_is_rescheduled_and_not_polled_early(self):
+        now = timezone.now()
+        stats = LivePollScheduler(self.scraper, now=now).run_cycle()
+
+        self.assertEqual(stats['polled'], 1)
+        schedule = PollSchedule.objects.get(match=self.live_match)
+        self.assertEqual(schedule.state, 'live')
+        self.assertEqual(schedule.next_due, now + timedelta(seconds=30))
+        self.assertFalse(PollSchedule.objects.filter(match=self.old_match).exists())
+
+        stats = LivePollScheduler(self.scraper, now=now + timedelta(seconds=10)).run_cycle()
+        self.assertEqual(stats['polled'], 0)
+
+        stats = LivePollScheduler(self.scraper, now=now + timedelta(seconds=30)).run_cycle()
+        self.assertEqual(stats['polled'], 1)
+        self.assertEqual(stats['live_update_interval'], 30)
+
+    def test_overlapping_cycle_skips_claimed_matches(self):
+        now = timezone.now()
+        first = LivePollScheduler(self.scraper, now=now)
+        first.ensure_schedules()
+        batch, _ = first.claim_due()
+        self.assertEqual(len(batch), 1)
+
+        # The first cycle is still scraping when the next tick starts
+        self.assertEqual(LivePollScheduler(self.scraper, now=now + timedelta(seconds=15)).run_cycle()['polled'], 0)
+        self.assertEqual(LivePollScheduler(self.scraper, now=now + timedelta(minutes=5)).run_cycle()['polled'], 1)
+
+    def test_completed_match_stops_polling(self):
+        now = timezone.now()
+        LivePollScheduler(self.scraper, now=now).run_cycle()
+        Match.objects.filter(pk=self.live_match.pk).update(status='Completed')
+
+        LivePollScheduler(self.scraper, now=now + timedelta(seconds=30)).run_cycle()
+
+        self.assertIsNone(PollSchedule.objects.get(match=self.live_match).next_due)
+
+    def test_old_live_match_stops_polling_without_completing(self):
+        now = timezone.now()
+        LivePollScheduler(self.scraper, now=now).run_cycle()
+        Match.objects.filter(pk=self.live_match.pk).update(status='Live', match_date=now - timedelta(hours=13))
+
+        LivePollScheduler(self.scraper, now=now + timedelta(seconds=30)).run_cycle()
+
+        schedule = PollSchedule.objects.get(match=self.live_match)
+        self.assertEqual(schedule.state, 'stopped')
+        self.assertIsNone(schedule.next_due)
+        self.assertEqual(Match.objects.get(pk=self.live_match.pk).status, 'Live')
+
+
+class QueryPlanTests(TestCase):
+    """The hot read paths must be served by index lookups, not table scans.
+
+    Seeds a few thousand matches (override with CREX_QUERY_PLAN_ROWS) and
+    runs ANALYZE, which is enough for SQLite's planner to pick the indexes;
+    timings on large tables are left to the bench_* commands.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_matches(int(os.environ.get('CREX_QUERY_PLAN_ROWS', 5000)))
+
+    def assertIndexedPlan(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = [row[-1] for row in cursor.fetchall()]
+        for step in plan:
+            if re.search(r'\bmatches_match\b', step) and step.startswith('SCAN'):
+                self.assertIn('INDEX', step, f"Full table scan in {plan} for {sql}")
+        self.assertFalse(
+            any('TEMP B-TREE' in step for step in plan), f"Sort without an index in {plan} for {sql}"
+        )
+
+    def assertViewUsesIndexes(self, url):
+        with mock.patch('matches.tasks.scrape_match_details.delay'):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+        match_queries = [q['sql'] for q in queries if 'matches_match' in q['sql']]
+        self.assertTrue(match_queries)
+        for sql in match_queries:
+            self.assertIndexedPlan(sql)
+
+    def test_views(self):
+        for url in [
+            reverse('matches:match_list'),
+            reverse('matches:match_list') + '?status=Live',
+            reverse('matches:match_list') + '?status=Scheduled&date=upcoming',
+            reverse('matches:match_list') + '?date=today',
+            reverse('matches:match_list') + '?team=Team+42',
+            reverse('matches:match_list') + '?venue=Ground+17&status=Completed',
+            reverse('matches:api_matches'),
+            reverse('matches:api_matches') + '?status=Completed',
+            reverse('matches:dashboard'),
+            reverse('matches:live_matches'),
+        ]:
+            with self.subTest(url=url):
+                self.assertViewUsesIndexes(url)
+
+    def test_live_polling_windows(self):
+        now = timezone.now()
+        check_window = Match.objects.filter(
+            match_date__lte=now + timedelta(hours=1), match_date__gte=now - timedelta(hours=6)
+        )
+        trigger_window = Match.objects.filter(
+            match_date__gte=now, match_date__lte=now + timedelta(hours=1), status='Scheduled'
+        )
+        for queryset in (check_window, trigger_window):
+            sql, params = queryset.query.sql_with_params()
+            self.assertIndexedPlan(sql, params)
+
+
+class DashboardStatsTests(TestCase):
+    """Dashboard counts come from one cached query that saves invalidate."""
+
+    def setUp(self):
+        cache.clear()
+        self.scraper = CREXScraper(cache=False)
+        self.scraper.save_match_batch(fixture_rows(6))
+        Match.objects.filter(pk__in=Match.objects.values('pk')[:2]).update(status='Live')
+        cache.clear()
+
+    def test_counts_use_one_query_then_cache(self):
+        with self.assertNumQueries(1):
+            counts = get_status_counts()
+        self.assertEqual(counts, {
+            'total_matches': 6, 'live_matches': 2, 'scheduled_matches': 4, 'completed_matches': 0,
+        })
+        with self.assertNumQueries(0):
+            get_status_counts()
+
+    def test_saves_invalidate_counts(self):
+        before = get_status_counts()['total_matches']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scraper.save_match_batch(fixture_rows(8))
+            # Until the batch commits, readers keep the old counts
+            self.assertEqual(get_status_counts()['total_matches'], before)
+
+        self.assertEqual(get_status_counts()['total_matches'], 8)
+
+    def test_dashboard_renders_counts(self):
+        response = self.client.get(reverse('matches:dashboard'))
+        self.assertEqual(response.context['live_matches'], 2)
+        self.assertEqual(response.context['total_matches'], 6)
+
+
+@override_settings(CACHES=PAGE_CACHES)
+class PageCacheTests(TestCase):
+    """Rendered pages are served from the page cache until a save bumps the data version."""
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        self.scraper = CREXScraper(cache=False)
+        self.scraper.save_match_batch(fixture_rows(6))
+
+    def test_second_request_is_a_hit_without_queries(self):
+        url = reverse('matches:match_list')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(second.content, first.content)
+        self.assertIn('csrftoken', second.cookies)
+
+    def test_query_string_is_part_of_the_key(self):
+        url = reverse('matches:match_list')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'status': 'Live'})
+        self.assertTrue(queries)
+
+    def test_saves_retire_cached_pages(self):
+        # A page rendered again has a template context; one served from the cache has none
+        for name in ('match_list', 'live_matches', 'dashboard'):
+            with self.subTest(view=name):
+                url = reverse(f'matches:{name}')
+                self.client.get(url)
+                self.assertIsNone(self.client.get(url).context)
+                bump_data_version()
+                self.assertIsNotNone(self.client.get(url).context)
+
+        url = reverse('matches:match_list')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scraper.save_match_batch(fixture_rows(8))
+        self.assertEqual(self.client.get(url).context['total_matches'], 8)
+
+    def test_dashboard_panels_do_not_change_the_key(self):
+        url = reverse('matches:dashboard')
+        self.client.get(url)
+        claim_scrape(Match.objects.first().id)
+
+        self.assertIsNone(self.client.get(url).context)
+
+    def test_stats(self):
+        url = reverse('matches:live_matches')
+        before = page_cache_stats().get('live_matches', {'hits': 0, 'misses': 0})
+        for _ in range(3):
+            self.client.get(url)
+
+        stats = page_cache_stats()['live_matches']
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+        self.assertEqual(stats['hits'] - before['hits'], 2)
+
+
+class LiveBroadcastTests(SimpleTestCase):
+    """Live updates reach subscribers as diffs against the last state."""
+
+    def test_diff_update(self):
+        previous = {'status': 'Live', 'live': {'India': '10/0', 'current_over': '1.2'}}
+        update = {'match_id': 1, 'status': 'Live', 'live': {'India': '14/0'}}
+
+        self.assertEqual(diff_update(previous, update), {
+            'match_id': 1, 'live': {'India': '14/0'}, 'removed': ['current_over'],
+        })
+        self.assertIsNone(diff_update(update, update))
+        self.assertEqual(diff_update(None, update)['status'], 'Live')
+
+    def test_fan_out_sends_diffs_to_interested_subscribers(self):
+        broadcaster = LiveBroadcaster()
+        broadcaster.loaded = True
+
+        async def scenario():
+            everything = await broadcaster.subscribe()
+            one_match = await broadcaster.subscribe(match_id=2)
+            broadcaster.listener.cancel()
+
+            broadcaster.apply({'match_id': 1, 'status': 'Live', 'live': {'India': '1/0'}})
+            broadcaster.apply({'match_id': 1, 'status': 'Live', 'live': {'India': '1/0'}})
+            broadcaster.apply({'match_id': 2, 'status': 'Live', 'live': {'England': '5/1'}})
+            return everything.queue.qsize(), await one_match.get(), broadcaster.snapshot(2)
+
+        received, diff, snapshot = asyncio.run(scenario())
+        self.assertEqual(received, 2)
+        self.assertEqual(diff, {'match_id': 2, 'status': 'Live', 'live': {'England': '5/1'}})
+        self.assertEqual(snapshot, [{'match_id': 2, 'status': 'Live', 'live': {'England': '5/1'}}])
+
+
+class LivePublishTests(TestCase):
+    """Saving a changed live section publishes it once the transaction commits."""
+
+    def test_live_change_is_published(self):
+        scraper = CREXScraper(cache=False)
+        match = scraper.save_match_data(fixture_rows(1)[0])
+        url = scraper.match_url(match.id)
+        details = scraper.parse_match_details(match_page(4))
+        scraper.page_changed(url, b'page')
+
+        with mock.patch('matches.scraper.publish_live_update') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                scraper.save_match_details(match, url, details)
+
+        publish.assert_called_once_with(match.id, 'Live', details['live'])
+
+    def test_broadcaster_starts_from_stored_snapshots(self):
+        match = CREXScraper(cache=False).save_match_data(fixture_rows(1)[0])
+        Match.objects.filter(pk=match.pk).update(status='Live')
+        LiveSnapshot.objects.create(match=match, live={'India': '120/3'}, last_sequence=4)
+        broadcaster = LiveBroadcaster()
+
+        async_to_sync(broadcaster.load_state)()
+
+        self.assertEqual(broadcaster.snapshot(), [{'match_id': match.id, 'status': 'Live', 'live': {'India': '120/3'}}])
+
+
+class MatchListApiTests(TestCase):
+    """The list API pages by cursor, projects its fields and supports ETags."""
+
+    def setUp(self):
+        cache.clear()
+        CREXScraper(cache=False).save_match_batch(fixture_rows(7))
+        # Ties on match_date must still page without gaps or repeats
+        Match.objects.filter(pk__in=Match.objects.values('pk')[:3]).update(match_date=timezone.now())
+        self.url = reverse('matches:api_matches')
+
+    def test_cursor_walks_every_match_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(self.url, params).json()
+            seen.extend(match['id'] for match in data['matches'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+
+        expected = list(Match.objects.order_by('-match_date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_is_one_query_without_total(self):
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, {'count': 0}).json()
+        self.assertNotIn('total_matches', data)
+        self.assertEqual(set(data['matches'][0]), {'id', 'home_team', 'away_team', 'match_date', 'location', 'status'})
+        self.assertEqual(self.client.get(self.url).json()['total_matches'], 7)
+
+    def test_unchanged_page_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 304)
+
+        Match.objects.update(location='Elsewhere')
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'nope'}).status_code, 400)
+
+
+class ExportTests(TestCase):
+    """Exports stream every format and filter, including incremental pulls."""
+
+    def setUp(self):
+        self.scraper = CREXScraper(cache=False)
+        self.scraper.save_match_batch(fixture_rows(5))
+        self.url = reverse('matches:export_matches')
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_ndjson_and_csv(self):
+        Match.objects.filter(pk=Match.objects.first().pk).update(status='Live')
+
+        lines = self.export().decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])['home_team'], Match.objects.first().home_team.name)
+        self.assertEqual(len(self.export(status='Live').splitlines()), 1)
+
+        rows = list(csv.DictReader(io.StringIO(self.export(format='csv').decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['location'], Match.objects.first().location)
+
+    @skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet(self):
+        table = pyarrow.parquet.read_table(io.BytesIO(self.export(format='parquet')))
+        self.assertEqual(table.num_rows, 5)
+        self.assertEqual(table.column('status').to_pylist(), ['Scheduled'] * 5)
+        self.assertEqual(table.schema.field('id').type, pyarrow.int64())
+        self.assertEqual(table.schema.field('match_date').type, pyarrow.timestamp('us', tz='UTC'))
+
+    @skipUnless(pyarrow, "pyarrow is not installed")
+    def test_parquet_types_do_not_depend_on_the_first_chunk(self):
+        rows = [{'id': None, 'home_team': None, 'away_team': None, 'match_date': None,
+                 'location': None, 'status': None, 'updated_at': None}]
+        rows += [{**row, 'location': 'Lords'} for row in (json.loads(line) for line in self.export().splitlines())]
+        for row in rows[1:]:
+            row['match_date'] = row['updated_at'] = timezone.now()
+
+        data = b''.join(parquet_chunks(iter(rows), export_fields('matches'), chunk_size=1))
+
+        table = pyarrow.parquet.read_table(io.BytesIO(data))
+        self.assertEqual(table.column('location').to_pylist(), [None] + ['Lords'] * 5)
+        self.assertEqual(table.schema.field('location').type, pyarrow.string())
+
+    def test_since_returns_matches_with_new_details(self):
+        Match.objects.update(updated_at=timezone.now() - timedelta(minutes=10))
+        watermark = self.client.get(self.url)['X-Export-Watermark']
+        self.assertEqual(self.export(since=watermark), b'')
+
+        match = Match.objects.first()
+        url = self.scraper.match_url(match.id)
+        self.scraper.page_changed(url, b'page')
+        self.scraper.save_match_details(match, url, self.scraper.parse_match_details(match_page(4)))
+
+        self.assertEqual([json.loads(line)['id'] for line in self.export(since=watermark).splitlines()], [match.id])
+        batting = self.export(dataset='batting', since=watermark).splitlines()
+        self.assertEqual(len(batting), BattingEntry.objects.count())
+
+    def test_watermark_repeats_rows_that_may_still_be_committing(self):
+        Match.objects.update(updated_at=timezone.now() - timedelta(minutes=10))
+        # Stamped just before the export, as a writer that commits after the export's read would be
+        Match.objects.filter(pk=Match.objects.first().pk).update(updated_at=timezone.now() - timedelta(seconds=1))
+        watermark = self.client.get(self.url)['X-Export-Watermark']
+
+        self.assertEqual(len(self.export(since=watermark).splitlines()), 1)
+
+    def test_unchanged_list_scrape_keeps_updated_at(self):
+        Match.objects.update(updated_at=timezone.now() - timedelta(minutes=10))
+        watermark = self.client.get(self.url)['X-Export-Watermark']
+        rows = fixture_rows(5)
+        rows[0]['location'] = 'New Ground'
+
+        saved = self.scraper.save_match_batch(rows)
+
+        self.assertEqual(sorted(match.pk for match in saved), sorted(Match.objects.values_list('pk', flat=True)))
+        exported = [json.loads(line) for line in self.export(since=watermark).splitlines()]
+        self.assertEqual([row['location'] for row in exported], ['New Ground'])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+
+class ScrapeCoalescingTests(TestCase):
+    """Page views of one match share a single in-flight detail scrape."""
+
+    def setUp(self):
+        caches['coordination'].clear()
+        self.match = CREXScraper(cache=False).save_match_data(fixture_rows(1)[0])
+        Match.objects.filter(pk=self.match.pk).update(status='Live')
+        self.url = reverse('matches:match_detail', args=[self.match.id])
+
+    def test_concurrent_views_enqueue_once(self):
+        with mock.patch('matches.tasks.scrape_match_details.delay') as delay:
+            for _ in range(5):
+                self.client.get(self.url)
+        delay.assert_called_once_with(self.match.id)
+        self.assertEqual(scrape_request_stats(), {'enqueued': 1, 'in_flight': 4, 'fresh': 0, 'suppressed': 4})
+
+    def test_fresh_details_suppress_and_failures_release(self):
+        with mock.patch('matches.tasks.scrape_match_details.delay') as delay:
+            self.client.get(self.url)
+            release_scrape(self.match.id)
+            self.client.get(self.url)
+            self.assertEqual(delay.call_count, 1)
+            self.assertEqual(scrape_request_stats()['fresh'], 1)
+
+            caches['coordination'].clear()
+            delay.side_effect = ConnectionError("broker down")
+            self.client.get(self.url)
+            delay.side_effect = None
+            self.client.get(self.url)
+            self.assertEqual(delay.call_count, 3)
+
+    def test_simultaneous_claims_enqueue_once(self):
+        start = threading.Barrier(8)
+        outcomes = []
+
+        def claim():
+            start.wait()
+            outcomes.append(claim_scrape(self.match.id))
+
+        threads = [threading.Thread(target=claim) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['enqueued'] + ['in_flight'] * 7)
+        self.assertEqual(scrape_request_stats(), {'enqueued': 1, 'in_flight': 7, 'fresh': 0, 'suppressed': 7})
+
+    def test_task_releases_claim(self):
+        self.assertEqual(claim_scrape(self.match.id), 'enqueued')
+        with mock.patch.object(CREXScraper, 'scrape_match_details', return_value=None):
+            scrape_match_details(self.match.id)
+        self.assertEqual(claim_scrape(self.match.id), 'fresh')
+
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    """The offline suite's stub server, measurements and regression check."""
+
+    def test_stub_server_serves_corpus_and_injects_errors(self):
+        corpus = recorded_pages()
+        with StubServer(recorded=True, error_rate=0.5, seed=1) as server:
+            scraper = CREXScraper(base_url=server.base_url, cache=False)
+            statuses = [scraper.session.get(scraper.match_url(1)).status_code for _ in range(20)]
+            errors = server.httpd.errors_served
+            server.httpd.error_rate = 0
+            body = scraper.session.get(scraper.match_url(1)).content
+
+        self.assertEqual(statuses.count(503), errors)
+        self.assertTrue(0 < errors < 20)
+        self.assertEqual(body, corpus['match_live.html'][1])
+
+    def test_measure_and_compare(self):
+        result = measure('noop', lambda: None, repeat=5, items=10)
+        self.assertEqual(result['runs'], 5)
+        self.assertEqual(set(result), {'name', 'runs', 'items', 'throughput', 'p50_ms', 'p99_ms', 'peak_mib'})
+
+        baseline = {'benchmarks': [{'name': 'noop', 'throughput': 100, 'p50_ms': 1.0, 'p99_ms': 2.0, 'peak_mib': 1.0}]}
+        current = {'benchmarks': [{'name': 'noop', 'throughput': 50, 'p50_ms': 1.05, 'p99_ms': 4.0, 'peak_mib': 1.0}]}
+        self.assertEqual(
+            [(metric, change) for _, metric, _, _, change in compare(current, baseline)],
+            [('p99_ms', 1.0), ('throughput', -0.5)],
+        )
+
+
+class MetricsTests(TestCase):
+    """Scraper, task and view hot paths show up on /metrics."""
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_fetch_extract_and_save_are_recorded(self):
+        fetched = self.sample('crex_http_request_seconds_count', url_class='fixtures', status='200')
+        parsed = self.sample('crex_extract_seconds_count', extractor='extract_match_rows')
+        saved = self.sample('crex_save_rows_total', operation='save_match_batch')
+
+        with StubServer(fixture_count=5) as server:
+            CREXScraper(base_url=server.base_url, cache=False).scrape_match_list()
+
+        self.assertEqual(self.sample('crex_http_request_seconds_count', url_class='fixtures', status='200'), fetched + 1)
+        self.assertEqual(self.sample('crex_extract_seconds_count', extractor='extract_match_rows'), parsed + 1)
+        self.assertEqual(self.sample('crex_save_rows_total', operation='save_match_batch'), saved + 5)
+
+    def test_task_outcomes(self):
+        before = self.sample('crex_task_seconds_count', task='matches.tasks.scrape_match_details', outcome='success')
+        scrape_match_details.apply(args=[12345])
+
+        after = self.sample('crex_task_seconds_count', task='matches.tasks.scrape_match_details', outcome='success')
+        self.assertEqual(after, before + 1)
+
+    def test_views_and_endpoint(self):
+        self.client.get(reverse('matches:dashboard'))
+        response = self.client.get(reverse('matches:metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'crex_view_seconds_count{method="GET",status="200",view="matches:dashboard"}', response.content)
+        self.assertGreater(self.sample('crex_view_queries_sum', view='matches:dashboard'), 0)
+
+
+class PipelineTests(TestCase):
+    """Pipelined fetch, parse and persist give the same results as inline scraping."""
+
+    def setUp(self):
+        now = timezone.now()
+        rows = fixture_rows(6)
+        for i, row in enumerate(rows):
+            row['match_date'] = now - timedelta(minutes=i)
+        CREXScraper(cache=False).save_match_batch(rows)
+
+    def pipeline(self, server):
+        return PipelinedCREXScraper(
+            base_url=server.base_url, cache=False, fetch_workers=3, parse_workers=2, persist_batch=4, queue_size=2,
+        )
+
+    def test_check_live_matches(self):
+        with StubServer() as server:
+            scraper = self.pipeline(server)
+            self.assertEqual(scraper.check_live_matches(), 6)
+            self.assertEqual(scraper.stage_stats['persisted'], 6)
+
+            again = self.pipeline(server)
+            self.assertEqual(again.check_live_matches(), 0)
+            self.assertEqual(again.stage_stats['unchanged'], 6)
+
+        expected = CREXScraper(cache=False).parse_match_details(match_page(Match.objects.first().id))
+        self.assertEqual(load_match_details(Match.objects.first())['scorecard'], expected['scorecard'])
+
+    def test_scrape_match_list_and_failures(self):
+        with StubServer(fixture_count=5) as server:
+            self.assertEqual(self.pipeline(server).scrape_match_list(), 5)
+
+            scraper = self.pipeline(server)
+            results = scraper.scrape_many_match_details([scraper.match_url(1), f"{server.base_url}/missing"])
+        self.assertIn('scorecard', results[scraper.match_url(1)])
+        self.assertEqual(results[f"{server.base_url}/missing"], {})
+        self.assertEqual(scraper.stage_stats['failed'], 1)
+
+    def run_in_thread(self, func):
+        """Run ``func`` and return its exception, failing if it does not finish."""
+        errors = []
+
+        def run():
+            try:
+                func()
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive(), "Pipeline did not finish")
+        return errors[0] if errors else None
+
+    def test_failed_persist_stops_every_stage(self):
+        with StubServer() as server:
+            scraper = self.pipeline(server)
+            jobs = [PageJob(scraper.match_url(i)) for i in range(1, 31)]
+
+            def persist(batch):
+                raise OperationalError("database is locked")
+
+            error = self.run_in_thread(lambda: scraper.run_pipeline(jobs, persist))
+        self.assertIsInstance(error, OperationalError)
+        self.assertEqual(scraper.stage_stats['persisted'], 0)
+        # The fetch and parse threads have all exited
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith('ThreadPoolExecutor')])
+
+    def test_stage_error_is_a_failed_job(self):
+        with StubServer() as server:
+            scraper = self.pipeline(server)
+            with mock.patch.object(scraper, 'page_changed', side_effect=RuntimeError("bad fingerprint")):
+                error = self.run_in_thread(lambda: scraper.scrape_many_match_details([scraper.match_url(1)]))
+        self.assertIsNone(error)
+        self.assertEqual(scraper.stage_stats['failed'], 1)
@@ -9,11 +9,18 @@ urlpatterns = [
     path('matches/', views.match_list, name='match_list'),
     path('matches/<int:match_id>/', views.match_detail, name='match_detail'),
     path('live/', views.live_matches, name='live_matches'),
+    path('live/stream/', views.live_stream, name='live_stream'),
     
     # API endpoints
     path('api/matches/', views.api_matches, name='api_matches'),
+    path('api/matches/<int:match_id>/', views.api_match_detail, name='api_match_detail'),
+    path('api/matches/<int:match_id>/events/', views.api_match_events, name='api_match_events'),
+    path('api/export/', views.export_matches, name='export_matches'),
     path('api/trigger-scraping/', views.trigger_scraping, name='trigger_scraping'),
     
+    # Monitoring
+    path('metrics', views.metrics, name='metrics'),
+    
     # Admin/Testing
     path('test-scraper/', views.test_scraper, name='test_scraper'),
 ]
\ No newline at end of file
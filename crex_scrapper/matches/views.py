@@ -1,64 +1,108 @@
 from django.shortcuts import render
 
 # Create your views here.
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags, quote_etag
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.db.models import Q
-from .models import Match, Team
+from .models import Match
 from .scraper import CREXScraper
-from .tasks import update_match_list, check_live_matches, scrape_match_details
+from .scorecards import load_match_details
+from .events import events_since
+from .search import search_matches
+from .facets import facet_count
+from .export import export_stream, export_watermark, parse_timestamp
+from .stats import COUNTED_STATUSES, get_status_counts
+from .live import broadcaster
+from .tasks import update_match_list, check_live_matches, request_match_scrape
+from .coalesce import scrape_request_stats
+from .breaker import breaker_states
+from .page_cache import cached_page
+from .metrics import render_metrics
+import asyncio
+import binascii
+import hashlib
+import json
 import logging
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
 
+def today_range():
+    """Return today's [start, end) in the current timezone.
+
+    Filtering on this range can use the match_date index, unlike __date.
+    """
+    start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
+
+
+class CountedPaginator(Paginator):
+    """Paginator for a queryset whose total is already known."""
+
+    def __init__(self, object_list, per_page, count):
+        super().__init__(object_list, per_page)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        return self.known_count
+
+
+@cached_page('match_list', vary=lambda request: [timezone.localdate()])
 def match_list(request):
     """Display paginated list of matches."""
     # Get filter parameters
     status_filter = request.GET.get('status', 'all')
     team_filter = request.GET.get('team', '')
+    venue_filter = request.GET.get('venue', '')
     date_filter = request.GET.get('date', 'all')
     
     # Base queryset
     matches = Match.objects.select_related('home_team', 'away_team').order_by('-match_date')
     
     # Apply filters
-    if status_filter != 'all':
-        matches = matches.filter(status=status_filter)
-    
-    if team_filter:
-        matches = matches.filter(
-            Q(home_team__name__icontains=team_filter) | 
-            Q(away_team__name__icontains=team_filter)
-        )
+    status = None if status_filter == 'all' else status_filter
+    if status:
+        matches = matches.filter(status=status)
     
+    start = end = None
     if date_filter == 'today':
-        today = timezone.now().date()
-        matches = matches.filter(match_date__date=today)
+        start, end = today_range()
     elif date_filter == 'upcoming':
-        now = timezone.now()
-        matches = matches.filter(match_date__gte=now)
+        start = timezone.now()
     elif date_filter == 'past':
-        now = timezone.now()
-        matches = matches.filter(match_date__lt=now)
+        end = timezone.now()
+    if start is not None:
+        matches = matches.filter(match_date__gte=start)
+    if end is not None:
+        matches = matches.filter(match_date__lt=end)
+    
+    # Team and venue search goes through the search indexes, which also count the hits;
+    # otherwise the total comes from the facet counts rather than a COUNT over matches
+    if team_filter or venue_filter:
+        matches, total = search_matches(matches, team_filter, venue_filter)
+    else:
+        total = facet_count(status, start, end)
+    paginator = CountedPaginator(matches, 20, total)  # 20 matches per page
     
     # Pagination
-    paginator = Paginator(matches, 20)  # 20 matches per page
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Get all teams for filter dropdown
-    teams = Team.objects.all().order_by('name')
-    
     context = {
         'matches': page_obj,
-        'teams': teams,
         'status_filter': status_filter,
         'team_filter': team_filter,
+        'venue_filter': venue_filter,
         'date_filter': date_filter,
-        'total_matches': matches.count(),
+        'total_matches': paginator.count,
     }
     
     return render(request, 'matches/match_list.html', context)
@@ -66,18 +110,29 @@ def match_list(request):
 
 def match_detail(request, match_id):
     """Display detailed information for a specific match."""
-    match = get_object_or_404(Match, id=match_id)
+    match = get_object_or_404(Match.objects.select_related('home_team', 'away_team'), id=match_id)
+    details = load_match_details(match)
+    has_details = any(details.values())
     
-    # Trigger detailed scraping for this match
-    scrape_match_details.delay(match_id)
+    # Details are served from the database; only scrape when none are
+    # stored yet or the match is live and may have moved on. Concurrent
+    # viewers share one in-flight scrape.
+    if not has_details or match.status == 'Live':
+        try:
+            request_match_scrape(match_id)
+        except Exception as e:
+            logger.error(f"Error triggering detail scraping for match {match_id}: {e}")
     
     context = {
         'match': match,
+        'details': details,
+        'has_details': has_details,
     }
     
     return render(request, 'matches/match_detail.html', context)
 
 
+@cached_page('live_matches')
 def live_matches(request):
     """Display currently live matches."""
     live_matches = Match.objects.filter(status='Live').select_related('home_team', 'away_team')
@@ -89,36 +144,207 @@ def live_matches(request):
     return render(request, 'matches/live_matches.html', context)
 
 
+async def live_stream(request):
+    """Stream live score and status diffs as server-sent events.
+
+    Needs an ASGI server. Pass ?match=<id> to follow a single match. The
+    first event is a snapshot; every later one carries only what changed.
+    """
+    match_id = request.GET.get('match')
+    match_id = int(match_id) if match_id and match_id.isdigit() else None
+    subscription = await broadcaster.subscribe(match_id)
+    keepalive = getattr(settings, 'CREX_LIVE_KEEPALIVE', 15)
+
+    async def events():
+        try:
+            yield "retry: 5000\n\n"
+            yield f"event: snapshot\ndata: {json.dumps(broadcaster.snapshot(match_id))}\n\n"
+            while True:
+                try:
+                    diff = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: update\ndata: {json.dumps(diff)}\n\n"
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# Fields returned per match by the list API, as .values() lookups
+API_MATCH_FIELDS = {
+    'id': 'id',
+    'home_team': 'home_team__name',
+    'away_team': 'away_team__name',
+    'match_date': 'match_date',
+    'location': 'location',
+    'status': 'status',
+}
+
+
+def encode_cursor(match_date, match_id):
+    """Opaque cursor for the position just after a (match_date, id) row."""
+    raw = f"{match_date.isoformat()}|{match_id}"
+    return urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (match_date, id) a cursor points after; ValueError if invalid."""
+    try:
+        raw = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        match_date, match_id = raw.split('|')
+        return datetime.fromisoformat(match_date), int(match_id)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 def api_matches(request):
-    """API endpoint to get matches in JSON format."""
+    """API endpoint to get matches in JSON format.
+
+    Newest first, paged with an opaque ``cursor`` (keyset on match_date, id)
+    instead of offsets, so every page costs the same. Pass ``count=0`` to
+    skip the total. Responses carry an ETag and repeat requests with a
+    matching If-None-Match get 304.
+    """
     status_filter = request.GET.get('status', 'all')
-    limit = min(int(request.GET.get('limit', 50)), 100)  # Max 100 matches
-    
-    matches = Match.objects.select_related('home_team', 'away_team').order_by('-match_date')
-    
+    cursor = request.GET.get('cursor')
+    include_total = request.GET.get('count', '1').lower() not in ('0', 'false', 'no')
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 100))  # Max 100 matches
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    matches = Match.objects.order_by('-match_date', '-id')
     if status_filter != 'all':
         matches = matches.filter(status=status_filter)
-    
-    matches = matches[:limit]
-    
-    data = []
-    for match in matches:
-        data.append({
-            'id': match.id,
-            'home_team': match.home_team.name,
-            'away_team': match.away_team.name,
-            'match_date': match.match_date.isoformat(),
-            'location': match.location,
-            'status': match.status,
-        })
-    
-    return JsonResponse({
+    if after:
+        match_date, match_id = after
+        # The redundant __lte bound lets the index seek to the cursor instead of scanning to it
+        matches = matches.filter(match_date__lte=match_date).filter(
+            Q(match_date__lt=match_date) | Q(id__lt=match_id)
+        )
+
+    # One extra row tells us whether there is a next page
+    rows = list(matches.values(*API_MATCH_FIELDS.values())[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    data = [{name: row[lookup] for name, lookup in API_MATCH_FIELDS.items()} for row in rows]
+    next_cursor = encode_cursor(rows[-1]['match_date'], rows[-1]['id']) if has_more else None
+    for match in data:
+        match['match_date'] = match['match_date'].isoformat()
+
+    payload = {
         'matches': data,
         'count': len(data),
-        'total_matches': Match.objects.count(),
+        'next_cursor': next_cursor,
+    }
+    if include_total:
+        payload['total_matches'] = count_matches(status_filter)
+
+    body = json.dumps(payload)
+    etag = quote_etag(hashlib.md5(body.encode()).hexdigest())
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def count_matches(status_filter):
+    """Total matches for a status filter, from the cached status counts when possible."""
+    counts = get_status_counts()
+    if status_filter == 'all':
+        return counts['total_matches']
+    for name, status in COUNTED_STATUSES.items():
+        if status == status_filter:
+            return counts[name]
+    return Match.objects.filter(status=status_filter).count()
+
+
+def api_match_detail(request, match_id):
+    """API endpoint to get a match with its stored details."""
+    match = get_object_or_404(Match.objects.select_related('home_team', 'away_team'), id=match_id)
+    
+    return JsonResponse({
+        'id': match.id,
+        'home_team': match.home_team.name,
+        'away_team': match.away_team.name,
+        'match_date': match.match_date.isoformat(),
+        'location': match.location,
+        'status': match.status,
+        **load_match_details(match),
     })
 
 
+def api_match_events(request, match_id):
+    """API endpoint to get a match's live events after sequence ``since``.
+
+    Clients pass the returned ``last_sequence`` as the next ``since`` to
+    pull only new balls, scores and wickets.
+    """
+    try:
+        since = max(0, int(request.GET.get('since', 0)))
+        limit = max(1, min(int(request.GET.get('limit', 500)), 1000))  # Max 1000 events
+    except ValueError:
+        return JsonResponse({'error': 'since and limit must be integers'}, status=400)
+
+    # One extra row tells us whether there are more events
+    events = events_since(match_id, since, limit + 1)
+    has_more = len(events) > limit
+    events = events[:limit]
+    if not events and not Match.objects.filter(id=match_id).exists():
+        return JsonResponse({'error': 'Match not found'}, status=404)
+
+    for event in events:
+        event['created_at'] = event['created_at'].isoformat()
+    return JsonResponse({
+        'match_id': match_id,
+        'events': events,
+        'last_sequence': events[-1]['sequence'] if events else since,
+        'has_more': has_more,
+    })
+
+
+def export_matches(request):
+    """Stream matches or scorecard rows as NDJSON, CSV or Parquet.
+
+    Filters: ``status``, ``start``/``end`` (match date) and ``since``
+    (updated after). The X-Export-Watermark header is the ``since`` to
+    pass on the next incremental pull.
+    """
+    watermark = export_watermark()
+    try:
+        content_type, extension, chunks = export_stream(
+            fmt=request.GET.get('format', 'ndjson'),
+            dataset=request.GET.get('dataset', 'matches'),
+            status=request.GET.get('status'),
+            start=parse_timestamp(request.GET.get('start')),
+            end=parse_timestamp(request.GET.get('end')),
+            since=parse_timestamp(request.GET.get('since')),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    filename = f"{request.GET.get('dataset', 'matches')}.{extension}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Export-Watermark'] = watermark.isoformat()
+    return response
+
+
+def metrics(request):
+    """Prometheus metrics for scraping, tasks and views."""
+    body, content_type = render_metrics()
+    return HttpResponse(body, content_type=content_type)
+
+
 def trigger_scraping(request):
     """Manually trigger scraping tasks."""
     if request.method == 'POST':
@@ -142,25 +368,27 @@ def trigger_scraping(request):
     return JsonResponse({'success': False, 'message': 'Only POST requests are allowed.'})
 
 
+# The scrape and circuit panels change on almost every request, so they are left out of
+# the key and may be up to CREX_PAGE_CACHE_TIMEOUT old
+@cached_page('dashboard', vary=lambda request: [timezone.localdate()])
 def dashboard(request):
     """Display dashboard with match statistics."""
-    total_matches = Match.objects.count()
-    live_matches = Match.objects.filter(status='Live').count()
-    scheduled_matches = Match.objects.filter(status='Scheduled').count()
-    completed_matches = Match.objects.filter(status='Completed').count()
+    # Total and per-status counts, cached until the scraper changes matches
+    counts = get_status_counts()
     
     # Recent matches (last 10)
     recent_matches = Match.objects.select_related('home_team', 'away_team').order_by('-match_date')[:10]
     
     # Today's matches
-    today = timezone.now().date()
-    today_matches = Match.objects.filter(match_date__date=today).select_related('home_team', 'away_team')
+    start, end = today_range()
+    today_matches = Match.objects.filter(
+        match_date__gte=start, match_date__lt=end
+    ).select_related('home_team', 'away_team')
     
     context = {
-        'total_matches': total_matches,
-        'live_matches': live_matches,
-        'scheduled_matches': scheduled_matches,
-        'completed_matches': completed_matches,
+        **counts,
+        'scrape_requests': scrape_request_stats(),
+        'breakers': breaker_states(),
         'recent_matches': recent_matches,
         'today_matches': today_matches,
     }
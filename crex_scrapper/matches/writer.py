@@ -0,0 +1,161 @@
+"""
+Single-writer queue for scraper database writes.
+
+Each process has one writer thread. Scrapers hand it their saves with
+submit_write() and get a Future back; the thread commits whatever has
+queued up (up to CREX_WRITE_BATCH saves) in one transaction, each save in
+its own savepoint so one bad row does not lose the others. Fewer, larger
+transactions mean the SQLite write lock is taken far less often, and a
+process never has two of its own threads competing for it.
+
+Saves submitted from inside a transaction run inline instead, so they
+stay part of the caller's transaction.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .metrics import WRITE_BATCH_SAVES, WRITE_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Tells the writer thread to exit
+STOP = object()
+
+
+class WriteJob:
+    """One queued save."""
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.queued_at = time.perf_counter()
+
+
+class WriteQueue:
+    """Runs submitted saves on one thread, many per transaction."""
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'CREX_WRITE_BATCH', 100)
+        self.pending = queue.Queue()
+        self.stats = {'saves': 0, 'failed': 0, 'transactions': 0, 'largest_batch': 0}
+        self.thread = threading.Thread(target=self.run, name='crex-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue ``func(*args, **kwargs)`` and return a Future for its result."""
+        if not self.thread.is_alive():
+            raise RuntimeError("Write queue is closed")
+        job = WriteJob(func, args, kwargs)
+        self.pending.put(job)
+        return job.future
+
+    def close(self):
+        """Commit everything queued so far and stop the writer thread."""
+        if self.thread.is_alive():
+            self.pending.put(STOP)
+            self.thread.join()
+
+    def run(self):
+        try:
+            while True:
+                job = self.pending.get()
+                if job is STOP:
+                    return
+                # Group commit: take whatever else queued up while the last batch was written
+                batch = [job]
+                stop = False
+                while len(batch) < self.batch_size:
+                    try:
+                        job = self.pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is STOP:
+                        stop = True
+                        break
+                    batch.append(job)
+                self.write(batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def write(self, batch):
+        """Commit a batch of saves in one transaction and resolve their futures."""
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for job in batch:
+                    WRITE_WAIT_SECONDS.observe(time.perf_counter() - job.queued_at)
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((job.func(*job.args, **job.kwargs), None))
+                    except Exception as e:
+                        outcomes.append((None, e))
+        except Exception as e:
+            logger.error(f"Write queue transaction of {len(batch)} saves failed: {e}")
+            outcomes = [(None, e)] * len(batch)
+        else:
+            self.stats['transactions'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+            WRITE_BATCH_SAVES.observe(len(batch))
+
+        for job, (result, error) in zip(batch, outcomes):
+            self.stats['saves'] += 1
+            if error is None:
+                job.future.set_result(result)
+            else:
+                self.stats['failed'] += 1
+                job.future.set_exception(error)
+
+
+# pid -> queue, so a forked child starts its own writer thread
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def write_queue():
+    """This process's write queue, started on first use."""
+    pid = os.getpid()
+    writes = _queues.get(pid)
+    if writes is None:
+        with _queues_lock:
+            writes = _queues.get(pid)
+            if writes is None:
+                _queues.clear()
+                writes = _queues[pid] = WriteQueue()
+    return writes
+
+
+def submit_write(func, *args, **kwargs):
+    """Save through this process's writer thread and return a Future.
+
+    Runs the save inline (returning a finished Future) when the caller is
+    already inside a transaction or CREX_WRITE_QUEUE is off.
+    """
+    if connection.in_atomic_block or not getattr(settings, 'CREX_WRITE_QUEUE', True):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return write_queue().submit(func, *args, **kwargs)
+
+
+@atexit.register
+def close_write_queue():
+    writes = _queues.get(os.getpid())
+    if writes is not None:
+        writes.close()